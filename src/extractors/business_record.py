@@ -0,0 +1,170 @@
+import json
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# How the cleaner treats each field
+KIND_TEXT = "text"
+KIND_TEXT_LIST = "text_list"
+KIND_TEXT_MAP = "text_map"
+KIND_REVIEW_COUNT = "review_count"
+KIND_VALUE = "value"
+
+# The fixed output schema, in serialization order. Every record carries the
+# required fields; optional ones are only serialized once they are set.
+RECORD_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("title", KIND_TEXT),
+    ("rating", KIND_TEXT),
+    ("reviewCount", KIND_REVIEW_COUNT),
+    ("isClaimed", KIND_TEXT),
+    ("priceLevel", KIND_TEXT),
+    ("categories", KIND_TEXT),
+    ("fullAddress", KIND_TEXT),
+    ("city", KIND_TEXT),
+    ("state", KIND_TEXT),
+    ("zipcode", KIND_TEXT),
+    ("phoneNumber", KIND_TEXT),
+    ("images", KIND_TEXT_LIST),
+    ("website", KIND_TEXT),
+    ("hours", KIND_TEXT_MAP),
+    ("businessOwnerName", KIND_TEXT),
+    ("about", KIND_TEXT),
+    ("reviewhighlights", KIND_TEXT_LIST),
+    ("businessServices", KIND_TEXT_MAP),
+    ("timestamp", KIND_TEXT),
+    ("url", KIND_TEXT),
+    ("is_page_not_found", KIND_VALUE),
+)
+REQUIRED_FIELDS: Tuple[str, ...] = tuple(name for name, _ in RECORD_SCHEMA)
+OPTIONAL_FIELDS: Tuple[str, ...] = ("error", "fetchRetries", "throttledSeconds", "fieldSources")
+ALL_FIELDS: Tuple[str, ...] = REQUIRED_FIELDS + OPTIONAL_FIELDS
+_FIELD_SET = frozenset(ALL_FIELDS)
+
+class _Unset:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<unset>"
+
+    def __reduce__(self) -> str:
+        return "_UNSET"
+
+_UNSET: Any = _Unset()
+
+_encode_compact = json.JSONEncoder(ensure_ascii=False).encode
+_encode_indented = json.JSONEncoder(ensure_ascii=False, indent=4).encode
+# Serialized keys are constant; encode them once
+_KEYS: Dict[str, str] = {name: json.dumps(name) + ": " for name in ALL_FIELDS}
+
+def _encode_scalar(value: Any) -> str:
+    # Most fields are strings or None; skip the encoder's dispatch for them
+    if value is None:
+        return "null"
+    if value.__class__ is str:
+        return encode_basestring(value)
+    return _encode_compact(value)
+
+def _compile(source: str, name: str) -> Callable[..., Any]:
+    namespace: Dict[str, Any] = {"_UNSET": _UNSET, "_encode_scalar": _encode_scalar}
+    exec(source, namespace)
+    return namespace[name]
+
+# __init__ and the compact serializer are generated from the schema once at
+# import: straight-line attribute access instead of a getattr loop per field.
+_INIT_SOURCE = "def __init__(self, {args}):\n{body}".format(
+    args=", ".join(REQUIRED_FIELDS),
+    body="".join(f"    self.{name} = {name}\n" for name in REQUIRED_FIELDS),
+)
+_TO_JSON_SOURCE = "def _to_json(self):\n    parts = [{required}]\n{optional}    parts.append('}}')\n    return ''.join(parts)\n".format(
+    required=", ".join(
+        f"{('{' if index == 0 else ', ') + _KEYS[name]!r}, _encode_scalar(self.{name})"
+        for index, name in enumerate(REQUIRED_FIELDS)
+    ),
+    optional="".join(
+        f"    value = getattr(self, {name!r}, _UNSET)\n"
+        f"    if value is not _UNSET:\n"
+        f"        parts += ({', ' + _KEYS[name]!r}, _encode_scalar(value))\n"
+        for name in OPTIONAL_FIELDS
+    ),
+)
+
+class BusinessRecord:
+    """
+    One scraped business with a fixed, slotted schema.
+    Supports the mapping operations the pipeline uses (record["url"],
+    record.get("error"), assignment of known fields) and serializes itself
+    straight to JSON, byte-identical to json.dumps of the equivalent dict.
+    """
+
+    __slots__ = ALL_FIELDS
+
+    # Positional, in REQUIRED_FIELDS order; optional fields start unset
+    __init__ = _compile(_INIT_SOURCE, "__init__")
+    _to_json = _compile(_TO_JSON_SOURCE, "_to_json")
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, key, _UNSET) if key in _FIELD_SET else _UNSET
+        if value is _UNSET:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _FIELD_SET:
+            raise KeyError(f"{key!r} is not a BusinessRecord field")
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_SET and getattr(self, key, _UNSET) is not _UNSET  # type: ignore[arg-type]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, _UNSET) if key in _FIELD_SET else _UNSET
+        return default if value is _UNSET else value
+
+    def keys(self) -> Iterator[str]:
+        return (name for name, _ in self.items())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for name in ALL_FIELDS:
+            value = getattr(self, name, _UNSET)
+            if value is not _UNSET:
+                yield name, value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """
+        Serialize without building an intermediate dict. Matches
+        json.dumps(record.to_dict(), ensure_ascii=False) and, with
+        indent=4, the same call with indent=4.
+        """
+        if indent is None:
+            return self._to_json()
+        if indent != 4:
+            return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+        parts: List[str] = []
+        for name, value in self.items():
+            if isinstance(value, (dict, list)) and value:
+                encoded = _encode_indented(value).replace("\n", "\n    ")
+            else:
+                encoded = _encode_scalar(value)
+            parts.append("    " + _KEYS[name] + encoded)
+        return "{\n" + ",\n".join(parts) + "\n}" if parts else "{}"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BusinessRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"BusinessRecord({self.to_dict()!r})"
+
+    # Slots without a __dict__: pickle (for the parse process pool) as a
+    # tuple of values in ALL_FIELDS order, unset ones included.
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name, _UNSET) for name in ALL_FIELDS)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(ALL_FIELDS, state):
+            setattr(self, name, value)
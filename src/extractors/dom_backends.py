@@ -0,0 +1,263 @@
+import re
+from abc import ABC, abstractmethod
+from typing import AbstractSet, Any, Iterator, List, Match, Optional, Sequence
+
+# Text inside these elements is never part of the visible page text; this
+# mirrors what BeautifulSoup's get_text() skips so every backend agrees.
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+DEFAULT_PARSER_BACKEND = "html.parser"
+
+class Node(ABC):
+    """
+    Minimal element interface the field extractors are written against.
+    Text methods follow BeautifulSoup's get_text() semantics.
+    """
+
+    name: str
+
+    @abstractmethod
+    def get(self, attr: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def text(self, separator: str = "", strip: bool = True) -> str: ...
+
+    @property
+    @abstractmethod
+    def string(self) -> Optional[str]: ...
+
+    @abstractmethod
+    def find_all(self, names: Sequence[str]) -> List["Node"]: ...
+
+    @abstractmethod
+    def next_element_sibling(self) -> Optional["Node"]: ...
+
+class Document(ABC):
+    """A parsed page: its elements in document order plus its flattened text."""
+
+    @abstractmethod
+    def iter_elements(self) -> Iterator[Node]: ...
+
+    @abstractmethod
+    def text(self, separator: str = " ") -> str: ...
+
+    def close(self) -> None:
+        """Free the tree now rather than whenever the garbage collector gets to it."""
+
+class _SoupNode(Node):
+    __slots__ = ("tag", "name")
+
+    def __init__(self, tag: Any) -> None:
+        self.tag = tag
+        self.name = tag.name
+
+    def get(self, attr: str) -> Optional[str]:
+        return self.tag.get(attr)
+
+    def text(self, separator: str = "", strip: bool = True) -> str:
+        return self.tag.get_text(separator, strip=strip)
+
+    @property
+    def string(self) -> Optional[str]:
+        return self.tag.string
+
+    def find_all(self, names: Sequence[str]) -> List[Node]:
+        return [_SoupNode(tag) for tag in self.tag.find_all(list(names))]
+
+    def next_element_sibling(self) -> Optional[Node]:
+        sib = self.tag.find_next_sibling()
+        return _SoupNode(sib) if sib is not None else None
+
+class _SoupDocument(Document):
+    def __init__(self, html: str, builder: str) -> None:
+        from bs4 import BeautifulSoup, Tag
+
+        self._tag_type = Tag
+        self.soup = BeautifulSoup(html, builder)
+
+    def iter_elements(self) -> Iterator[Node]:
+        tag_type = self._tag_type
+        for node in self.soup.descendants:
+            if isinstance(node, tag_type):
+                yield _SoupNode(node)
+
+    def text(self, separator: str = " ") -> str:
+        return self.soup.get_text(separator, strip=True)
+
+    def close(self) -> None:
+        # Parent/child links make the tree one big reference cycle; breaking
+        # it here frees the page without waiting for a cyclic GC pass
+        self.soup.decompose()
+
+def _lexbor_strings(root: Any) -> Iterator[str]:
+    # Iterative walk so very deep pages cannot hit the recursion limit
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        tag = node.tag
+        if tag == "-text":
+            yield node.text_content or ""
+            continue
+        if tag.startswith("-") or tag in _NON_TEXT_TAGS:
+            continue
+        children = list(node.iter(include_text=True))
+        children.reverse()
+        stack.extend(children)
+
+def _join_strings(strings: Iterator[str], separator: str, strip: bool) -> str:
+    if strip:
+        return separator.join(s for s in (s.strip() for s in strings) if s)
+    return separator.join(strings)
+
+class _LexborNode(Node):
+    __slots__ = ("node", "name")
+
+    def __init__(self, node: Any) -> None:
+        self.node = node
+        self.name = node.tag
+
+    def get(self, attr: str) -> Optional[str]:
+        attributes = self.node.attributes
+        if attr not in attributes:
+            return None
+        # Valueless attributes come back as None; BeautifulSoup reports ""
+        value = attributes[attr]
+        return value if value is not None else ""
+
+    def text(self, separator: str = "", strip: bool = True) -> str:
+        return _join_strings(_lexbor_strings(self.node), separator, strip)
+
+    @property
+    def string(self) -> Optional[str]:
+        node = self.node
+        while True:
+            children = list(node.iter(include_text=True))
+            if len(children) != 1:
+                return None
+            child = children[0]
+            if child.tag == "-text":
+                return child.text_content
+            if child.tag.startswith("-"):
+                return None
+            node = child
+
+    def find_all(self, names: Sequence[str]) -> List[Node]:
+        wanted = set(names)
+        found: List[Node] = []
+        nodes = self.node.traverse()
+        # traverse() starts at the node itself; only descendants count
+        next(nodes, None)
+        for node in nodes:
+            if node.tag in wanted:
+                found.append(_LexborNode(node))
+        return found
+
+    def next_element_sibling(self) -> Optional[Node]:
+        sib = self.node.next
+        while sib is not None and sib.tag.startswith("-"):
+            sib = sib.next
+        return _LexborNode(sib) if sib is not None else None
+
+class _LexborDocument(Document):
+    def __init__(self, html: str) -> None:
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError as exc:
+            raise ImportError(
+                "The 'selectolax' parser backend requires the selectolax package"
+            ) from exc
+
+        self.tree = LexborHTMLParser(html)
+
+    def iter_elements(self) -> Iterator[Node]:
+        root = self.tree.root
+        if root is None:
+            return
+        for node in root.traverse():
+            yield _LexborNode(node)
+
+    def text(self, separator: str = " ") -> str:
+        root = self.tree.root
+        if root is None:
+            return ""
+        return _join_strings(_lexbor_strings(root), separator, True)
+
+    def close(self) -> None:
+        self.tree = None
+
+# One alternation so the markup is scanned left to right exactly once:
+# script/style bodies, comments, text-only elements, leaf <svg> blocks and
+# start tags. Attribute values are matched whole, so a ">" inside quotes
+# does not end a tag early.
+_ATTR = r"""\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?"""
+_ATTR_RE = re.compile(_ATTR)
+_COMPACT_RE = re.compile(
+    r"<(?P<raw>script|style)\b[^>]*>.*?</(?P=raw)\s*>"
+    r"|<!--.*?-->"
+    r"|<(?P<rcdata>title|textarea)\b[^>]*>.*?</(?P=rcdata)\s*>"
+    rf"|<svg(?P<svg_attrs>(?:{_ATTR})*)\s*>(?P<svg_body>(?:(?!<svg\b).)*?)</svg\s*>"
+    rf"|<(?P<tag>[a-zA-Z][a-zA-Z0-9:-]*)(?P<attrs>(?:{_ATTR})*)\s*(?P<slash>/?)>",
+    re.I | re.S,
+)
+_INNER_TAG_RE = re.compile(r"</?([a-zA-Z][a-zA-Z0-9:-]*)")
+_ANY_TAG_RE = re.compile(r"<[^>]*>")
+
+def _kept_attrs(attrs: str, attributes: AbstractSet[str]) -> str:
+    kept = [
+        m.group(0)
+        for m in _ATTR_RE.finditer(attrs)
+        if m.group(0).lstrip().split("=", 1)[0].rstrip().lower() in attributes
+    ]
+    return "".join(kept)
+
+def compact_markup(html: str, attributes: AbstractSet[str], tags: AbstractSet[str]) -> str:
+    """
+    Drop the parts of a page that cannot change what the extractors see
+    before any tree is built: script and style bodies, comment text, every
+    attribute not in `attributes`, and <svg> blocks with no text, no
+    aria-label and no element in `tags`. Each dropped element leaves an
+    empty element (or comment) of the same kind behind, so the tree keeps
+    its shape: the same elements, siblings and text boundaries as the full
+    page, just fewer and smaller nodes.
+    """
+
+    def replace(m: Match[str]) -> str:
+        raw = m.group("raw")
+        if raw is not None:
+            return f"<{raw}></{raw}>"
+        tag = m.group("tag")
+        if tag is not None:
+            return f"<{tag}{_kept_attrs(m.group('attrs'), attributes)}{m.group('slash')}>"
+        svg_body = m.group("svg_body")
+        if svg_body is not None:
+            svg_open = f"<svg{_kept_attrs(m.group('svg_attrs'), attributes)}>"
+            if (
+                "aria-label" in svg_body.lower()
+                or _ANY_TAG_RE.sub("", svg_body).strip()
+                or any(name.lower() in tags for name in _INNER_TAG_RE.findall(svg_body))
+            ):
+                # Something in it is read; keep the block but compact its tags
+                return svg_open + _COMPACT_RE.sub(replace, svg_body) + "</svg>"
+            return svg_open + "</svg>"
+        if m.group(0).startswith("<!--"):
+            return "<!---->"
+        # <title>/<textarea> content is text to some backends; leave it be
+        return m.group(0)
+
+    return _COMPACT_RE.sub(replace, html)
+
+def build_document(html: str, backend: str = DEFAULT_PARSER_BACKEND) -> Document:
+    if backend == "html.parser":
+        return _SoupDocument(html, "html.parser")
+    if backend == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("The 'lxml' parser backend requires the lxml package") from exc
+        return _SoupDocument(html, "lxml")
+    if backend == "selectolax":
+        return _LexborDocument(html)
+    raise ValueError(
+        f"Unknown parser backend {backend!r}; expected one of {', '.join(PARSER_BACKENDS)}"
+    )
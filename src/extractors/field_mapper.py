@@ -1,4 +1,6 @@
-thonfrom typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from extractors.business_record import REQUIRED_FIELDS, BusinessRecord  # type: ignore
 
 def _as_list(value: Any) -> List[Any]:
     if value is None:
@@ -7,16 +9,13 @@ def _as_list(value: Any) -> List[Any]:
         return value
     return [value]
 
-def map_raw_to_business(
+def _mapped_values(
     raw_data: Dict[str, Any],
     url: str,
     timestamp: str,
     is_page_not_found: bool,
-) -> Dict[str, Any]:
-    """
-    Normalize the raw extracted data into the expected business schema.
-    Ensures all fields exist with sensible defaults.
-    """
+) -> Tuple[Any, ...]:
+    # Field values in REQUIRED_FIELDS order, with sensible defaults
     categories = raw_data.get("categories")
     if isinstance(categories, list):
         categories_str = ",".join(cat.strip() for cat in categories if str(cat).strip())
@@ -36,28 +35,51 @@ def map_raw_to_business(
     if not isinstance(hours, dict):
         hours = {}
 
-    mapped: Dict[str, Any] = {
-        "title": raw_data.get("title"),
-        "rating": raw_data.get("rating"),
-        "reviewCount": raw_data.get("reviewCount"),
-        "isClaimed": raw_data.get("isClaimed"),
-        "priceLevel": raw_data.get("priceLevel"),
-        "categories": categories_str,
-        "fullAddress": raw_data.get("fullAddress"),
-        "city": raw_data.get("city"),
-        "state": raw_data.get("state"),
-        "zipcode": raw_data.get("zipcode"),
-        "phoneNumber": raw_data.get("phoneNumber"),
-        "images": images,
-        "website": raw_data.get("website"),
-        "hours": hours,
-        "businessOwnerName": raw_data.get("businessOwnerName"),
-        "about": raw_data.get("about"),
-        "reviewhighlights": review_highlights,
-        "businessServices": business_services,
-        "timestamp": timestamp,
-        "url": url,
-        "is_page_not_found": bool(is_page_not_found),
-    }
-
-    return mapped
\ No newline at end of file
+    get = raw_data.get
+    return (
+        get("title"),
+        get("rating"),
+        get("reviewCount"),
+        get("isClaimed"),
+        get("priceLevel"),
+        categories_str,
+        get("fullAddress"),
+        get("city"),
+        get("state"),
+        get("zipcode"),
+        get("phoneNumber"),
+        images,
+        get("website"),
+        hours,
+        get("businessOwnerName"),
+        get("about"),
+        review_highlights,
+        business_services,
+        timestamp,
+        url,
+        bool(is_page_not_found),
+    )
+
+def map_raw_to_record(
+    raw_data: Dict[str, Any],
+    url: str,
+    timestamp: str,
+    is_page_not_found: bool,
+) -> BusinessRecord:
+    """
+    Normalize the raw extracted data into a BusinessRecord.
+    Every schema field is filled, with sensible defaults.
+    """
+    return BusinessRecord(*_mapped_values(raw_data, url, timestamp, is_page_not_found))
+
+def map_raw_to_business(
+    raw_data: Dict[str, Any],
+    url: str,
+    timestamp: str,
+    is_page_not_found: bool,
+) -> Dict[str, Any]:
+    """
+    Normalize the raw extracted data into the expected business schema.
+    Ensures all fields exist with sensible defaults.
+    """
+    return dict(zip(REQUIRED_FIELDS, _mapped_values(raw_data, url, timestamp, is_page_not_found)))
\ No newline at end of file
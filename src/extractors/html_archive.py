@@ -0,0 +1,210 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in other processes are not serialized
+    fcntl = None  # type: ignore[assignment]
+
+from extractors.url_tools import canonicalize_url  # type: ignore
+
+class ArchivedResponse:
+    __slots__ = ("url", "status", "headers", "body", "fetched_at", "complete")
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        headers: Dict[str, str],
+        body: str,
+        fetched_at: float,
+        complete: bool = True,
+    ) -> None:
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fetched_at = fetched_at
+        self.complete = complete
+
+def index_path_for(archive_path: str) -> str:
+    return archive_path + ".idx"
+
+def _archive_key(url: str) -> str:
+    try:
+        return canonicalize_url(url)
+    except ValueError:
+        return url
+
+def encode_member(response: ArchivedResponse) -> bytes:
+    """One archive record: a gzip member holding a JSON header line and the body."""
+    header = {
+        "url": response.url,
+        "status": response.status,
+        "headers": response.headers,
+        "fetched_at": response.fetched_at,
+        "complete": response.complete,
+    }
+    payload = json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + response.body.encode("utf-8")
+    return gzip.compress(payload, compresslevel=6, mtime=0)
+
+def decode_member(data: bytes) -> ArchivedResponse:
+    header_line, _, body = gzip.decompress(data).partition(b"\n")
+    header = json.loads(header_line)
+    return ArchivedResponse(
+        header["url"],
+        header["status"],
+        header.get("headers") or {},
+        body.decode("utf-8"),
+        header["fetched_at"],
+        header.get("complete", True),
+    )
+
+class HtmlArchive:
+    """
+    Append-only archive of fetched responses, in the spirit of WARC: the
+    data file is a sequence of gzip members (one per response, so the whole
+    file also reads with zcat) and a SQLite index next to it maps each URL
+    to the offset and length of its members. A member only counts once it
+    is indexed; bytes a crashed writer left past the last indexed member
+    are cut off the next time the archive is opened for writing.
+    """
+
+    def __init__(self, path: str, writable: bool = True) -> None:
+        directory = os.path.dirname(path)
+        if directory and writable:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.writable = writable
+        self._lock = threading.Lock()
+        if not writable and not os.path.exists(index_path_for(path)):
+            raise FileNotFoundError(f"Archive index not found: {index_path_for(path)}")
+        self._conn = sqlite3.connect(index_path_for(path), timeout=60, check_same_thread=False)
+        if writable:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS members (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS members_key ON members (key, id)")
+            self._conn.commit()
+            self._file = open(path, "ab")
+            with self._file_lock():
+                self._truncate_unindexed()
+
+    def _file_lock(self) -> Any:
+        return _FileLock(self._file if self.writable else None)
+
+    def _indexed_end(self) -> int:
+        row = self._conn.execute("SELECT COALESCE(MAX(offset + length), 0) FROM members").fetchone()
+        return int(row[0])
+
+    def _truncate_unindexed(self) -> None:
+        end = self._indexed_end()
+        size = os.fstat(self._file.fileno()).st_size
+        if size > end:
+            logging.warning("Dropping %d unindexed bytes at the end of %s", size - end, self.path)
+            self._file.truncate(end)
+
+    def append(
+        self,
+        url: str,
+        status: int,
+        body: str,
+        headers: Optional[Dict[str, str]] = None,
+        complete: bool = True,
+    ) -> None:
+        fetched_at = time.time()
+        data = encode_member(ArchivedResponse(url, status, dict(headers or {}), body, fetched_at, complete))
+        with self._lock, self._file_lock():
+            offset = os.fstat(self._file.fileno()).st_size
+            self._file.write(data)
+            self._file.flush()
+            self._conn.execute(
+                "INSERT INTO members (key, url, status, fetched_at, offset, length) VALUES (?, ?, ?, ?, ?, ?)",
+                (_archive_key(url), url, status, fetched_at, offset, len(data)),
+            )
+            self._conn.commit()
+
+    def entries(self, latest_only: bool = True) -> List[Tuple[str, int, int]]:
+        """
+        (url, offset, length) of archived responses in archive order; with
+        `latest_only` just the newest response per canonical URL.
+        """
+        with self._lock:
+            if latest_only:
+                rows = self._conn.execute(
+                    """
+                    SELECT url, offset, length FROM members
+                    WHERE id IN (SELECT MAX(id) FROM members GROUP BY key)
+                    ORDER BY id
+                    """
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT url, offset, length FROM members ORDER BY id").fetchall()
+        return [(url, offset, length) for url, offset, length in rows]
+
+    def get(self, url: str) -> Optional[ArchivedResponse]:
+        """The newest archived response for `url`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT offset, length FROM members WHERE key = ? ORDER BY id DESC LIMIT 1",
+                (_archive_key(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        return read_member(self.path, row[0], row[1])
+
+    def __iter__(self) -> Iterator[ArchivedResponse]:
+        with open(self.path, "rb") as f:
+            for _, offset, length in self.entries(latest_only=False):
+                f.seek(offset)
+                yield decode_member(f.read(length))
+
+    def close(self) -> None:
+        with self._lock:
+            if self.writable:
+                self._file.close()
+            self._conn.close()
+
+    def __enter__(self) -> "HtmlArchive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+class _FileLock:
+    """Exclusive flock on the archive, so writers in several processes don't interleave."""
+
+    def __init__(self, f: Any) -> None:
+        self._f = f
+
+    def __enter__(self) -> None:
+        if self._f is not None and fcntl is not None:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._f is not None and fcntl is not None:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+
+def read_member(path: str, offset: int, length: int) -> ArchivedResponse:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return decode_member(f.read(length))
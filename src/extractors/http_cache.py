@@ -0,0 +1,199 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from extractors.url_tools import canonicalize_url  # type: ignore
+
+# Only final answers are worth keeping; transient errors must be refetched
+CACHEABLE_STATUSES = {200, 404, 410}
+
+def _cache_key(url: str) -> str:
+    try:
+        return canonicalize_url(url)
+    except ValueError:
+        # Unparseable (e.g. a bad port): fall back to the raw spelling
+        return url
+
+class CachedResponse:
+    __slots__ = ("url", "status", "body", "etag", "last_modified", "fetched_at")
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        body: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        fetched_at: float,
+    ) -> None:
+        self.url = url
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    Persistent response cache in a single SQLite file, keyed by canonical URL.
+    Entries younger than `ttl_seconds` are served without touching the
+    network; older entries are revalidated with their ETag/Last-Modified.
+    Bodies are stored zlib-compressed and the least recently used entries
+    are evicted once the stored bodies exceed `max_bytes`. Reads record
+    their access time in memory; it is written in batches of
+    `access_batch`, and before any eviction, rather than committed per read.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 86400,
+        max_bytes: int = 1024 * 1024 * 1024,
+        access_batch: int = 256,
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.access_batch = max(1, access_batch)
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._total_bytes = int(row[0])
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        key = _cache_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, etag, last_modified, fetched_at, body FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= self.access_batch:
+                self._write_accessed_locked()
+                self._conn.commit()
+
+        body = zlib.decompress(row[5]).decode("utf-8")
+        return CachedResponse(row[0], row[1], body, row[2], row[3], row[4])
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    def put(
+        self,
+        url: str,
+        status: int,
+        body: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        if status not in CACHEABLE_STATUSES:
+            return
+        key = _cache_key(url)
+        blob = zlib.compress(body.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, url, status, etag, last_modified, fetched_at, accessed_at, size, body)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, url, status, etag, last_modified, now, now, len(blob), blob),
+            )
+            self._accessed.pop(key, None)
+            self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            self._evict_locked()
+            self._conn.commit()
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Mark an entry as freshly validated after a 304 response. Validators
+        the 304 carries replace the stored ones; absent ones are kept.
+        """
+        now = time.time()
+        key = _cache_key(url)
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._conn.execute(
+                """
+                UPDATE responses
+                SET fetched_at = ?, accessed_at = ?, etag = COALESCE(?, etag),
+                    last_modified = COALESCE(?, last_modified)
+                WHERE key = ?
+                """,
+                (now, now, etag, last_modified, key),
+            )
+            self._conn.commit()
+
+    def _write_accessed_locked(self) -> None:
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _evict_locked(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Eviction order depends on the access times still held in memory
+        self._write_accessed_locked()
+        evicted = 0
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                evicted += 1
+        logging.debug("Evicted %d cached responses from %s", evicted, self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_accessed_locked()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+Timeout = Union[float, Tuple[float, float]]
+
+class LatencyTracker:
+    """Sliding window of recent request latencies per host."""
+
+    def __init__(self, window: int = 512, min_samples: int = 20) -> None:
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._sorted: Dict[str, Optional[list]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, url: str, seconds: float) -> None:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = self._samples[host] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._sorted[host] = None
+
+    def quantile(self, url: str, q: float) -> Optional[float]:
+        """The q-quantile of the host's recent latencies, or None until there are enough."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = self._sorted.get(host)
+            if ordered is None:
+                # Sorted lazily and reused until the next observation
+                ordered = self._sorted[host] = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class HedgeBudget:
+    """
+    Caps hedged requests at `ratio` of all requests sent (plus a small
+    burst), so hedging during a slow spell cannot multiply the load.
+    """
+
+    def __init__(self, ratio: float = 0.05, burst: float = 5.0) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+def _close_response(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    future.result().close()
+
+class LatencyPolicy:
+    """
+    Per-request timeouts and hedging derived from observed latencies.
+    With `adaptive_timeouts` the connect timeout follows the host's p95 and
+    the read timeout its p99, each times `multiplier` and clamped to
+    [min_timeout, max_timeout]; until enough samples exist `max_timeout`
+    (the configured timeout) is used. With `hedge` a request still
+    unanswered `hedge_quantile` latency after it started running (time
+    spent queued for a pool thread does not count) gets one duplicate, if
+    the budget (and the host's rate limiter) allows; the first response
+    wins and the loser's response is closed when it arrives. At most
+    `max_workers` hedged pairs are unfinished at a time, so with one
+    primary per fetch worker the requests in flight never exceed
+    2 * max_workers: the thread pool's size, and the connection pool
+    size build_session uses when hedging.
+    """
+
+    def __init__(
+        self,
+        max_timeout: float,
+        adaptive_timeouts: bool = True,
+        min_timeout: float = 2.0,
+        multiplier: float = 3.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_budget: float = 0.05,
+        max_workers: int = 8,
+        tracker: Optional[LatencyTracker] = None,
+    ) -> None:
+        self.max_timeout = max_timeout
+        self.adaptive_timeouts = adaptive_timeouts
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.multiplier = multiplier
+        self.hedge_quantile = hedge_quantile
+        self.tracker = tracker or LatencyTracker()
+        self.budget = HedgeBudget(hedge_budget) if hedge else None
+        # Primary and hedge requests both run here so whichever answers
+        # first can be returned while the other is still in flight
+        self._pool = ThreadPoolExecutor(max_workers=max_workers * 2) if hedge else None
+        # Held from sending a hedge until both it and its primary finish;
+        # a slow loser keeps its thread and connection until then
+        self._hedge_slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def _clamp(self, seconds: float) -> float:
+        return min(self.max_timeout, max(self.min_timeout, seconds * self.multiplier))
+
+    def timeout_for(self, url: str) -> Timeout:
+        """A (connect, read) timeout for the next request to `url`."""
+        if not self.adaptive_timeouts:
+            return self.max_timeout
+        p95 = self.tracker.quantile(url, 0.95)
+        p99 = self.tracker.quantile(url, 0.99)
+        if p95 is None or p99 is None:
+            return self.max_timeout
+        return self._clamp(p95), self._clamp(p99)
+
+    def send(self, url: str, request: Callable[[], Any], limiter: Any = None) -> Any:
+        """Run `request` (returning a requests.Response), timing it and hedging if slow."""
+
+        def timed() -> Any:
+            started = time.monotonic()
+            try:
+                return request()
+            finally:
+                # Failures (timeouts included) count too, or the window would
+                # only remember the fast requests
+                self.tracker.observe(url, time.monotonic() - started)
+
+        if self.budget is None or self._pool is None:
+            return timed()
+
+        self.budget.on_request()
+        delay = self.tracker.quantile(url, self.hedge_quantile)
+        if delay is None:
+            return timed()
+
+        started = threading.Event()
+        start_times: List[float] = []
+
+        def run_primary() -> Any:
+            start_times.append(time.monotonic())
+            started.set()
+            return timed()
+
+        primary = self._pool.submit(run_primary)
+        primary.add_done_callback(lambda _: started.set())
+        # The hedge deadline runs from when the primary starts, not from
+        # when it was queued behind other fetches sharing the pool
+        started.wait()
+        remaining = delay - (time.monotonic() - start_times[0]) if start_times else 0.0
+        try:
+            return primary.result(timeout=max(0.0, remaining))
+        except FutureTimeout:
+            pass
+        if not self._hedge_slots.acquire(blocking=False):
+            return primary.result()
+        if not self.budget.try_spend() or (limiter is not None and not limiter.try_acquire(url)):
+            self._hedge_slots.release()
+            return primary.result()
+
+        hedge = self._pool.submit(timed)
+        unfinished = [2]
+
+        def release_slot(_: Future) -> None:
+            with self._lock:
+                unfinished[0] -= 1
+                if unfinished[0]:
+                    return
+            self._hedge_slots.release()
+
+        primary.add_done_callback(release_slot)
+        hedge.add_done_callback(release_slot)
+        with self._lock:
+            self.hedges_sent += 1
+        logging.debug("Hedging %s after %.2fs", url, delay)
+
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    first_error = first_error or future.exception()
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(_close_response)
+                if future is hedge:
+                    with self._lock:
+                        self.hedges_won += 1
+                # Another future may have finished in the same round
+                for other in done:
+                    if other is not future and other.exception() is None:
+                        other.result().close()
+                return future.result()
+        assert first_error is not None
+        raise first_error
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            if self.hedges_sent:
+                logging.info("Sent %d hedged requests; %d answered first", self.hedges_sent, self.hedges_won)
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Responses that mean "not now" rather than "this page"; they are retried
+# and never handed to the parser.
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter."""
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 60.0) -> None:
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+class _HostBucket:
+    __slots__ = ("rate", "tokens", "updated_at", "blocked_until", "decreased_at")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.decreased_at = 0.0
+
+class HostRateLimiter:
+    """
+    Token-bucket limiter with one bucket per host.
+    Each host starts at `rate` requests/second and adapts with AIMD: a
+    throttling response halves its rate (down to `min_rate`) and each
+    success adds `increase` back (up to `max_rate`). Rate cuts are spaced
+    at least `decrease_interval` seconds apart so one burst of concurrent
+    429s counts as a single signal. A Retry-After header pauses the whole
+    host, not just the request that received it.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        increase: float = 0.05,
+        decrease_interval: float = 1.0,
+    ) -> None:
+        self.initial_rate = rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.increase = increase
+        self.decrease_interval = decrease_interval
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _HostBucket(self.initial_rate, self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """Block until a request to the URL's host may be sent; return the wait."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * bucket.rate)
+            bucket.updated_at = now
+            # Reserve a token now (possibly going negative) so concurrent
+            # callers queue up behind each other instead of all waking at once
+            bucket.tokens -= 1
+            wait = max(0.0, -bucket.tokens / bucket.rate, bucket.blocked_until - now)
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, url: str) -> bool:
+        """Take a token only if one is free right now (for optional extra requests)."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * bucket.rate)
+            bucket.updated_at = now
+            if bucket.tokens < 1 or bucket.blocked_until > now:
+                return False
+            bucket.tokens -= 1
+            return True
+
+    def record(self, url: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._bucket(host)
+            if status_code in THROTTLE_STATUSES or status_code == 0:
+                now = time.monotonic()
+                if now - bucket.decreased_at >= self.decrease_interval:
+                    bucket.rate = max(self.min_rate, bucket.rate / 2)
+                    bucket.decreased_at = now
+                if retry_after is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+            elif status_code < 500:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def current_rate(self, url: str) -> float:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            return self._bucket(host).rate
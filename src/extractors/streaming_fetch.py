@@ -0,0 +1,144 @@
+import codecs
+import logging
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from extractors.structured_data import extract_structured_data  # type: ignore
+
+# Phrases that mark a soft 404; they sit near the top of the page
+NOT_FOUND_SIGNALS = (
+    "page not found",
+    "we looked everywhere",
+    "404 error",
+    "sorry, we couldn't find",
+)
+
+# Why read_body stopped reading
+READ_COMPLETE = "complete"
+READ_TRUNCATED = "truncated"
+READ_NOT_FOUND = "not_found"
+READ_EARLY_STOP = "early_stop"
+
+_SCRIPT_CLOSE_RE = re.compile(r"</script\s*>", re.I)
+_BODY_OPEN_RE = re.compile(r"<body\b", re.I)
+_JSON_SCRIPT_RE = re.compile(r"""<script\b[^>]*type\s*=\s*["']?application/(?:ld\+)?json""", re.I)
+
+def has_not_found_signal(text: str) -> bool:
+    lowered = text.lower()
+    return any(sig in lowered for sig in NOT_FOUND_SIGNALS)
+
+class StreamOptions:
+    """
+    Settings for reading a response body incrementally.
+    `max_bytes` caps the body (0 for no cap). `early_stop_fields` lets the
+    read end as soon as the structured data received so far provides every
+    one of those fields; `stop_markers` end it at the first occurrence of
+    any of the given (case-insensitive) strings.
+    """
+
+    __slots__ = ("max_bytes", "chunk_size", "early_stop_fields", "stop_markers")
+
+    def __init__(
+        self,
+        max_bytes: int = 10 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+        early_stop_fields: Optional[Sequence[str]] = None,
+        stop_markers: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.early_stop_fields = frozenset(early_stop_fields) if early_stop_fields else None
+        self.stop_markers = tuple(marker.lower() for marker in stop_markers or () if marker)
+
+def _guess_encoding(sample: bytes) -> str:
+    # What response.text falls back to without a declared charset
+    # (Response.apparent_encoding), run on the first chunk
+    from requests.compat import chardet
+
+    guess = chardet.detect(sample)["encoding"] if chardet is not None else None
+    return guess or "utf-8"
+
+def _decoder_for(encoding: Optional[str]) -> Any:
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        logging.debug("Unknown response encoding %r; decoding as utf-8", encoding)
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+def _structured_data_covers(parts: List[str], fields: frozenset) -> bool:
+    return fields.issubset(extract_structured_data("".join(parts)))
+
+def read_body(response: Any, options: StreamOptions) -> Tuple[str, str]:
+    """
+    Read and decode a streamed requests response chunk by chunk.
+    Returns (text, reason) where reason is one of the READ_* constants.
+    Without a declared charset the encoding is guessed from the first
+    chunk, as response.text would. Every chunk is checked for soft-404
+    phrases, so a not-found page stops downloading there. Early stops wait
+    for the <body> tag, so the title, where those phrases show up first,
+    has always been checked. The connection is released either way.
+    """
+    decoder: Any = None
+    parts: List[str] = []
+    size = 0
+    reason = READ_COMPLETE
+    json_script_seen = False
+    recheck = False
+    marker_seen = False
+    body_seen = False
+    # Tail of the previous chunk, so tags, markers and phrases split
+    # across chunk boundaries are still found
+    tail = ""
+    tail_length = max([256] + [len(marker) for marker in options.stop_markers])
+
+    try:
+        for chunk in response.iter_content(chunk_size=options.chunk_size):
+            if not chunk:
+                continue
+            truncated = bool(options.max_bytes) and size + len(chunk) > options.max_bytes
+            if truncated:
+                chunk = chunk[: options.max_bytes - size]
+            size += len(chunk)
+            if decoder is None:
+                decoder = _decoder_for(response.encoding or _guess_encoding(chunk))
+            text = decoder.decode(chunk)
+            parts.append(text)
+
+            window = tail + text
+            tail = window[-tail_length:]
+
+            if has_not_found_signal(window):
+                reason = READ_NOT_FOUND
+                break
+            if truncated:
+                logging.warning("Body of %s exceeds %d bytes; truncating", response.url, options.max_bytes)
+                reason = READ_TRUNCATED
+                break
+
+            if options.early_stop_fields is not None:
+                json_script_seen = json_script_seen or _JSON_SCRIPT_RE.search(window) is not None
+                # Only worth re-checking once another script block has closed
+                recheck = recheck or (json_script_seen and _SCRIPT_CLOSE_RE.search(window) is not None)
+            if options.stop_markers and not marker_seen:
+                lowered = window.lower()
+                marker_seen = any(marker in lowered for marker in options.stop_markers)
+
+            body_seen = body_seen or _BODY_OPEN_RE.search(window) is not None
+            if not body_seen:
+                continue
+            if marker_seen:
+                reason = READ_EARLY_STOP
+                break
+            if recheck:
+                recheck = False
+                if _structured_data_covers(parts, options.early_stop_fields):  # type: ignore[arg-type]
+                    reason = READ_EARLY_STOP
+                    break
+        if decoder is not None:
+            parts.append(decoder.decode(b"", final=True))
+    finally:
+        response.close()
+
+    if reason != READ_COMPLETE:
+        logging.debug("Stopped reading %s after %d bytes (%s)", response.url, size, reason)
+    return "".join(parts), reason
@@ -0,0 +1,283 @@
+import html as html_lib
+import json
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+# <script type="application/ld+json"> blocks and embedded JSON state blocks
+# (<script type="application/json">, sometimes wrapped in an HTML comment).
+# Scanning the raw HTML avoids building a tree for pages that carry
+# everything in structured data.
+_SCRIPT_RE = re.compile(
+    r"<script\b(?P<attrs>[^>]*)>(?P<body>.*?)</script\s*>",
+    re.I | re.S,
+)
+_JSON_TYPE_RE = re.compile(r"""type\s*=\s*["']?application/(?:ld\+)?json""", re.I)
+
+_BUSINESS_TYPES = {
+    "localbusiness",
+    "restaurant",
+    "foodestablishment",
+    "bakery",
+    "cafeorcoffeeshop",
+    "barorpub",
+    "store",
+    "professionalservice",
+    "homeandconstructionbusiness",
+    "healthandbeautybusiness",
+    "automotivebusiness",
+    "medicalbusiness",
+    "lodgingbusiness",
+}
+# Not "organization": that is also the type of the site's own publisher
+# block, which must never stand in for the business
+
+_DAY_NAMES = {
+    "monday": "Mon",
+    "tuesday": "Tue",
+    "wednesday": "Wed",
+    "thursday": "Thu",
+    "friday": "Fri",
+    "saturday": "Sat",
+    "sunday": "Sun",
+}
+_DAY_ABBREVIATIONS = {"mo": "Mon", "tu": "Tue", "we": "Wed", "th": "Thu", "fr": "Fri", "sa": "Sat", "su": "Sun"}
+_WEEK = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+_OPENING_HOURS_RE = re.compile(
+    r"^(?P<days>[A-Za-z,\-\s]+?)\s+(?P<opens>\d{1,2}:\d{2})\s*-\s*(?P<closes>\d{1,2}:\d{2})$"
+)
+
+def _iter_json_blocks(page_html: str) -> Iterator[Any]:
+    for match in _SCRIPT_RE.finditer(page_html):
+        if not _JSON_TYPE_RE.search(match.group("attrs")):
+            continue
+        body = match.group("body").strip()
+        if body.startswith("<!--") and body.endswith("-->"):
+            body = body[4:-3].strip()
+        if not body:
+            continue
+        try:
+            yield json.loads(body)
+        except ValueError:
+            logging.debug("Skipping undecodable JSON script block")
+
+def _is_business(node: Dict[str, Any]) -> bool:
+    types = node.get("@type")
+    if isinstance(types, str):
+        types = [types]
+    if not isinstance(types, list):
+        return False
+    return any(isinstance(t, str) and t.rsplit("/", 1)[-1].lower() in _BUSINESS_TYPES for t in types)
+
+def _find_business(node: Any, depth: int = 0) -> Optional[Dict[str, Any]]:
+    # Embedded state can nest the business object deeply; bound the walk
+    if depth > 12:
+        return None
+    if isinstance(node, dict):
+        if _is_business(node):
+            return node
+        children: Any = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_business(child, depth + 1)
+        if found is not None:
+            return found
+    return None
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        return None
+    value = html_lib.unescape(value).strip()
+    return value or None
+
+def _format_phone(value: Any) -> Optional[str]:
+    phone = _text(value)
+    if phone is None:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    if len(digits) == 10:
+        # Same shape the page-text heuristic produces
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+    return phone
+
+def _format_time(value: str) -> Optional[str]:
+    match = re.match(r"^(\d{1,2}):(\d{2})", value.strip())
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), match.group(2)
+    suffix = "AM" if hour % 24 < 12 else "PM"
+    hour = hour % 12 or 12
+    return f"{hour}:{minute} {suffix}"
+
+def _add_hours(hours: Dict[str, str], day: str, opens: Any, closes: Any) -> None:
+    if not isinstance(opens, str) or not isinstance(closes, str):
+        return
+    start, end = _format_time(opens), _format_time(closes)
+    if start is None or end is None:
+        return
+    span = f"{start} - {end}"
+    hours[day] = f"{hours[day]}, {span}" if day in hours else span
+
+def _expand_days(spec: str) -> List[str]:
+    days: List[str] = []
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if "-" in part:
+            first, _, last = part.partition("-")
+            start = _DAY_ABBREVIATIONS.get(first.strip()[:2])
+            stop = _DAY_ABBREVIATIONS.get(last.strip()[:2])
+            if start and stop:
+                i, j = _WEEK.index(start), _WEEK.index(stop)
+                days.extend(_WEEK[i : j + 1] if i <= j else _WEEK[i:] + _WEEK[: j + 1])
+        elif part[:2] in _DAY_ABBREVIATIONS:
+            days.append(_DAY_ABBREVIATIONS[part[:2]])
+    return days
+
+def _map_hours(business: Dict[str, Any]) -> Dict[str, str]:
+    hours: Dict[str, str] = {}
+
+    specs = business.get("openingHoursSpecification")
+    if isinstance(specs, dict):
+        specs = [specs]
+    if isinstance(specs, list):
+        for spec in specs:
+            if not isinstance(spec, dict):
+                continue
+            days = spec.get("dayOfWeek")
+            if isinstance(days, str):
+                days = [days]
+            if not isinstance(days, list):
+                continue
+            for day in days:
+                if not isinstance(day, str):
+                    continue
+                name = _DAY_NAMES.get(day.rsplit("/", 1)[-1].lower())
+                if name:
+                    _add_hours(hours, name, spec.get("opens"), spec.get("closes"))
+
+    opening_hours = business.get("openingHours")
+    if isinstance(opening_hours, str):
+        opening_hours = [opening_hours]
+    if not hours and isinstance(opening_hours, list):
+        for entry in opening_hours:
+            if not isinstance(entry, str):
+                continue
+            match = _OPENING_HOURS_RE.match(entry.strip())
+            if not match:
+                continue
+            for day in _expand_days(match.group("days")):
+                _add_hours(hours, day, match.group("opens"), match.group("closes"))
+
+    # Keep the Mon..Sun order the HTML table extractor produces
+    return {day: hours[day] for day in _WEEK if day in hours}
+
+def _map_address(business: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    address = business.get("address")
+    if isinstance(address, list) and address:
+        address = address[0]
+    if isinstance(address, str):
+        return {"fullAddress": _text(address), "city": None, "state": None, "zipcode": None}
+    if not isinstance(address, dict):
+        return {}
+
+    street = _text(address.get("streetAddress"))
+    city = _text(address.get("addressLocality"))
+    state = _text(address.get("addressRegion"))
+    zipcode = _text(address.get("postalCode"))
+
+    # Same "street city, ST zip" shape as the rendered <address> block
+    locality = ", ".join(part for part in (city, " ".join(p for p in (state, zipcode) if p)) if part)
+    full_address = " ".join(part for part in (street, locality) if part) or None
+    return {"fullAddress": full_address, "city": city, "state": state, "zipcode": zipcode}
+
+def _map_images(business: Dict[str, Any], max_images: int = 10) -> List[str]:
+    images = business.get("image")
+    if isinstance(images, (str, dict)):
+        images = [images]
+    if not isinstance(images, list):
+        return []
+    urls: List[str] = []
+    for image in images:
+        url = image.get("url") or image.get("contentUrl") if isinstance(image, dict) else image
+        if isinstance(url, str) and url not in urls:
+            urls.append(url)
+        if len(urls) >= max_images:
+            break
+    return urls
+
+def _map_review_highlights(business: Dict[str, Any], max_reviews: int = 5) -> List[str]:
+    reviews = business.get("review")
+    if isinstance(reviews, dict):
+        reviews = [reviews]
+    if not isinstance(reviews, list):
+        return []
+    highlights: List[str] = []
+    for review in reviews:
+        if not isinstance(review, dict):
+            continue
+        text = _text(review.get("reviewBody") or review.get("description"))
+        # Same filters as the HTML snippet heuristic
+        if not text or len(text) < 40 or "review of" in text.lower():
+            continue
+        highlights.append(f"“{text}”")
+        if len(highlights) >= max_reviews:
+            break
+    return highlights
+
+def _map_categories(business: Dict[str, Any]) -> List[str]:
+    # Not schema.org vocabulary, but embedded page state commonly carries it
+    categories = business.get("categories")
+    if not isinstance(categories, list):
+        return []
+    labels: List[str] = []
+    for category in categories:
+        label = _text(category.get("title") or category.get("name")) if isinstance(category, dict) else _text(category)
+        if label and label not in labels:
+            labels.append(label)
+    return labels
+
+def extract_structured_data(page_html: str) -> Dict[str, Any]:
+    """
+    Map the first business object found in JSON-LD or embedded JSON state
+    onto the raw field names parse_business_page produces. Only fields the
+    block actually provides are returned.
+    """
+    business: Optional[Dict[str, Any]] = None
+    for block in _iter_json_blocks(page_html):
+        business = _find_business(block)
+        if business is not None:
+            break
+    if business is None:
+        return {}
+
+    fields: Dict[str, Any] = {
+        "title": _text(business.get("name")),
+        "priceLevel": _text(business.get("priceRange")),
+        "phoneNumber": _format_phone(business.get("telephone")),
+        "about": _text(business.get("description")),
+        "categories": _map_categories(business),
+        "images": _map_images(business),
+        "hours": _map_hours(business),
+        "reviewhighlights": _map_review_highlights(business),
+    }
+    fields.update(_map_address(business))
+
+    rating = business.get("aggregateRating")
+    if isinstance(rating, dict):
+        fields["rating"] = _text(rating.get("ratingValue"))
+        count = _text(rating.get("reviewCount") or rating.get("ratingCount"))
+        fields["reviewCount"] = f"{count} reviews" if count else None
+
+    claimed = business.get("isClaimed")
+    if isinstance(claimed, bool):
+        fields["isClaimed"] = "Claimed" if claimed else "Unclaimed"
+
+    return {key: value for key, value in fields.items() if value not in (None, [], {})}
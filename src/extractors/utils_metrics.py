@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS: Tuple[float, ...] = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+_METRIC_NAME = "yelp_scraper_stage_seconds"
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total", "maximum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        for i, n in enumerate(other["counts"]):
+            self.counts[i] += n
+        self.count += other["count"]
+        self.total += other["total"]
+        self.maximum = max(self.maximum, other["maximum"])
+
+    def state(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "count": self.count, "total": self.total, "maximum": self.maximum}
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.maximum
+                return min(self.maximum, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.maximum
+
+class MetricsRegistry:
+    """Thread-safe collection of per-stage latency histograms."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = _Histogram()
+            histogram.observe(seconds)
+
+    def drain(self) -> Dict[str, Dict[str, Any]]:
+        """Return the raw histogram state and reset, e.g. to ship it out of a worker process."""
+        with self._lock:
+            state = {stage: h.state() for stage, h in self._histograms.items()}
+            self._histograms = {}
+        return state
+
+    def merge(self, state: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            for stage, other in state.items():
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = self._histograms[stage] = _Histogram()
+                histogram.merge(other)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "total_seconds": round(h.total, 6),
+                    "mean_ms": round(h.total / h.count * 1000, 4) if h.count else 0.0,
+                    "p50_ms": round(h.quantile(0.50) * 1000, 4),
+                    "p90_ms": round(h.quantile(0.90) * 1000, 4),
+                    "p99_ms": round(h.quantile(0.99) * 1000, 4),
+                    "max_ms": round(h.maximum * 1000, 4),
+                }
+                for stage, h in sorted(self._histograms.items())
+            }
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = [
+            f"# HELP {_METRIC_NAME} Time spent in each scrape pipeline stage.",
+            f"# TYPE {_METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'{_METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{_METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{_METRIC_NAME}_sum{{stage="{stage}"}} {h.total:.6f}')
+                lines.append(f'{_METRIC_NAME}_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path_prefix: str) -> None:
+        """Write <prefix>.prom and <prefix>.json, replacing earlier exports atomically."""
+        directory = os.path.dirname(path_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        summary = {"generated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()), "stages": self.summary()}
+        for path, content in (
+            (path_prefix + ".prom", self.prometheus_text()),
+            (path_prefix + ".json", json.dumps(summary, indent=4)),
+        ):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+# Hot paths check this once per call; when it is None instrumentation costs
+# a single global lookup.
+_registry: Optional[MetricsRegistry] = None
+
+def get_registry() -> Optional[MetricsRegistry]:
+    return _registry
+
+def enable_metrics(fresh: bool = False) -> MetricsRegistry:
+    global _registry
+    if _registry is None or fresh:
+        _registry = MetricsRegistry()
+    return _registry
+
+def disable_metrics() -> None:
+    global _registry
+    _registry = None
+
+class PeriodicExporter:
+    """Background thread that re-exports the registry every `interval` seconds."""
+
+    def __init__(self, registry: MetricsRegistry, path_prefix: str, interval: float) -> None:
+        self.registry = registry
+        self.path_prefix = path_prefix
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self) -> "PeriodicExporter":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.registry.export(self.path_prefix)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
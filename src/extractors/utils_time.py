@@ -1,4 +1,4 @@
-thonfrom datetime import datetime, timezone
+from datetime import datetime, timezone
 
 def current_timestamp() -> str:
     """
@@ -1,26 +1,177 @@
-thonimport logging
+import logging
 import re
-from typing import Any, Dict, List, Optional, Tuple
-
-import requests
-from bs4 import BeautifulSoup
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from extractors.dom_backends import (  # type: ignore
+    DEFAULT_PARSER_BACKEND,
+    Document,
+    Node,
+    build_document,
+    compact_markup,
+)
+from extractors.html_archive import HtmlArchive  # type: ignore
+from extractors.http_cache import ResponseCache  # type: ignore
+from extractors.latency import LatencyPolicy  # type: ignore
+from extractors.rate_limiter import (  # type: ignore
+    RETRY_STATUSES,
+    HostRateLimiter,
+    RetryPolicy,
+    parse_retry_after,
+)
+from extractors.streaming_fetch import (  # type: ignore
+    READ_COMPLETE,
+    READ_NOT_FOUND,
+    StreamOptions,
+    has_not_found_signal,
+    read_body,
+)
+from extractors.structured_data import extract_structured_data  # type: ignore
+from extractors.utils_metrics import MetricsRegistry, get_registry  # type: ignore
+
+if TYPE_CHECKING:
+    import requests
 
 def fetch_html(
     url: str,
-    session: Optional[requests.Session],
+    session: Optional["requests.Session"],
     headers: Optional[Dict[str, str]] = None,
     timeout: int = 15,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[HostRateLimiter] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    stream: Optional[StreamOptions] = None,
+    archive: Optional[HtmlArchive] = None,
+    latency: Optional[LatencyPolicy] = None,
 ) -> Tuple[Optional[str], int]:
+    """
+    Fetch a page and return (html, status_code).
+    Throttled (429/503), server-error and failed requests are retried per
+    `retry_policy`; if they never succeed the HTML is None so the body of
+    an error page is never parsed. When `stats` is given it receives the
+    number of retries and the seconds spent waiting on the limiter and
+    backoff, plus the final URL ("finalUrl") when the request was
+    redirected. With `stream` the body is read incrementally and may stop
+    early (see streaming_fetch.read_body); only bodies read to the end are
+    cached, not ones stopped early, cut at the size cap or dropped as not
+    found. With `archive` every final response, cached ones included, is
+    appended to it for later replay, flagged incomplete unless read in full.
+    `latency` picks per-request timeouts and may hedge slow requests.
+    """
+    # Imported here so parsing-only callers (replay, benchmarks, --help)
+    # don't pay for loading requests
+    import requests
+
     if session is None:
         session = requests.Session()
 
-    try:
-        response = session.get(url, headers=headers or {}, timeout=timeout)
-        logging.debug("Fetched %s with status %s", url, response.status_code)
-        return response.text, response.status_code
-    except requests.RequestException as exc:
-        logging.error("Request error for %s: %s", url, exc)
+    cached = cache.get(url) if cache is not None else None
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if cache.is_fresh(cached):
+            logging.debug("Cache hit for %s", url)
+            if archive is not None:
+                archive.append(url, cached.status, cached.body)
+            return cached.body, cached.status
+        request_headers.update(cached.validators())
+
+    max_retries = retry_policy.max_retries if retry_policy is not None else 0
+    attempt = 0
+    waited = 0.0
+    response: Optional[requests.Response] = None
+
+    while True:
+        if limiter is not None:
+            waited += limiter.acquire(url)
+
+        retry_after: Optional[float] = None
+        request_timeout = latency.timeout_for(url) if latency is not None else timeout
+
+        def send() -> "requests.Response":
+            return session.get(  # type: ignore[union-attr]
+                url, headers=request_headers, timeout=request_timeout, stream=stream is not None
+            )
+
+        try:
+            response = latency.send(url, send, limiter) if latency is not None else send()
+            status_code = response.status_code
+            logging.debug("Fetched %s with status %s", url, status_code)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        except requests.RequestException as exc:
+            logging.error("Request error for %s: %s", url, exc)
+            response = None
+            status_code = 0
+
+        if limiter is not None:
+            limiter.record(url, status_code, retry_after)
+
+        if status_code != 0 and status_code not in RETRY_STATUSES:
+            break
+        if attempt >= max_retries:
+            break
+        if response is not None and stream is not None:
+            response.close()
+
+        delay = retry_policy.delay(attempt, retry_after)  # type: ignore[union-attr]
+        logging.warning(
+            "Retrying %s in %.1fs after status %s (attempt %d/%d)",
+            url,
+            delay,
+            status_code,
+            attempt + 1,
+            max_retries,
+        )
+        time.sleep(delay)
+        waited += delay
+        attempt += 1
+
+    if stats is not None:
+        stats["retries"] = attempt
+        stats["throttledSeconds"] = round(waited, 3)
+        if response is not None and response.history:
+            stats["finalUrl"] = response.url
+
+    if response is None:
         return None, 0
+    if stream is not None and (status_code in RETRY_STATUSES or status_code == 304):
+        # Nothing left to read; hand the connection back to the pool
+        response.close()
+    if status_code in RETRY_STATUSES:
+        logging.error("Giving up on %s after %d retries (status %s)", url, attempt, status_code)
+        return None, status_code
+
+    if cached is not None and status_code == 304:
+        logging.debug("Revalidated cached copy of %s", url)
+        # A 304 may carry validators that supersede the stored ones
+        cache.touch(url, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if archive is not None:
+            archive.append(url, cached.status, cached.body, dict(response.headers))
+        return cached.body, cached.status
+
+    if stream is None:
+        body, reason = response.text, READ_COMPLETE
+    elif status_code == 404:
+        # The status alone marks the page as not found; skip the body
+        response.close()
+        body, reason = "", READ_NOT_FOUND
+    else:
+        body, reason = read_body(response, stream)
+    # Only a body read to the end may stand in for the page later
+    complete = reason == READ_COMPLETE
+
+    if cache is not None and complete:
+        cache.put(
+            url,
+            status_code,
+            body,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    if archive is not None:
+        archive.append(url, status_code, body, dict(response.headers), complete=complete)
+    return body, status_code
 
 def detect_page_not_found(html: Optional[str], status_code: int) -> bool:
     if status_code == 404:
@@ -28,95 +179,176 @@ def detect_page_not_found(html: Optional[str], status_code: int) -> bool:
     if html is None:
         return True
 
-    lowered = html.lower()
-    not_found_signals = [
-        "page not found",
-        "we looked everywhere",
-        "404 error",
-        "sorry, we couldn't find",
-    ]
-    return any(sig in lowered for sig in not_found_signals)
-
-def _extract_title(soup: BeautifulSoup) -> Optional[str]:
-    h1 = soup.find("h1")
-    if h1 and h1.get_text(strip=True):
-        return h1.get_text(strip=True)
-    if soup.title and soup.title.string:
+    return has_not_found_signal(html)
+
+# Tag families the field extractors read, keyed by family name. The page
+# index collects all of them in one walk over the tree so no extractor has to
+# search the document again; multi-tag families stay in document order.
+_TAG_FAMILIES: Dict[str, Tuple[str, ...]] = {
+    "h1": ("h1",),
+    "title": ("title",),
+    "meta": ("meta",),
+    "a": ("a",),
+    "address": ("address",),
+    "img": ("img",),
+    "table": ("table",),
+    "li": ("li",),
+    "headings": ("h2", "h3"),
+    "snippets": ("q", "blockquote", "p"),
+}
+
+_FAMILY_BY_TAG: Dict[str, str] = {
+    tag: family for family, tags in _TAG_FAMILIES.items() for tag in tags
+}
+
+# What the extractors read besides the families: the attributes they look
+# up and the table cells the hours extractor walks. compact_markup keeps
+# exactly these, so compact parsing extracts what the full tree would.
+_READ_ATTRIBUTES = frozenset({"aria-label", "content", "href", "itemprop", "src"})
+_READ_TAGS = frozenset(_FAMILY_BY_TAG) | {"tr", "th", "td"}
+
+class _PageIndex:
+    """
+    Single-pass view over a parsed business page.
+    Tags are bucketed by family in document order, elements carrying an
+    aria-label are kept in order, and the flattened page text is computed
+    once and shared by every text-based extractor.
+    """
+
+    def __init__(self, document: Document) -> None:
+        self.document = document
+        self.families: Dict[str, List[Node]] = {family: [] for family in _TAG_FAMILIES}
+        self.aria_labelled: List[Node] = []
+
+        for node in document.iter_elements():
+            family = _FAMILY_BY_TAG.get(node.name)
+            if family is not None:
+                self.families[family].append(node)
+            if node.get("aria-label") is not None:
+                self.aria_labelled.append(node)
+
+        self._text: Optional[str] = None
+        self._text_lower: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.document.text(" ")
+        return self._text
+
+    @property
+    def text_lower(self) -> str:
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+
+    def flatten_text(self, lower: bool = False) -> None:
+        """Compute the cached page text now (and its lowercase form with `lower`)."""
+        if lower:
+            self.text_lower
+        else:
+            self.text
+
+    def first(self, family: str) -> Optional[Node]:
+        bucket = self.families[family]
+        return bucket[0] if bucket else None
+
+    def first_aria_label(self, pattern: "re.Pattern[str]") -> Optional[Node]:
+        for node in self.aria_labelled:
+            if pattern.search(node.get("aria-label")):
+                return node
+        return None
+
+_STAR_RATING_RE = re.compile(r"star rating", re.I)
+_ADDRESS_LABEL_RE = re.compile("address", re.I)
+_REVIEW_COUNT_RE = re.compile(r"([0-9,]+)\s+reviews?", re.I)
+_PRICE_LEVEL_RE = re.compile(r"\${1,4}")
+_PHONE_RE = re.compile(r"(\(\d{3}\)\s*\d{3}[-\s]?\d{4})")
+_OWNER_RE = re.compile(r"Business owner:\s*([A-Z][\w\s\.\-]+)")
+_CITY_STATE_ZIP_RE = re.compile(
+    r"(?P<city>[^,]+),\s*(?P<state>[A-Z]{2})\s+(?P<zip>[0-9]{5}(?:-[0-9]{4})?)$"
+)
+
+def _extract_title(page: _PageIndex) -> Optional[str]:
+    h1 = page.first("h1")
+    if h1 and h1.text():
+        return h1.text()
+    title = page.first("title")
+    if title and title.string:
         # Often "Business Name - City, State - Yelp"
-        return soup.title.string.split("- Yelp")[0].strip()
+        return title.string.split("- Yelp")[0].strip()
     return None
 
-def _extract_rating(soup: BeautifulSoup) -> Optional[str]:
+def _extract_rating(page: _PageIndex) -> Optional[str]:
     # Look for an element with aria-label containing "star rating"
-    rating_el = soup.find(attrs={"aria-label": re.compile(r"star rating", re.I)})
+    rating_el = page.first_aria_label(_STAR_RATING_RE)
     if rating_el:
-        label = rating_el.get("aria-label") or rating_el.get_text()
+        label = rating_el.get("aria-label") or rating_el.text(strip=False)
         match = re.search(r"([0-9.]+)", label)
         if match:
             return match.group(1)
 
     # Try meta tags with rating
-    meta = soup.find("meta", attrs={"itemprop": "ratingValue"})
-    if meta and meta.get("content"):
-        return meta["content"].strip()
+    for meta in page.families["meta"]:
+        if meta.get("itemprop") == "ratingValue":
+            if meta.get("content"):
+                return meta.get("content").strip()
+            break
 
     return None
 
-def _extract_review_count(soup: BeautifulSoup) -> Optional[str]:
+def _extract_review_count(page: _PageIndex) -> Optional[str]:
     # Yelp often uses text like "844 reviews"
-    pattern = re.compile(r"([0-9,]+)\s+reviews?", re.I)
-    text = soup.get_text(" ", strip=True)
-    match = pattern.search(text)
+    match = _REVIEW_COUNT_RE.search(page.text)
     if match:
         return f"{match.group(1)} reviews"
     return None
 
-def _extract_is_claimed(soup: BeautifulSoup) -> Optional[str]:
-    text = soup.get_text(" ", strip=True).lower()
+def _extract_is_claimed(page: _PageIndex) -> Optional[str]:
+    text = page.text_lower
     if "claimed" in text:
         return "Claimed"
     if "unclaimed" in text:
         return "Unclaimed"
     return None
 
-def _extract_price_level(soup: BeautifulSoup) -> Optional[str]:
+def _extract_price_level(page: _PageIndex) -> Optional[str]:
     # Look for a small group of dollar signs like "$$"
-    pattern = re.compile(r"\${1,4}")
-    text = soup.get_text(" ", strip=True)
-    match = pattern.search(text)
+    match = _PRICE_LEVEL_RE.search(page.text)
     if match:
         return match.group(0)
     return None
 
-def _extract_categories(soup: BeautifulSoup) -> List[str]:
+def _extract_categories(page: _PageIndex) -> List[str]:
     categories: List[str] = []
 
     # Yelp typically uses anchor tags near the header; grab a small set of category-like anchors
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        label = a.get_text(strip=True)
-        if not label:
+    for a in page.families["a"]:
+        href = a.get("href")
+        if href is None:
             continue
         # Heuristic: Yelp category links often contain "/c/" or "/search?cflt="
-        if "/c/" in href or "cflt=" in href:
-            if label not in categories:
-                categories.append(label)
+        if "/c/" not in href and "cflt=" not in href:
+            continue
+        label = a.text()
+        if label and label not in categories:
+            categories.append(label)
 
     return categories
 
-def _extract_address_block(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
+def _extract_address_block(page: _PageIndex) -> Dict[str, Optional[str]]:
     address_text = None
 
     # Try <address> tag first
-    address_tag = soup.find("address")
+    address_tag = page.first("address")
     if address_tag:
-        address_text = address_tag.get_text(" ", strip=True)
+        address_text = address_tag.text(" ")
 
     # Fallback: look for an element with "address" in aria-label or similar
     if not address_text:
-        candidate = soup.find(attrs={"aria-label": re.compile("address", re.I)})
+        candidate = page.first_aria_label(_ADDRESS_LABEL_RE)
         if candidate:
-            address_text = candidate.get_text(" ", strip=True)
+            address_text = candidate.text(" ")
 
     if not address_text:
         return {
@@ -131,10 +363,7 @@ def _extract_address_block(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
     city = state = zipcode = None
     full_address = address_text
 
-    match = re.search(
-        r"(?P<city>[^,]+),\s*(?P<state>[A-Z]{2})\s+(?P<zip>[0-9]{5}(?:-[0-9]{4})?)$",
-        address_text,
-    )
+    match = _CITY_STATE_ZIP_RE.search(address_text)
     if match:
         city = match.group("city").strip()
         state = match.group("state").strip()
@@ -147,21 +376,19 @@ def _extract_address_block(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
         "zipcode": zipcode,
     }
 
-def _extract_phone_number(soup: BeautifulSoup) -> Optional[str]:
-    text = soup.get_text(" ", strip=True)
+def _extract_phone_number(page: _PageIndex) -> Optional[str]:
     # Basic US phone pattern
-    match = re.search(
-        r"(\(\d{3}\)\s*\d{3}[-\s]?\d{4})",
-        text,
-    )
+    match = _PHONE_RE.search(page.text)
     if match:
         return match.group(1)
     return None
 
-def _extract_images(soup: BeautifulSoup, max_images: int = 10) -> List[str]:
+def _extract_images(page: _PageIndex, max_images: int = 10) -> List[str]:
     urls: List[str] = []
-    for img in soup.find_all("img", src=True):
-        src = img["src"]
+    for img in page.families["img"]:
+        src = img.get("src")
+        if src is None:
+            continue
         if "yelp" in src and "photo" in src:
             if src not in urls:
                 urls.append(src)
@@ -169,35 +396,37 @@ def _extract_images(soup: BeautifulSoup, max_images: int = 10) -> List[str]:
             break
     return urls
 
-def _extract_website(soup: BeautifulSoup) -> Optional[str]:
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        label = a.get_text(" ", strip=True).lower()
+def _extract_website(page: _PageIndex) -> Optional[str]:
+    for a in page.families["a"]:
+        href = a.get("href")
+        if href is None:
+            continue
+        label = a.text(" ").lower()
         if "business website" in label or "website" in label:
             # Some Yelp links redirect through /biz_redir; keep the original href
             return href
     return None
 
-def _extract_hours(soup: BeautifulSoup) -> Dict[str, str]:
+def _extract_hours(page: _PageIndex) -> Dict[str, str]:
     hours: Dict[str, str] = {}
     days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
     # Look for a table with hours info
     table = None
-    for candidate in soup.find_all("table"):
-        if "hours" in candidate.get_text(" ", strip=True).lower():
+    for candidate in page.families["table"]:
+        if "hours" in candidate.text(" ").lower():
             table = candidate
             break
 
     if not table:
         return hours
 
-    for row in table.find_all("tr"):
+    for row in table.find_all(["tr"]):
         cells = row.find_all(["th", "td"])
         if len(cells) < 2:
             continue
-        day_text = cells[0].get_text(" ", strip=True)
-        value_text = cells[1].get_text(" ", strip=True)
+        day_text = cells[0].text(" ")
+        value_text = cells[1].text(" ")
         for d in days:
             if day_text.startswith(d):
                 hours[d] = value_text
@@ -205,37 +434,35 @@ def _extract_hours(soup: BeautifulSoup) -> Dict[str, str]:
 
     return hours
 
-def _extract_owner_name(soup: BeautifulSoup) -> Optional[str]:
-    text = soup.get_text(" ", strip=True)
+def _extract_owner_name(page: _PageIndex) -> Optional[str]:
     # Heuristic: look for "Business owner:" or similar pattern
-    match = re.search(r"Business owner:\s*([A-Z][\w\s\.\-]+)", text)
+    match = _OWNER_RE.search(page.text)
     if match:
         return match.group(1).strip()
     return None
 
-def _extract_about(soup: BeautifulSoup) -> Optional[str]:
+def _extract_about(page: _PageIndex) -> Optional[str]:
     # Look for sections with "About the Business" style headings
-    headings = soup.find_all(["h2", "h3"])
-    for h in headings:
-        if "about the business" in h.get_text(" ", strip=True).lower():
+    for h in page.families["headings"]:
+        if "about the business" in h.text(" ").lower():
             # Take the following sibling paragraph(s)
             about_parts: List[str] = []
-            sib = h.find_next_sibling()
+            sib = h.next_element_sibling()
             while sib and sib.name in {"p", "div"}:
-                text = sib.get_text(" ", strip=True)
+                text = sib.text(" ")
                 if text:
                     about_parts.append(text)
-                sib = sib.find_next_sibling()
+                sib = sib.next_element_sibling()
             if about_parts:
                 return " ".join(about_parts)
     return None
 
-def _extract_review_highlights(soup: BeautifulSoup, max_reviews: int = 5) -> List[str]:
+def _extract_review_highlights(page: _PageIndex, max_reviews: int = 5) -> List[str]:
     highlights: List[str] = []
 
     # Try to find blockquotes or emphasized review snippets
-    for el in soup.find_all(["q", "blockquote", "p"]):
-        text = el.get_text(" ", strip=True)
+    for el in page.families["snippets"]:
+        text = el.text(" ")
         if not text:
             continue
         # Simple heuristic to filter out very short or obviously non-review text
@@ -249,12 +476,12 @@ def _extract_review_highlights(soup: BeautifulSoup, max_reviews: int = 5) -> Lis
 
     return highlights
 
-def _extract_business_services(soup: BeautifulSoup) -> Dict[str, bool]:
+def _extract_business_services(page: _PageIndex) -> Dict[str, bool]:
     services: Dict[str, bool] = {}
 
     # Yelp typically lists amenities as checkmarked items
-    for li in soup.find_all("li"):
-        text = li.get_text(" ", strip=True)
+    for li in page.families["li"]:
+        text = li.text(" ")
         if not text:
             continue
         lowered = text.lower()
@@ -270,31 +497,175 @@ def _extract_business_services(soup: BeautifulSoup) -> Dict[str, bool]:
 
     return services
 
-def parse_business_page(html: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, "html.parser")
-
-    address_info = _extract_address_block(soup)
-
-    parsed: Dict[str, Any] = {
-        "title": _extract_title(soup),
-        "rating": _extract_rating(soup),
-        "reviewCount": _extract_review_count(soup),
-        "isClaimed": _extract_is_claimed(soup),
-        "priceLevel": _extract_price_level(soup),
-        "categories": _extract_categories(soup),
-        "fullAddress": address_info.get("fullAddress"),
-        "city": address_info.get("city"),
-        "state": address_info.get("state"),
-        "zipcode": address_info.get("zipcode"),
-        "phoneNumber": _extract_phone_number(soup),
-        "images": _extract_images(soup),
-        "website": _extract_website(soup),
-        "hours": _extract_hours(soup),
-        "businessOwnerName": _extract_owner_name(soup),
-        "about": _extract_about(soup),
-        "reviewhighlights": _extract_review_highlights(soup),
-        "businessServices": _extract_business_services(soup),
-    }
+# Raw field names in the order parse_business_page returns them
+RAW_FIELDS = (
+    "title",
+    "rating",
+    "reviewCount",
+    "isClaimed",
+    "priceLevel",
+    "categories",
+    "fullAddress",
+    "city",
+    "state",
+    "zipcode",
+    "phoneNumber",
+    "images",
+    "website",
+    "hours",
+    "businessOwnerName",
+    "about",
+    "reviewhighlights",
+    "businessServices",
+)
+
+_ADDRESS_FIELDS = ("fullAddress", "city", "state", "zipcode")
+# Fields whose extractors search the flattened page text
+_TEXT_FIELDS = frozenset({"reviewCount", "isClaimed", "priceLevel", "phoneNumber", "businessOwnerName"})
+
+_FIELD_EXTRACTORS: Dict[str, Callable[[_PageIndex], Any]] = {
+    "title": _extract_title,
+    "rating": _extract_rating,
+    "reviewCount": _extract_review_count,
+    "isClaimed": _extract_is_claimed,
+    "priceLevel": _extract_price_level,
+    "categories": _extract_categories,
+    "phoneNumber": _extract_phone_number,
+    "images": _extract_images,
+    "website": _extract_website,
+    "hours": _extract_hours,
+    "businessOwnerName": _extract_owner_name,
+    "about": _extract_about,
+    "reviewhighlights": _extract_review_highlights,
+    "businessServices": _extract_business_services,
+}
+
+def select_fields(names: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Validate a field selection and return it in RAW_FIELDS order.
+    Raises ValueError naming any unknown field.
+    """
+    unknown = [name for name in names if name not in RAW_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(RAW_FIELDS)}"
+        )
+    wanted = set(names)
+    return tuple(field for field in RAW_FIELDS if field in wanted)
+
+def parse_field_list(value: str) -> List[str]:
+    """Split a comma-separated --fields value, ignoring spaces and empty items."""
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+SOURCE_STRUCTURED = "structured"
+SOURCE_HEURISTIC = "heuristic"
+
+def _extract_fields(page: _PageIndex, fields: Sequence[str]) -> Dict[str, Any]:
+    registry = get_registry()
+    if registry is not None and not _TEXT_FIELDS.isdisjoint(fields):
+        # Flatten the text up front so its cost is not billed to whichever
+        # text extractor happens to run first
+        started = time.perf_counter()
+        page.flatten_text(lower="isClaimed" in fields)
+        registry.observe("parse.page_text", time.perf_counter() - started)
+    values: Dict[str, Any] = {}
+    address_info: Optional[Dict[str, Optional[str]]] = None
+    for field in fields:
+        if field in _ADDRESS_FIELDS:
+            # One extractor fills all four address fields
+            if address_info is None:
+                address_info = _timed_extract(registry, _extract_address_block, page)
+            values[field] = address_info.get(field)
+        else:
+            values[field] = _timed_extract(registry, _FIELD_EXTRACTORS[field], page)
+    return values
+
+def _timed_extract(
+    registry: Optional[MetricsRegistry],
+    extractor: Callable[[_PageIndex], Any],
+    page: _PageIndex,
+) -> Any:
+    if registry is None:
+        return extractor(page)
+    started = time.perf_counter()
+    value = extractor(page)
+    registry.observe("extract." + extractor.__name__.lstrip("_"), time.perf_counter() - started)
+    return value
+
+def parse_business_page(
+    html: str,
+    backend: str = DEFAULT_PARSER_BACKEND,
+    structured_data: bool = True,
+    sources: Optional[Dict[str, Optional[str]]] = None,
+    fields: Optional[Sequence[str]] = None,
+    compact: bool = False,
+    memory: Optional[Dict[str, Optional[int]]] = None,
+) -> Dict[str, Any]:
+    """
+    Extract the raw business fields from a page.
+    JSON-LD / embedded JSON state is decoded first, straight from the HTML;
+    the DOM is only built, and the heuristic extractors only run, for the
+    fields it did not provide. `fields` (see select_fields) restricts the
+    result, and the extractors run, to a subset of RAW_FIELDS. When
+    `sources` is given it receives the tier that produced each non-empty
+    field. `compact` builds the DOM from compact_markup(html) instead of
+    the whole page; the tree is freed as soon as the extractors are done
+    either way. When `memory` is given it receives the length of the page,
+    the length of the markup the tree was built from and, while tracemalloc
+    is tracing, the peak bytes allocated building and walking the tree.
+    """
+    wanted = RAW_FIELDS if fields is None else fields
+    registry = get_registry()
+
+    started = time.perf_counter()
+    structured = extract_structured_data(html) if structured_data else {}
+    if registry is not None and structured_data:
+        registry.observe("parse.structured_data", time.perf_counter() - started)
+    missing = [field for field in wanted if field not in structured]
+
+    extracted: Dict[str, Any] = {}
+    dom_chars = 0
+    peak_bytes: Optional[int] = None
+    if missing:
+        tracing = memory is not None and tracemalloc.is_tracing()
+        if tracing:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        markup = compact_markup(html, _READ_ATTRIBUTES, _READ_TAGS) if compact else html
+        if registry is not None and compact:
+            registry.observe("parse.compact_markup", time.perf_counter() - started)
+            started = time.perf_counter()
+        dom_chars = len(markup)
+        document = build_document(markup, backend)
+        del markup
+        try:
+            page = _PageIndex(document)
+            if registry is not None:
+                registry.observe("parse.build_document", time.perf_counter() - started)
+            extracted = _extract_fields(page, missing)
+        finally:
+            document.close()
+        if tracing:
+            peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    if memory is not None:
+        memory["pageChars"] = len(html)
+        memory["domChars"] = dom_chars
+        memory["peakBytes"] = peak_bytes
+
+    parsed: Dict[str, Any] = {}
+    for field in wanted:
+        if field in structured:
+            parsed[field] = structured[field]
+            source: Optional[str] = SOURCE_STRUCTURED
+        else:
+            parsed[field] = extracted[field]
+            source = SOURCE_HEURISTIC if extracted[field] not in (None, [], {}) else None
+        if sources is not None:
+            sources[field] = source
 
     logging.debug("Parsed business data keys: %s", list(parsed.keys()))
-    return parsed
\ No newline at end of file
+    logging.debug(
+        "%d fields from structured data, %d from heuristics", len(structured), len(missing)
+    )
+    return parsed
@@ -1,19 +1,62 @@
-thonimport argparse
+import argparse
+import itertools
 import json
 import logging
 import os
+import socket
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
 
 # Ensure the src directory is on sys.path so namespace packages work
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
-from extractors.yelp_parser import fetch_html, parse_business_page, detect_page_not_found  # type: ignore
-from extractors.field_mapper import map_raw_to_business  # type: ignore
-from extractors.utils_time import current_timestamp  # type: ignore
-from pipelines.data_cleaner import clean_business_record  # type: ignore
+from extractors.dom_backends import PARSER_BACKENDS, build_document  # type: ignore
+from extractors.html_archive import HtmlArchive  # type: ignore
+from extractors.http_cache import ResponseCache  # type: ignore
+from extractors.latency import LatencyPolicy  # type: ignore
+from extractors.rate_limiter import HostRateLimiter, RetryPolicy  # type: ignore
+from extractors.streaming_fetch import StreamOptions  # type: ignore
+from extractors.utils_metrics import PeriodicExporter, enable_metrics, get_registry  # type: ignore
+from extractors.yelp_parser import fetch_html, parse_field_list, select_fields  # type: ignore
+from pipelines.business_aliases import AliasMap, iter_with_aliases  # type: ignore
+from pipelines.checkpoint import STATUS_ERROR, Checkpoint, checkpoint_path_for, record_status  # type: ignore
+from pipelines.incremental import IncrementalTracker, delta_path_for  # type: ignore
+from pipelines.output_sinks import OUTPUT_FORMATS, check_output_format, detect_output_format, write_records  # type: ignore
+from pipelines.output_writers import (  # type: ignore
+    JsonlWriter,
+    Record,
+    drop_records,
+    serialize_record,
+    write_run_metadata,
+)
+from pipelines.parse_stage import (  # type: ignore
+    FetchedPage,
+    ParseOptions,
+    build_error_record,
+    build_record,
+    build_record_measured,
+)
+from pipelines.shard_merge import SHARD_OUTPUT_FORMATS  # type: ignore
+from pipelines.url_input import (  # type: ignore
+    DEDUPE_MODES,
+    INPUT_FORMATS,
+    STDIN_PATH,
+    iter_input_urls,
+    parse_shard_spec,
+)
+from pipelines.work_queue import WorkQueue  # type: ignore
+
+QUEUE_ROLE_ALL = "all"
+QUEUE_ROLE_ENQUEUE = "enqueue"
+QUEUE_ROLE_WORKER = "worker"
+QUEUE_ROLE_EXPORT = "export"
+QUEUE_ROLES = (QUEUE_ROLE_ALL, QUEUE_ROLE_ENQUEUE, QUEUE_ROLE_WORKER, QUEUE_ROLE_EXPORT)
 
 def load_settings(config_path: str) -> Dict[str, Any]:
     defaults: Dict[str, Any] = {
@@ -23,8 +66,57 @@ def load_settings(config_path: str) -> Dict[str, Any]:
             "Chrome/120.0 Safari/537.36"
         ),
         "timeout": 15,
+        "adaptive_timeouts": False,
+        "timeout_min": 2.0,
+        "timeout_multiplier": 3.0,
+        "hedge_requests": False,
+        "hedge_quantile": 0.95,
+        "hedge_budget": 0.05,
+        "stream_fetch": False,
+        "max_body_mb": 10,
+        "stop_markers": [],
         "concurrent_requests": 1,
+        "parse_workers": 0,
+        "parser_backend": "html.parser",
+        "structured_data": True,
+        "field_sources": False,
+        "compact_parse": False,
+        "report_parse_memory": False,
+        "fields": None,
+        "input_format": "auto",
+        "input_url_column": "url",
+        "input_dedupe": "bloom",
+        "input_dedupe_error_rate": 0.000001,
+        "shard": None,
         "output_file": "data/sample_output.json",
+        "output_format": "json",
+        "output_batch_size": 5000,
+        "flush_every": 100,
+        "fsync": True,
+        "checkpoint": True,
+        "archive_path": None,
+        "http_cache_path": None,
+        "http_cache_ttl": 86400,
+        "http_cache_max_mb": 1024,
+        "max_retries": 3,
+        "backoff_base": 1.0,
+        "backoff_max": 60.0,
+        "rate_limit_per_host": 0,
+        "rate_limit_burst": 1,
+        "rate_limit_min": 0.5,
+        "rate_limit_max": None,
+        "incremental_state": None,
+        "alias_map": None,
+        "service_address": None,
+        "service_max_batch": 1000,
+        "queue_path": None,
+        "queue_workers": 2,
+        "queue_batch_size": 10,
+        "queue_lease_seconds": 300,
+        "queue_max_attempts": 3,
+        "queue_poll_interval": 1.0,
+        "metrics_path": None,
+        "metrics_interval": 0,
         "log_level": "INFO",
     }
 
@@ -58,103 +150,452 @@ def load_settings(config_path: str) -> Dict[str, Any]:
 
     return merged
 
-def read_input_urls(file_path: str) -> List[str]:
-    if not os.path.exists(file_path):
-        logging.error("Input URLs file not found: %s", file_path)
-        raise FileNotFoundError(f"Input URLs file not found: {file_path}")
+def write_output(
+    records: Iterable[Record],
+    output_path: str,
+    output_format: str = "json",
+    batch_size: int = 5000,
+) -> None:
+    count = write_records(records, output_path, output_format, batch_size)
+    logging.info("Wrote %d records to %s", count, output_path)
 
-    urls: List[str] = []
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            url = line.strip()
-            if url and not url.startswith("#"):
-                urls.append(url)
+def resolve_output_format(output_path: str, requested: Optional[str]) -> str:
+    # A recognised extension wins over --format and settings.json
+    return detect_output_format(output_path) or requested or "json"
 
-    if not urls:
-        logging.warning("No URLs found in %s", file_path)
+def write_output_stream(
+    records: Iterator[Record],
+    output_path: str,
+    settings: Dict[str, Any],
+    checkpoint: Optional[Checkpoint] = None,
+    append: bool = False,
+) -> None:
+    writer = JsonlWriter(
+        output_path,
+        flush_every=int(settings.get("flush_every", 100)),
+        fsync=bool(settings.get("fsync", True)),
+        append=append,
+        on_flush=checkpoint.flush if checkpoint is not None else None,
+    )
+    try:
+        for record in records:
+            writer.write(record)
+            if checkpoint is not None:
+                checkpoint.mark(record["url"], record_status(record))
+    finally:
+        # Flush the output first so the checkpoint never runs ahead of it
+        writer.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    logging.info("Wrote %d records to %s", writer.count, output_path)
 
-    return urls
+def select_pending_urls(
+    urls: Iterable[str],
+    checkpoint: Checkpoint,
+    retry_failed: bool,
+) -> Iterator[str]:
+    # Not a generator itself, so this is logged when resuming starts
+    if retry_failed:
+        failed = checkpoint.failed_urls()
+        logging.info("Resuming: retrying %d failed URLs from the checkpoint", len(failed))
+        return (url for url in urls if url in failed)
+    logging.info("Resuming: skipping %d URLs already processed", len(checkpoint.statuses))
+    return (url for url in urls if not checkpoint.is_done(url))
 
-def write_output(data: List[Dict[str, Any]], output_path: str) -> None:
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-    logging.info("Wrote %d records to %s", len(data), output_path)
+def peek_urls(urls: Iterable[str]) -> Optional[Iterator[str]]:
+    """Return an iterator over `urls`, or None if there are none, reading at most one."""
+    url_iter = iter(urls)
+    first = next(url_iter, None)
+    if first is None:
+        return None
+    return itertools.chain((first,), url_iter)
+
+def _progress(done: int, total: Optional[int]) -> str:
+    return f"{done}/{total}" if total is not None else str(done)
 
 def resolve_path_relative_to_root(relative_path: str) -> str:
     # Repo root is one level above src/
     root_dir = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
     return os.path.join(root_dir, relative_path)
 
-def scrape_urls(
-    urls: List[str],
-    settings: Dict[str, Any],
-) -> List[Dict[str, Any]]:
+def build_session(settings: Dict[str, Any]) -> Any:
     import requests
+    from requests.adapters import HTTPAdapter
 
-    headers = {"User-Agent": settings.get("user_agent")}
-    timeout = int(settings.get("timeout", 15))
+    # Size the connection pool to the worker count so concurrent fetches
+    # reuse keep-alive connections instead of discarding them. Hedging
+    # can double the requests in flight (see LatencyPolicy).
+    pool_size = max(1, int(settings.get("concurrent_requests", 1)))
+    if settings.get("hedge_requests"):
+        pool_size *= 2
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
 
     session = requests.Session()
-    results: List[Dict[str, Any]] = []
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def build_response_cache(settings: Dict[str, Any]) -> Optional[ResponseCache]:
+    cache_path = settings.get("http_cache_path")
+    if not cache_path:
+        return None
+    return ResponseCache(
+        resolve_path_relative_to_root(str(cache_path)),
+        ttl_seconds=float(settings.get("http_cache_ttl", 86400)),
+        max_bytes=int(float(settings.get("http_cache_max_mb", 1024)) * 1024 * 1024),
+    )
+
+def build_html_archive(settings: Dict[str, Any]) -> Optional[HtmlArchive]:
+    archive_path = settings.get("archive_path")
+    if not archive_path:
+        return None
+    return HtmlArchive(resolve_path_relative_to_root(str(archive_path)))
+
+def build_alias_map(settings: Dict[str, Any]) -> Optional[AliasMap]:
+    alias_path = settings.get("alias_map")
+    if not alias_path:
+        return None
+    return AliasMap(resolve_path_relative_to_root(str(alias_path)))
+
+def build_latency_policy(settings: Dict[str, Any]) -> Optional[LatencyPolicy]:
+    adaptive = bool(settings.get("adaptive_timeouts", False))
+    hedge = bool(settings.get("hedge_requests", False))
+    if not adaptive and not hedge:
+        return None
+    return LatencyPolicy(
+        max_timeout=float(settings.get("timeout", 15)),
+        adaptive_timeouts=adaptive,
+        min_timeout=float(settings.get("timeout_min", 2.0)),
+        multiplier=float(settings.get("timeout_multiplier", 3.0)),
+        hedge=hedge,
+        hedge_quantile=float(settings.get("hedge_quantile", 0.95)),
+        hedge_budget=float(settings.get("hedge_budget", 0.05)),
+        max_workers=max(1, int(settings.get("concurrent_requests", 1))),
+    )
+
+def build_rate_limiter(settings: Dict[str, Any]) -> Optional[HostRateLimiter]:
+    rate = float(settings.get("rate_limit_per_host", 0) or 0)
+    if rate <= 0:
+        return None
+    max_rate = settings.get("rate_limit_max")
+    return HostRateLimiter(
+        rate=rate,
+        burst=float(settings.get("rate_limit_burst", 1)),
+        min_rate=float(settings.get("rate_limit_min", 0.5)),
+        max_rate=float(max_rate) if max_rate else None,
+    )
+
+def build_stream_options(settings: Dict[str, Any]) -> Optional[StreamOptions]:
+    if not settings.get("stream_fetch", False):
+        return None
+    # Stopping once structured data covers the selection is only safe when
+    # the parse stage reads that structured data and nothing else
+    fields = settings.get("fields") if settings.get("structured_data", True) else None
+    return StreamOptions(
+        max_bytes=int(float(settings.get("max_body_mb", 10) or 0) * 1024 * 1024),
+        early_stop_fields=fields or None,
+        stop_markers=settings.get("stop_markers") or None,
+    )
+
+def build_parse_options(settings: Dict[str, Any]) -> ParseOptions:
+    return ParseOptions(
+        parser_backend=str(settings.get("parser_backend", "html.parser")),
+        structured_data=bool(settings.get("structured_data", True)),
+        field_sources=bool(settings.get("field_sources", False)),
+        compact_parse=bool(settings.get("compact_parse", False)),
+        report_memory=bool(settings.get("report_parse_memory", False)),
+        fields=settings.get("fields") or None,
+    )
+
+class ScrapeContext:
+    """Shared, thread-safe state every worker needs to scrape one URL."""
+
+    def __init__(self, settings: Dict[str, Any], incremental: Optional[IncrementalTracker] = None) -> None:
+        self.headers = {"User-Agent": settings.get("user_agent")}
+        self.timeout = int(settings.get("timeout", 15))
+        self.parse_options = build_parse_options(settings)
+        self.session = build_session(settings)
+        self.cache = build_response_cache(settings)
+        self.limiter = build_rate_limiter(settings)
+        self.stream_options = build_stream_options(settings)
+        self.archive = build_html_archive(settings)
+        self.latency = build_latency_policy(settings)
+        self.aliases = build_alias_map(settings)
+        self.retry_policy = RetryPolicy(
+            max_retries=int(settings.get("max_retries", 3)),
+            backoff_base=float(settings.get("backoff_base", 1.0)),
+            backoff_max=float(settings.get("backoff_max", 60.0)),
+        )
+        self.incremental = incremental
+        # A long-lived process pool for the parse stage (service mode);
+        # one-shot runs create their own. Concurrent batches share it, so
+        # replacing a broken one happens under the lock.
+        self.parse_pool: Optional[Executor] = None
+        self.parse_pool_lock = threading.Lock()
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self.latency is not None:
+            self.latency.close()
+        if self.aliases is not None:
+            self.aliases.close()
+        self.session.close()
+
+def fetch_page(url: str, context: ScrapeContext) -> FetchedPage:
+    fetch_stats: Dict[str, Any] = {"retries": 0, "throttledSeconds": 0.0}
+    started = time.perf_counter()
+    try:
+        html, status_code = fetch_html(
+            url=url,
+            session=context.session,
+            headers=context.headers,
+            timeout=context.timeout,
+            cache=context.cache,
+            limiter=context.limiter,
+            retry_policy=context.retry_policy,
+            stats=fetch_stats,
+            stream=context.stream_options,
+            archive=context.archive,
+            latency=context.latency,
+        )
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Unexpected error while fetching %s: %s", url, exc)
+        html, status_code = None, 0
+    registry = get_registry()
+    if registry is not None:
+        registry.observe("fetch", time.perf_counter() - started)
+    if context.aliases is not None and html and status_code == 200:
+        context.aliases.learn(url, fetch_stats.get("finalUrl"), html)
+    if context.incremental is not None and html and status_code == 200:
+        page_hash, previous = context.incremental.lookup(url, html)
+        if previous is not None:
+            # Nothing left to parse; don't ship the HTML to a parse worker
+            html = None
+        return FetchedPage(url, html, status_code, fetch_stats, page_hash, previous)
+    return FetchedPage(url, html, status_code, fetch_stats)
+
+def observe_change(
+    context: ScrapeContext,
+    page_url: str,
+    page_hash: Optional[str],
+    reused: bool,
+    record: Record,
+) -> None:
+    if context.incremental is not None:
+        context.incremental.observe(page_url, page_hash, record, reused)
 
-    for idx, url in enumerate(urls, start=1):
-        logging.info("Processing (%d/%d): %s", idx, len(urls), url)
+def scrape_one(url: str, context: ScrapeContext) -> Record:
+    page = fetch_page(url, context)
+    record = build_record(page, context.parse_options)
+    observe_change(context, url, page.page_hash, page.previous_record is not None, record)
+    return record
+
+def _iter_two_stage(
+    urls: Iterable[str],
+    context: ScrapeContext,
+    fetch_workers: int,
+    parse_workers: int,
+) -> Iterator[Record]:
+    """
+    Fetch on a thread pool and parse on a process pool (the context's
+    long-lived one in service mode).
+    Both stages keep a bounded window of in-flight work (at most twice their
+    worker count), so a slow stage stalls the one feeding it instead of
+    letting fetched HTML pile up in memory. Results are drained in input
+    order.
+    """
+    total = len(urls) if isinstance(urls, Sized) else None
+    url_iter = iter(urls)
+    # Worker processes have their own registry; ship their timings back
+    registry = get_registry()
+    parse_func = build_record if registry is None else build_record_measured
+
+    fetching: Deque[Future] = deque()
+    parsing: Deque[Tuple[FetchedPage, Future]] = deque()
+    max_fetching = fetch_workers * 2
+    max_parsing = parse_workers * 2
+    done = 0
+
+    # multiprocessing is slow to import; only load it when needed
+    from concurrent.futures.process import BrokenProcessPool, ProcessPoolExecutor
+
+    parsers = context.parse_pool
+    owns_pool = parsers is None
+    if parsers is None:
+        parsers = ProcessPoolExecutor(max_workers=parse_workers)
+
+    def replace_broken_pool(broken: Executor) -> Executor:
+        # A worker died (OOM kill, crash in a parser extension) and the
+        # pool refuses new work: replace it, the service's one included.
+        # Pages already queued on it come back as error records.
+        with context.parse_pool_lock:
+            if not owns_pool and context.parse_pool is not broken:
+                # Another batch got here first
+                return context.parse_pool  # type: ignore[return-value]
+            logging.error("Parse worker pool broke; starting a new one")
+            broken.shutdown(wait=False)
+            fresh = ProcessPoolExecutor(max_workers=parse_workers)
+            if not owns_pool:
+                context.parse_pool = fresh
+            return fresh
+
+    def submit_parse(page: FetchedPage) -> Future:
+        nonlocal parsers
+        if not owns_pool:
+            # Follow a replacement made by a concurrent batch
+            parsers = context.parse_pool
         try:
-            html, status_code = fetch_html(
-                url=url,
-                session=session,
-                headers=headers,
-                timeout=timeout,
-            )
-            is_not_found = detect_page_not_found(html, status_code)
+            return parsers.submit(parse_func, page, context.parse_options)
+        except BrokenProcessPool:
+            parsers = replace_broken_pool(parsers)
+        try:
+            return parsers.submit(parse_func, page, context.parse_options)
+        except BrokenProcessPool as exc:
+            failed: Future = Future()
+            failed.set_exception(exc)
+            return failed
 
-            if is_not_found or not html:
-                logging.warning("Page not found or empty HTML for URL: %s", url)
-                raw_data: Dict[str, Any] = {}
-            else:
-                raw_data = parse_business_page(html)
-
-            timestamp = current_timestamp()
-            mapped = map_raw_to_business(
-                raw_data=raw_data,
-                url=url,
-                timestamp=timestamp,
-                is_page_not_found=is_not_found,
-            )
-            cleaned = clean_business_record(mapped)
-            results.append(cleaned)
-        except Exception as exc:  # noqa: BLE001
-            logging.exception("Unexpected error while scraping %s: %s", url, exc)
-            # Still append a record that describes the failure
-            results.append(
-                {
-                    "title": None,
-                    "rating": None,
-                    "reviewCount": None,
-                    "isClaimed": None,
-                    "priceLevel": None,
-                    "categories": None,
-                    "fullAddress": None,
-                    "city": None,
-                    "state": None,
-                    "zipcode": None,
-                    "phoneNumber": None,
-                    "images": [],
-                    "website": None,
-                    "hours": {},
-                    "businessOwnerName": None,
-                    "about": None,
-                    "reviewhighlights": [],
-                    "businessServices": {},
-                    "timestamp": current_timestamp(),
-                    "url": url,
-                    "is_page_not_found": True,
-                    "error": str(exc),
-                }
-            )
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers:
+
+            def fill_fetch_window() -> None:
+                while len(fetching) < max_fetching:
+                    url = next(url_iter, None)
+                    if url is None:
+                        return
+                    fetching.append(fetchers.submit(fetch_page, url, context))
+
+            while True:
+                fill_fetch_window()
+                while fetching and len(parsing) < max_parsing:
+                    page = fetching.popleft().result()
+                    future = submit_parse(page)
+                    # Keep only what the change tracker needs, not the HTML
+                    tracked = FetchedPage(
+                        page.url, None, page.status_code, None, page.page_hash, page.previous_record
+                    )
+                    parsing.append((tracked, future))
+                    fill_fetch_window()
 
-    return results
+                if not parsing:
+                    break
+
+                page, future = parsing.popleft()
+                url = page.url
+                try:
+                    record = future.result()
+                    if registry is not None:
+                        record, timings = record
+                        registry.merge(timings)
+                except Exception as exc:  # noqa: BLE001
+                    # A crashed worker process must not take the whole run down
+                    logging.error("Parse worker failed for %s: %s", url, exc)
+                    record = build_error_record(url, exc)
+                observe_change(context, url, page.page_hash, page.previous_record is not None, record)
+                done += 1
+                logging.info("Processed (%s): %s", _progress(done, total), url)
+                yield record
+    finally:
+        if owns_pool:
+            parsers.shutdown()
+
+def _iter_records(
+    urls: Iterable[str],
+    context: ScrapeContext,
+    workers: int,
+    parse_workers: int,
+    total: Optional[int],
+) -> Iterator[Record]:
+    if parse_workers > 0:
+        yield from _iter_two_stage(urls, context, workers, parse_workers)
+        return
+
+    if workers == 1:
+        for idx, url in enumerate(urls, start=1):
+            logging.info("Processing (%s): %s", _progress(idx, total), url)
+            yield scrape_one(url, context)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded window of in-flight futures and drain it from the
+        # left so results come back in input order without queuing every
+        # URL up front.
+        pending: Deque[Tuple[int, str, Future]] = deque()
+        url_iter = iter(enumerate(urls, start=1))
+        max_in_flight = workers * 2
+
+        while True:
+            while len(pending) < max_in_flight:
+                try:
+                    idx, url = next(url_iter)
+                except StopIteration:
+                    break
+                pending.append((idx, url, executor.submit(scrape_one, url, context)))
+
+            if not pending:
+                break
+
+            idx, url, future = pending.popleft()
+            yield future.result()
+            logging.info("Processed (%s): %s", _progress(idx, total), url)
+
+def iter_scrape_results(
+    urls: Iterable[str],
+    settings: Dict[str, Any],
+    incremental: Optional[IncrementalTracker] = None,
+    context: Optional[ScrapeContext] = None,
+) -> Iterator[Record]:
+    """
+    Yield one cleaned record per URL, in input order, as soon as it is ready.
+    `urls` may be a lazy iterator; it is only advanced as workers free up.
+    With `incremental`, unchanged pages reuse their previous record and every
+    record is compared against the previous run. With an alias map, URLs of
+    a business already scraped reuse its record instead of being fetched.
+    A `context` passed in (the service's warm one) is shared and left open.
+    """
+    workers = max(1, int(settings.get("concurrent_requests", 1)))
+    parse_workers = max(0, int(settings.get("parse_workers", 0)))
+    owns_context = context is None
+    if context is None:
+        context = ScrapeContext(settings, incremental)
+    total = len(urls) if isinstance(urls, Sized) else None
+    count = f"{total} URLs" if total is not None else "URLs"
+    if parse_workers > 0:
+        logging.info(
+            "Scraping %s with %d fetch workers and %d parse processes",
+            count,
+            workers,
+            parse_workers,
+        )
+    elif workers > 1:
+        logging.info("Scraping %s with %d concurrent workers", count, workers)
+
+    try:
+        aliases = context.aliases
+        if aliases is None:
+            yield from _iter_records(urls, context, workers, parse_workers, total)
+            return
+        # Only the URLs that need fetching reach the workers, so their
+        # progress counts those rather than the whole input
+        yield from iter_with_aliases(
+            urls,
+            aliases,
+            lambda fetch_urls: _iter_records(fetch_urls, context, workers, parse_workers, None),
+            lambda url: scrape_one(url, context),
+            lambda url, record: observe_change(context, url, None, False, record),
+        )
+    finally:
+        if owns_context:
+            context.close()
+
+def scrape_urls(
+    urls: Iterable[str],
+    settings: Dict[str, Any],
+) -> List[Record]:
+    return list(iter_scrape_results(urls, settings))
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -163,9 +604,41 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "-i",
         "--input",
-        dest="input_file",
-        default="data/input_urls.txt",
-        help="Path to the input URLs file (default: data/input_urls.txt)",
+        dest="input_files",
+        nargs="+",
+        default=["data/input_urls.txt"],
+        help=(
+            "Input URL sources read lazily in order: text, .csv/.tsv or .jsonl files, optionally "
+            ".gz/.zst compressed, or - for stdin (default: data/input_urls.txt)"
+        ),
+    )
+    parser.add_argument(
+        "--input-format",
+        dest="input_format",
+        choices=INPUT_FORMATS,
+        default=None,
+        help="Input format; auto detects it from the file extension (default from settings.json)",
+    )
+    parser.add_argument(
+        "--url-column",
+        dest="input_url_column",
+        default=None,
+        help="Column (CSV/TSV) or key (JSONL) holding the URL (default from settings.json)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        dest="input_dedupe",
+        choices=DEDUPE_MODES,
+        default=None,
+        help="Drop repeated URLs with a growing Bloom filter, an exact set, or not at all (default from settings.json)",
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help=(
+            "Process only shard K of N (0-based, e.g. 0/4) by a stable hash of each canonical URL; "
+            "merge the shard outputs with tools/merge_shards.py"
+        ),
     )
     parser.add_argument(
         "-o",
@@ -174,14 +647,520 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Path to the output JSON file (default from settings.json)",
     )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        dest="concurrent_requests",
+        type=int,
+        default=None,
+        help="Number of concurrent fetch workers (default from settings.json)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        dest="parse_workers",
+        type=int,
+        default=None,
+        help="Parse in this many worker processes, fed by the fetch workers (0 parses inline; default from settings.json)",
+    )
+    parser.add_argument(
+        "--parser",
+        dest="parser_backend",
+        choices=PARSER_BACKENDS,
+        default=None,
+        help="HTML parser backend (default from settings.json)",
+    )
+    parser.add_argument(
+        "--no-structured-data",
+        dest="structured_data",
+        action="store_false",
+        default=None,
+        help="Skip the JSON-LD / embedded-state tier and use only the HTML heuristics",
+    )
+    parser.add_argument(
+        "--field-sources",
+        action="store_true",
+        default=None,
+        help="Add a fieldSources map recording which tier produced each field",
+    )
+    parser.add_argument(
+        "--compact-parse",
+        action="store_true",
+        default=None,
+        help="Build the DOM without scripts, styles, comments, icon SVGs and unread attributes (same output, less memory)",
+    )
+    parser.add_argument(
+        "--report-parse-memory",
+        action="store_true",
+        default=None,
+        help="Log each page's peak parse memory (traces allocations, so parsing runs slower)",
+    )
+    parser.add_argument(
+        "--fields",
+        default=None,
+        help=(
+            "Comma-separated fields to extract, e.g. title,rating,phoneNumber,fullAddress; "
+            "only their extractors run and other fields keep empty defaults (default: all)"
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help=(
+            "Output format: a JSON array, JSON Lines streamed as records finish, flattened CSV, "
+            "Parquet or Arrow (needs pyarrow) or a SQLite table (default from settings.json; "
+            ".jsonl, .csv, .parquet, .arrow and .sqlite/.db paths imply their format)"
+        ),
+    )
+    parser.add_argument(
+        "--output-batch-size",
+        dest="output_batch_size",
+        type=int,
+        default=None,
+        help="Rows per Parquet/Arrow row group or SQLite transaction (default from settings.json)",
+    )
+    parser.add_argument(
+        "--adaptive-timeouts",
+        dest="adaptive_timeouts",
+        action="store_true",
+        default=None,
+        help=(
+            "Derive connect/read timeouts from the host's observed p95/p99 latency "
+            "(times timeout_multiplier, capped at the timeout setting)"
+        ),
+    )
+    parser.add_argument(
+        "--hedge",
+        dest="hedge_requests",
+        action="store_true",
+        default=None,
+        help=(
+            "Send one duplicate of a request still unanswered after the p95 latency, "
+            "limited to hedge_budget (default 5%%) of all requests"
+        ),
+    )
+    parser.add_argument(
+        "--archive",
+        dest="archive_path",
+        default=None,
+        help=(
+            "Append every fetched response to this archive (plus a .idx index) so it can be "
+            "re-parsed offline with tools/replay_archive.py (default from settings.json)"
+        ),
+    )
+    parser.add_argument(
+        "--http-cache",
+        dest="http_cache_path",
+        default=None,
+        help="Path of an on-disk HTTP response cache to read and revalidate (default from settings.json)",
+    )
+    parser.add_argument(
+        "--stream",
+        dest="stream_fetch",
+        action="store_true",
+        default=None,
+        help=(
+            "Read responses in chunks: stop at soft-404 pages, cap the body size and, with --fields, "
+            "stop once structured data covers the selection"
+        ),
+    )
+    parser.add_argument(
+        "--max-body-mb",
+        dest="max_body_mb",
+        type=float,
+        default=None,
+        help="Largest response body read in --stream mode, in MB (0 disables the cap, default from settings.json)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit_per_host",
+        type=float,
+        default=None,
+        help="Starting requests/second per host; adapts to throttling (0 disables, default from settings.json)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        dest="max_retries",
+        type=int,
+        default=None,
+        help="Retries for throttled, 5xx and failed requests (default from settings.json)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip URLs already recorded in the output's checkpoint and append to the output (jsonl only)",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Re-scrape only the URLs whose previous attempt produced an error record (jsonl only)",
+    )
+    parser.add_argument(
+        "--queue",
+        dest="queue_path",
+        default=None,
+        help="Run through a SQLite work queue at this path that any number of worker processes can share",
+    )
+    parser.add_argument(
+        "--queue-role",
+        choices=QUEUE_ROLES,
+        default=QUEUE_ROLE_ALL,
+        help=(
+            "all: enqueue, run --queue-workers processes, then export (default); enqueue: only add "
+            "the input URLs; worker: only process jobs; export: only write finished jobs to the output"
+        ),
+    )
+    parser.add_argument(
+        "--queue-workers",
+        dest="queue_workers",
+        type=int,
+        default=None,
+        help="Worker processes started by --queue-role all (0 runs in this process, default from settings.json)",
+    )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental_state",
+        default=None,
+        metavar="STATE_PATH",
+        help=(
+            "Keep page and record hashes in this SQLite file; unchanged pages are not re-parsed and "
+            "added/changed/removed businesses are written to OUTPUT.delta.jsonl (default from settings.json)"
+        ),
+    )
+    parser.add_argument(
+        "--alias-map",
+        dest="alias_map",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Learn which URLs show the same business (redirects, canonical links, business ids) in this "
+            "SQLite file and reuse one record for all of them instead of fetching each (default from settings.json)"
+        ),
+    )
+    parser.add_argument(
+        "--serve",
+        dest="service_address",
+        default=None,
+        metavar="ADDRESS",
+        help=(
+            "Run as a resident service on HOST:PORT, :PORT or unix:/path/to.sock instead of "
+            "reading input files; POST /scrape with {\"urls\": [...]} returns JSON Lines"
+        ),
+    )
+    parser.add_argument(
+        "--metrics",
+        dest="metrics_path",
+        default=None,
+        help="Record per-stage timings and write them to PREFIX.prom and PREFIX.json (default from settings.json)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        dest="metrics_interval",
+        type=float,
+        default=None,
+        help="Also re-export metrics every N seconds during the run (0 exports only at the end)",
+    )
     return parser.parse_args()
 
+def run(args: argparse.Namespace, settings: Dict[str, Any], urls: Iterator[str], output_file: str) -> None:
+    output_format = resolve_output_format(output_file, args.output_format or settings.get("output_format"))
+
+    resuming = args.resume or args.retry_failed
+    if resuming and output_format != "jsonl":
+        logging.error("--resume and --retry-failed require jsonl output")
+        sys.exit(1)
+
+    checkpoint: Optional[Checkpoint] = None
+    if output_format == "jsonl":
+        if settings.get("checkpoint", True) or resuming:
+            checkpoint_path = checkpoint_path_for(output_file)
+            # Synced exactly as often as the output it describes
+            fsync = bool(settings.get("fsync", True))
+            if resuming:
+                checkpoint = Checkpoint(checkpoint_path, fsync=fsync).load()
+                pending = select_pending_urls(urls, checkpoint, args.retry_failed)
+                if args.retry_failed:
+                    # Bounded by the failed URLs, so safe to materialize
+                    retry = list(pending)
+                    drop_records(output_file, set(retry))
+                    pending = iter(retry)
+                remaining = peek_urls(pending)
+                if remaining is None:
+                    logging.info("Nothing left to process.")
+                    return
+                urls = remaining
+            else:
+                if os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                checkpoint = Checkpoint(checkpoint_path, fsync=fsync)
+
+    incremental = build_incremental_tracker(settings, output_file, append=resuming)
+    completed = False
+    try:
+        if output_format == "jsonl":
+            write_output_stream(
+                iter_scrape_results(urls, settings, incremental),
+                output_file,
+                settings,
+                checkpoint=checkpoint,
+                append=resuming,
+            )
+        else:
+            # Records stream straight into the file instead of piling up in a list
+            write_output(
+                iter_scrape_results(urls, settings, incremental),
+                output_file,
+                output_format,
+                int(settings.get("output_batch_size", 5000)),
+            )
+        completed = True
+    finally:
+        if incremental is not None:
+            # A resumed or interrupted run only saw part of the input, so
+            # businesses it did not reach are not reported as removed
+            incremental.finish(detect_removed=completed and not resuming)
+            logging.info("Wrote changes since the previous run to %s", delta_path_for(output_file))
+
+def build_incremental_tracker(
+    settings: Dict[str, Any], output_file: str, append: bool = False
+) -> Optional[IncrementalTracker]:
+    state_path = settings.get("incremental_state")
+    if not state_path:
+        return None
+    return IncrementalTracker(
+        resolve_path_relative_to_root(str(state_path)),
+        delta_path_for(output_file),
+        options_key=build_parse_options(settings).cache_key(),
+        append=append,
+    )
+
+def with_metrics(settings: Dict[str, Any], func: Callable[[], None]) -> None:
+    """Run `func`, recording and exporting stage timings if metrics are enabled."""
+    metrics_path = settings.get("metrics_path")
+    if not metrics_path:
+        func()
+        return
+
+    metrics_path = resolve_path_relative_to_root(metrics_path)
+    registry = enable_metrics()
+    interval = float(settings.get("metrics_interval") or 0)
+    exporter = PeriodicExporter(registry, metrics_path, interval).start() if interval > 0 else None
+    try:
+        func()
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        registry.export(metrics_path)
+        logging.info("Wrote stage timings to %s.prom and %s.json", metrics_path, metrics_path)
+
+def run_service(settings: Dict[str, Any], address: str) -> None:
+    """
+    Stay resident and scrape batches posted to the local API. One warm
+    ScrapeContext (session and connection pools, cache, limiter) and, with
+    parse_workers, one process pool serve every batch.
+    """
+    import signal
+
+    from pipelines.scrape_service import ScrapeService, parse_service_address  # type: ignore
+
+    try:
+        parse_service_address(address)
+    except ValueError as exc:
+        logging.error(str(exc))
+        sys.exit(1)
+
+    context = ScrapeContext(settings)
+    parse_workers = max(0, int(settings.get("parse_workers", 0)))
+    if parse_workers > 0:
+        from concurrent.futures import ProcessPoolExecutor
+
+        context.parse_pool = ProcessPoolExecutor(max_workers=parse_workers)
+
+    main_pid = os.getpid()
+
+    def stop(signum: int, frame: Any) -> None:
+        if os.getpid() != main_pid:
+            # Forked parse workers inherit this handler; just exit
+            os._exit(0)
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    service = ScrapeService(
+        lambda urls: iter_scrape_results(urls, settings, context=context),
+        max_batch=int(settings.get("service_max_batch", 1000)),
+    )
+    try:
+        service.serve(address)
+    finally:
+        if context.parse_pool is not None:
+            context.parse_pool.shutdown()
+        context.close()
+
+def open_work_queue(queue_path: str, settings: Dict[str, Any]) -> WorkQueue:
+    return WorkQueue(
+        queue_path,
+        lease_seconds=float(settings.get("queue_lease_seconds", 300)),
+        max_attempts=int(settings.get("queue_max_attempts", 3)),
+    )
+
+def run_queue_worker(settings: Dict[str, Any], queue_path: str) -> int:
+    """
+    Lease batches from the work queue and scrape them until every job is
+    done or failed. Error records are handed back as retryable, so the
+    queue re-offers them until they run out of attempts.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    batch_size = max(1, int(settings.get("queue_batch_size", 10)))
+    poll_interval = float(settings.get("queue_poll_interval", 1.0))
+    workers = max(1, int(settings.get("concurrent_requests", 1)))
+    queue = open_work_queue(queue_path, settings)
+    context = ScrapeContext(settings)
+    processed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                jobs = queue.lease(worker_id, batch_size)
+                if not jobs:
+                    if queue.is_drained():
+                        break
+                    # Remaining jobs are leased by other workers; wait for
+                    # them to finish or for their leases to expire
+                    time.sleep(poll_interval)
+                    continue
+                records = list(executor.map(lambda job: scrape_one(job[1], context), jobs))
+                queue.complete(
+                    worker_id,
+                    [
+                        (job_id, serialize_record(record), record_status(record) == STATUS_ERROR)
+                        for (job_id, _), record in zip(jobs, records)
+                    ],
+                )
+                processed += len(jobs)
+                logging.info("Worker %s processed %d URLs", worker_id, processed)
+    finally:
+        context.close()
+        queue.close()
+    return processed
+
+def iter_queue_records(queue: WorkQueue) -> Iterator[Record]:
+    for url, status, result in queue.iter_results():
+        if result is not None:
+            yield json.loads(result)
+        else:
+            # Lease expired on every attempt without a result
+            yield build_error_record(url, f"Job {status} after its leases expired")
+
+def run_queue(
+    args: argparse.Namespace,
+    settings: Dict[str, Any],
+    queue_path: str,
+    urls: Optional[Iterator[str]],
+    output_file: str,
+) -> None:
+    """
+    Queue mode: enqueue the input URLs, run worker processes against the
+    shared SQLite queue, and export finished jobs in enqueue order. Each
+    step can also run on its own (--queue-role), so extra workers can join
+    from other shells or leave mid-run.
+    """
+    role = args.queue_role
+    with open_work_queue(queue_path, settings) as queue:
+        if urls is not None:
+            added = queue.enqueue(urls)
+            logging.info("Enqueued %d new URLs into %s (%s)", added, queue_path, queue.counts())
+            if args.retry_failed:
+                logging.info("Re-queued %d failed jobs", queue.requeue_failed())
+
+    if role in (QUEUE_ROLE_ALL, QUEUE_ROLE_WORKER):
+        count = max(0, int(settings.get("queue_workers", 2))) if role == QUEUE_ROLE_ALL else 0
+        if count == 0:
+            run_queue_worker(settings, queue_path)
+        else:
+            import multiprocessing
+
+            processes = [
+                multiprocessing.Process(target=run_queue_worker, args=(settings, queue_path), daemon=True)
+                for _ in range(count)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+    if role in (QUEUE_ROLE_ALL, QUEUE_ROLE_EXPORT):
+        with open_work_queue(queue_path, settings) as queue:
+            logging.info("Queue status: %s", queue.counts())
+            records = iter_queue_records(queue)
+            output_format = resolve_output_format(output_file, settings.get("output_format"))
+            if output_format == "jsonl":
+                with JsonlWriter(
+                    output_file,
+                    flush_every=int(settings.get("flush_every", 100)),
+                    fsync=bool(settings.get("fsync", True)),
+                ) as writer:
+                    for record in records:
+                        writer.write(record)
+                logging.info("Wrote %d records to %s", writer.count, output_file)
+            else:
+                write_output(records, output_file, output_format, int(settings.get("output_batch_size", 5000)))
+
 def main() -> None:
     config_path = os.path.join(CURRENT_DIR, "config", "settings.json")
     settings = load_settings(config_path)
 
     args = parse_args()
-    input_file = resolve_path_relative_to_root(args.input_file)
+    if args.concurrent_requests is not None:
+        settings["concurrent_requests"] = args.concurrent_requests
+    if args.parse_workers is not None:
+        settings["parse_workers"] = args.parse_workers
+    if args.parser_backend is not None:
+        settings["parser_backend"] = args.parser_backend
+    if args.structured_data is not None:
+        settings["structured_data"] = args.structured_data
+    if args.field_sources is not None:
+        settings["field_sources"] = args.field_sources
+    if args.compact_parse is not None:
+        settings["compact_parse"] = args.compact_parse
+    if args.report_parse_memory is not None:
+        settings["report_parse_memory"] = args.report_parse_memory
+    if args.fields is not None:
+        settings["fields"] = parse_field_list(args.fields)
+    if args.output_format is not None:
+        settings["output_format"] = args.output_format
+    if args.output_batch_size is not None:
+        settings["output_batch_size"] = args.output_batch_size
+    if args.adaptive_timeouts is not None:
+        settings["adaptive_timeouts"] = args.adaptive_timeouts
+    if args.hedge_requests is not None:
+        settings["hedge_requests"] = args.hedge_requests
+    if args.archive_path is not None:
+        settings["archive_path"] = args.archive_path
+    if args.http_cache_path is not None:
+        settings["http_cache_path"] = args.http_cache_path
+    if args.stream_fetch is not None:
+        settings["stream_fetch"] = args.stream_fetch
+    if args.max_body_mb is not None:
+        settings["max_body_mb"] = args.max_body_mb
+    if args.rate_limit_per_host is not None:
+        settings["rate_limit_per_host"] = args.rate_limit_per_host
+    if args.max_retries is not None:
+        settings["max_retries"] = args.max_retries
+    if args.incremental_state is not None:
+        settings["incremental_state"] = args.incremental_state
+    if args.alias_map is not None:
+        settings["alias_map"] = args.alias_map
+    if args.service_address is not None:
+        settings["service_address"] = args.service_address
+    if args.queue_path is not None:
+        settings["queue_path"] = args.queue_path
+    if args.queue_workers is not None:
+        settings["queue_workers"] = args.queue_workers
+    if args.metrics_path is not None:
+        settings["metrics_path"] = args.metrics_path
+    if args.metrics_interval is not None:
+        settings["metrics_interval"] = args.metrics_interval
+
     output_file = (
         resolve_path_relative_to_root(args.output_file)
         if args.output_file
@@ -189,17 +1168,98 @@ def main() -> None:
     )
 
     try:
-        urls = read_input_urls(input_file)
-    except FileNotFoundError as exc:
+        build_document("<html></html>", settings["parser_backend"])
+        if isinstance(settings.get("fields"), str):
+            # settings.json may spell the selection the way --fields does
+            settings["fields"] = parse_field_list(settings["fields"])
+        if settings.get("fields"):
+            settings["fields"] = list(select_fields(settings["fields"]))
+        if not settings.get("service_address"):
+            # Parquet and Arrow need pyarrow; find out before any page is fetched
+            check_output_format(resolve_output_format(output_file, settings.get("output_format")))
+    except (ImportError, ValueError) as exc:
         logging.error(str(exc))
         sys.exit(1)
+    if args.input_format is not None:
+        settings["input_format"] = args.input_format
+    if args.input_url_column is not None:
+        settings["input_url_column"] = args.input_url_column
+    if args.input_dedupe is not None:
+        settings["input_dedupe"] = args.input_dedupe
+    if args.shard is not None:
+        settings["shard"] = args.shard
+
+    input_files = [
+        path if path == STDIN_PATH else resolve_path_relative_to_root(path) for path in args.input_files
+    ]
+
+    service_address = settings.get("service_address")
+    if service_address:
+        with_metrics(settings, lambda: run_service(settings, str(service_address)))
+        return
+
+    queue_path = settings.get("queue_path")
+    if queue_path:
+        queue_path = resolve_path_relative_to_root(str(queue_path))
+        if settings.get("alias_map"):
+            logging.warning("The alias map is not used in queue mode; ignoring it")
+            settings["alias_map"] = None
+        if args.queue_role in (QUEUE_ROLE_WORKER, QUEUE_ROLE_EXPORT):
+            # These roles work off URLs already in the queue
+            with_metrics(settings, lambda: run_queue(args, settings, queue_path, None, output_file))
+            return
 
-    if not urls:
+    try:
+        shard = parse_shard_spec(str(settings["shard"])) if settings.get("shard") else None
+        # Every source is opened and checked before any worker starts
+        urls = peek_urls(
+            iter_input_urls(
+                input_files,
+                input_format=str(settings.get("input_format", "auto")),
+                url_column=str(settings.get("input_url_column", "url")),
+                dedupe=str(settings.get("input_dedupe", "bloom")),
+                dedupe_error_rate=float(settings.get("input_dedupe_error_rate", 1e-6)),
+                shard=shard,
+            )
+        )
+    except (FileNotFoundError, ImportError, ValueError) as exc:
+        logging.error(str(exc))
+        sys.exit(1)
+
+    if urls is None:
         logging.error("No URLs to process; exiting.")
         sys.exit(1)
 
-    results = scrape_urls(urls, settings)
-    write_output(results, output_file)
+    if shard is not None:
+        output_format = resolve_output_format(output_file, settings.get("output_format"))
+        if output_format not in SHARD_OUTPUT_FORMATS:
+            logging.error(
+                "Shard outputs must be %s to be merged, not %s", " or ".join(SHARD_OUTPUT_FORMATS), output_format
+            )
+            sys.exit(1)
+        logging.info("Processing shard %d of %d", shard[0], shard[1])
+        # Lets tools/merge_shards.py identify the shard and re-read the input
+        write_run_metadata(
+            output_file,
+            {
+                "shard": shard[0],
+                "num_shards": shard[1],
+                "output_format": output_format,
+                "inputs": input_files,
+                "input_format": settings.get("input_format", "auto"),
+                "input_url_column": settings.get("input_url_column", "url"),
+                "input_dedupe": settings.get("input_dedupe", "bloom"),
+                "input_dedupe_error_rate": float(settings.get("input_dedupe_error_rate", 1e-6)),
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+            },
+        )
+
+    if queue_path:
+        if settings.get("incremental_state"):
+            logging.warning("Incremental state is not tracked in queue mode; ignoring it")
+        with_metrics(settings, lambda: run_queue(args, settings, queue_path, urls, output_file))
+    else:
+        with_metrics(settings, lambda: run(args, settings, urls, output_file))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import zlib
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from extractors.url_tools import canonicalize_url  # type: ignore
+from pipelines.output_writers import Record, serialize_record  # type: ignore
+
+# Host prefixes that serve the same pages as the bare domain
+_HOST_PREFIXES = ("www.", "m.", "mobile.")
+_BIZ_PATH_RE = re.compile(r"^/biz/([^/]+)/?$")
+
+# Identity hints in a business page's <head>. The page body is left alone:
+# carousels there link (and embed the ids of) other businesses.
+_HEAD_END_RE = re.compile(r"</head\s*>", re.I)
+_LINK_RE = re.compile(r"<link\b[^>]*>", re.I)
+_META_RE = re.compile(r"<meta\b[^>]*>", re.I)
+_ATTR_RE = re.compile(r"""([a-zA-Z:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+def _bare_host(host: str) -> str:
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix) and "." in host[len(prefix) :]:
+            return host[len(prefix) :]
+    return host
+
+def business_key(url: str) -> str:
+    """
+    Key under which spellings of one business page meet. Business pages
+    (/biz/<slug>) key on the bare host and the slug alone, so search
+    (?osq=), review-highlight and tracking parameters and the mobile and
+    www hosts all collapse; anything else keys on its canonical URL.
+    """
+    try:
+        canonical = canonicalize_url(url)
+    except ValueError:
+        return url
+    parts = urlsplit(canonical)
+    match = _BIZ_PATH_RE.match(parts.path)
+    if match is None:
+        return canonical
+    return f"biz:{_bare_host(parts.netloc)}/{unquote(match.group(1)).lower()}"
+
+def _tag_attrs(tag: str) -> Dict[str, str]:
+    return {
+        name.lower(): value if value is not None else single
+        for name, value, single in (m.groups() for m in _ATTR_RE.finditer(tag))
+    }
+
+def page_identity(html: str) -> Tuple[Optional[str], Optional[str]]:
+    """(business id, canonical URL) declared in a page's <head>, where present."""
+    end = _HEAD_END_RE.search(html)
+    head = html[: end.start()] if end else html[:65536]
+    biz_id = canonical = None
+    for tag in _META_RE.findall(head):
+        attrs = _tag_attrs(tag)
+        if attrs.get("name", "").lower() == "yelp-biz-id" and attrs.get("content"):
+            biz_id = attrs["content"].strip()
+            break
+    for tag in _LINK_RE.findall(head):
+        attrs = _tag_attrs(tag)
+        if "canonical" in attrs.get("rel", "").lower().split() and attrs.get("href"):
+            canonical = attrs["href"].strip()
+            break
+    return biz_id, canonical
+
+class AliasMap:
+    """
+    Persistent map from URL keys (see business_key) to the business they
+    show, learned from responses: redirect targets, <link rel=canonical>
+    and the page's business id, so later runs know an alias before they
+    fetch it. Records scraped during a run are kept for that run only.
+    """
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS aliases (key TEXT PRIMARY KEY, business TEXT NOT NULL)")
+        self._conn.commit()
+        # Records only matter to the run that scraped them: they live in a
+        # private temporary database (spilled to disk, removed on close), so
+        # processes sharing the alias file never see each other's
+        self._records = sqlite3.connect("", check_same_thread=False)
+        self._records.execute(
+            """
+            CREATE TABLE run_records (
+                run TEXT NOT NULL,
+                business TEXT NOT NULL,
+                record BLOB NOT NULL,
+                PRIMARY KEY (run, business)
+            )
+            """
+        )
+
+    def resolve(self, url: str) -> str:
+        """The business `url` is known to show, else its own key."""
+        key = business_key(url)
+        with self._lock:
+            row = self._conn.execute("SELECT business FROM aliases WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else key
+
+    def learn(self, url: str, final_url: Optional[str], html: str) -> str:
+        """Record what a fetched page says about its identity; return the business."""
+        biz_id, canonical = page_identity(html)
+        keys = [business_key(url)]
+        for other in (final_url, canonical):
+            if other:
+                keys.append(business_key(other))
+        if biz_id:
+            business = f"id:{biz_id}"
+        elif canonical:
+            business = business_key(canonical)
+        else:
+            business = keys[-1]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO aliases (key, business) VALUES (?, ?)",
+                [(key, business) for key in set(keys) if key != business],
+            )
+            self._conn.commit()
+        return business
+
+    def begin_run(self) -> str:
+        return uuid.uuid4().hex
+
+    def store(self, run: str, business: str, record: Record) -> None:
+        blob = zlib.compress(serialize_record(record).encode("utf-8"), 6)
+        with self._lock:
+            self._records.execute(
+                "INSERT OR REPLACE INTO run_records (run, business, record) VALUES (?, ?, ?)",
+                (run, business, blob),
+            )
+
+    def has_record(self, run: str, business: str) -> bool:
+        with self._lock:
+            row = self._records.execute(
+                "SELECT 1 FROM run_records WHERE run = ? AND business = ?", (run, business)
+            ).fetchone()
+        return row is not None
+
+    def record_for(self, run: str, business: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._records.execute(
+                "SELECT record FROM run_records WHERE run = ? AND business = ?", (run, business)
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0]).decode("utf-8")) if row is not None else None
+
+    def end_run(self, run: str) -> None:
+        with self._lock:
+            self._records.execute("DELETE FROM run_records WHERE run = ?", (run,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._records.close()
+            self._conn.close()
+
+def iter_with_aliases(
+    urls: Iterable[str],
+    aliases: AliasMap,
+    scrape_stream: Callable[[Iterator[str]], Iterator[Record]],
+    scrape_single: Callable[[str], Record],
+    on_reuse: Optional[Callable[[str, Record], None]] = None,
+) -> Iterator[Record]:
+    """
+    Yield one record per URL, in input order, fetching each business once.
+    A URL whose business already has a record from this run, or is being
+    scraped by an earlier URL still in flight, is not handed to
+    `scrape_stream`; it gets a copy of that record with its own `url`.
+    If the earlier URL failed, the alias falls back to `scrape_single`.
+    """
+    run = aliases.begin_run()
+    # (url, business at the time it was read, fetched) in input order
+    slots: Deque[Tuple[str, str, bool]] = deque()
+    in_flight: Set[str] = set()
+    reused = 0
+
+    def fetch_urls() -> Iterator[str]:
+        for url in urls:
+            business = aliases.resolve(url)
+            if business in in_flight or aliases.has_record(run, business):
+                slots.append((url, business, False))
+                continue
+            in_flight.add(business)
+            slots.append((url, business, True))
+            yield url
+
+    def reuse(url: str, business: str) -> Record:
+        nonlocal reused
+        record = aliases.record_for(run, business)
+        if record is None:
+            # The URL that was scraped for this business failed
+            record = scrape_single(url)
+            if not record.get("error"):
+                aliases.store(run, business, record)
+            return record
+        reused += 1
+        record["url"] = url
+        # Nothing was fetched for this URL
+        record["fetchRetries"] = 0
+        record["throttledSeconds"] = 0.0
+        if on_reuse is not None:
+            on_reuse(url, record)
+        logging.debug("Reused the record of business %s for %s", business, url)
+        return record
+
+    try:
+        for record in scrape_stream(fetch_urls()):
+            while not slots[0][2]:
+                url, business, _ = slots.popleft()
+                yield reuse(url, business)
+            url, business, _ = slots.popleft()
+            in_flight.discard(business)
+            if not record.get("error"):
+                # Under what the page taught us as well as what its URL
+                # looked like, so aliases already read find it too
+                for key in {business, aliases.resolve(url)}:
+                    aliases.store(run, key, record)
+            yield record
+        while slots:
+            url, business, _ = slots.popleft()
+            yield reuse(url, business)
+    finally:
+        aliases.end_run(run)
+        if reused:
+            logging.info("Reused %d records for URLs of businesses already scraped", reused)
@@ -0,0 +1,81 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+STATUS_OK = "ok"
+STATUS_NOT_FOUND = "not_found"
+STATUS_ERROR = "error"
+
+_STATUSES = {STATUS_OK, STATUS_NOT_FOUND, STATUS_ERROR}
+
+def checkpoint_path_for(output_path: str) -> str:
+    return output_path + ".checkpoint"
+
+def record_status(record: Dict[str, Any]) -> str:
+    if record.get("error"):
+        return STATUS_ERROR
+    if record.get("is_page_not_found"):
+        return STATUS_NOT_FOUND
+    return STATUS_OK
+
+class Checkpoint:
+    """
+    Append-only index of completed URLs and their outcome.
+    Each line is "<status>\\t<url>"; later lines win, so a URL that is
+    retried successfully simply gets a newer entry. Marks are held in
+    memory and only written when the output they describe has been
+    flushed, so the index never claims a record that is not on disk yet.
+    With `fsync` off, flushes stop at the OS like the output writer's do.
+    """
+
+    def __init__(self, path: str, fsync: bool = True) -> None:
+        self.path = path
+        self.fsync = fsync
+        self.statuses: Dict[str, str] = {}
+        self._file: Optional[Any] = None
+        self._pending: List[str] = []
+
+    def load(self) -> "Checkpoint":
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                status, sep, url = line.rstrip("\n").partition("\t")
+                # Ignore a torn final line from an interrupted run
+                if sep and url and status in _STATUSES:
+                    self.statuses[url] = status
+        logging.info("Loaded %d checkpoint entries from %s", len(self.statuses), self.path)
+        return self
+
+    def is_done(self, url: str) -> bool:
+        return url in self.statuses
+
+    def failed_urls(self) -> Dict[str, str]:
+        return {url: status for url, status in self.statuses.items() if status == STATUS_ERROR}
+
+    def mark(self, url: str, status: str) -> None:
+        # Not written yet: the file's own buffer could reach disk before
+        # the output does
+        self._pending.append(f"{status}\t{url}\n")
+        self.statuses[url] = status
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(self._pending))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
@@ -1,11 +1,24 @@
-thonimport re
-from typing import Any, Dict, List
+import re
+from typing import Any, Callable, Dict, List
+
+from extractors.business_record import (  # type: ignore
+    KIND_REVIEW_COUNT,
+    KIND_TEXT,
+    KIND_TEXT_LIST,
+    KIND_TEXT_MAP,
+    KIND_VALUE,
+    RECORD_SCHEMA,
+    BusinessRecord,
+)
 
 def _clean_text(value: str) -> str:
-    # Normalize whitespace and strip ends
-    value = value.replace("\xa0", " ")
-    value = re.sub(r"\s+", " ", value)
-    return value.strip()
+    # Normalize whitespace and strip ends. Most extracted text is already
+    # normal: return it as is rather than splitting it into words. Every
+    # whitespace character but the plain space is unprintable.
+    if "  " not in value and value.isprintable() and value.strip() is value:
+        return value
+    # str.split() splits on the same whitespace set as \s, including \xa0
+    return " ".join(value.split())
 
 def _clean_string_or_none(value: Any) -> Any:
     if isinstance(value, str):
@@ -13,6 +26,89 @@ def _clean_string_or_none(value: Any) -> Any:
         return cleaned if cleaned else None
     return value
 
+def _clean_value(value: Any) -> Any:
+    # Same per-value rules as clean_business_record's generic walk
+    if value.__class__ is str:
+        return _clean_text(value) or None
+    if isinstance(value, str):
+        return _clean_string_or_none(value)
+    if isinstance(value, list):
+        return _clean_list(value)
+    if isinstance(value, dict):
+        return _clean_map(value)
+    return value
+
+def _clean_list(value: Any) -> Any:
+    if not isinstance(value, list):
+        return _clean_value(value)
+    # Keep the list itself when every item is already clean
+    for item in value:
+        if isinstance(item, dict) or (isinstance(item, str) and _clean_text(item) is not item):
+            break
+    else:
+        return value
+    new_list: List[Any] = []
+    for item in value:
+        if isinstance(item, str):
+            new_list.append(_clean_text(item))
+        elif isinstance(item, dict):
+            new_list.append(clean_business_record(item))
+        else:
+            new_list.append(item)
+    return new_list
+
+def _clean_map(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return _clean_value(value)
+    for item in value.values():
+        if isinstance(item, str) and (not item or _clean_text(item) is not item):
+            break
+    else:
+        return value
+    return {
+        key: _clean_string_or_none(item) if isinstance(item, str) else item
+        for key, item in value.items()
+    }
+
+_REVIEW_NUMBER = re.compile(r"([0-9,]+)")
+
+def _clean_review_count(value: Any) -> Any:
+    value = _clean_value(value)
+    if isinstance(value, str):
+        match = _REVIEW_NUMBER.search(value)
+        if match:
+            return f"{match.group(1).replace(',', '')} reviews"
+    return value
+
+_KIND_CLEANERS: Dict[str, Callable[[Any], Any]] = {
+    KIND_TEXT: _clean_value,
+    KIND_TEXT_LIST: _clean_list,
+    KIND_TEXT_MAP: _clean_map,
+    KIND_REVIEW_COUNT: _clean_review_count,
+    KIND_VALUE: _clean_value,
+}
+
+def _compile_clean_record() -> Callable[[BusinessRecord], BusinessRecord]:
+    # One straight-line assignment per schema field, generated once at import
+    namespace: Dict[str, Any] = {}
+    lines = ["def clean_record(record):"]
+    for name, kind in RECORD_SCHEMA:
+        namespace["_clean_" + name] = _KIND_CLEANERS[kind]
+        lines.append(f"    record.{name} = _clean_{name}(record.{name})")
+    lines.append("    return record")
+    exec("\n".join(lines), namespace)
+    return namespace["clean_record"]
+
+_clean_record = _compile_clean_record()
+
+def clean_record(record: BusinessRecord) -> BusinessRecord:
+    """
+    Clean a BusinessRecord in place with the per-field cleaners compiled
+    from RECORD_SCHEMA. Produces the same values as clean_business_record
+    on the equivalent dict.
+    """
+    return _clean_record(record)
+
 def clean_business_record(record: Dict[str, Any]) -> Dict[str, Any]:
     """
     Perform light normalization of a business record.
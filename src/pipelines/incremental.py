@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from extractors.url_tools import canonicalize_url  # type: ignore
+from pipelines.output_writers import JsonlWriter, Record, serialize_record  # type: ignore
+
+CHANGE_ADDED = "added"
+CHANGE_CHANGED = "changed"
+CHANGE_REMOVED = "removed"
+
+# Per-request noise that says nothing about the business: executable
+# scripts (JSON data blocks are kept), styles, comments, CSP nonces
+_NOISE_RE = re.compile(
+    r"<script\b(?![^>]*application/(?:ld\+)?json)[^>]*>.*?</script\s*>"
+    r"|<style\b[^>]*>.*?</style\s*>"
+    r"|<!--.*?-->"
+    r"|\snonce=\"[^\"]*\"",
+    re.I | re.S,
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Fields that change on every crawl without the business changing
+_VOLATILE_FIELDS = ("timestamp", "fetchRetries", "throttledSeconds")
+
+def delta_path_for(output_path: str) -> str:
+    """The delta file sits next to the full snapshot."""
+    return output_path + ".delta.jsonl"
+
+def _state_key(url: str) -> str:
+    try:
+        return canonicalize_url(url)
+    except ValueError:
+        return url
+
+def page_fingerprint(html: str, options_key: str = "") -> str:
+    """Hash of a page with per-request noise removed, salted with the parse options."""
+    normalized = _WHITESPACE_RE.sub(" ", _NOISE_RE.sub("", html)).strip()
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(options_key.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+def record_fingerprint(record: Dict[str, Any]) -> str:
+    stable = {key: value for key, value in record.items() if key not in _VOLATILE_FIELDS}
+    return hashlib.blake2b(
+        json.dumps(stable, sort_keys=True, ensure_ascii=False).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+class IncrementalTracker:
+    """
+    State of earlier runs, kept in a SQLite file keyed by canonical URL:
+    the page fingerprint, the record fingerprint and the record itself.
+    An unchanged page is answered from the stored record without parsing;
+    every added, changed or removed business is written to a delta JSON
+    Lines file. Delta lines are fsynced before the state that records them
+    is committed, so a crash can repeat a change but never lose one; a
+    resumed run (`append`) adds to the delta instead of replacing it.
+    """
+
+    def __init__(self, state_path: str, delta_path: str, options_key: str = "", append: bool = False) -> None:
+        directory = os.path.dirname(state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.options_key = options_key
+        self.run_id = time.time()
+        self.counts = {CHANGE_ADDED: 0, CHANGE_CHANGED: 0, CHANGE_REMOVED: 0, "unchanged": 0, "reused": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(state_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                page_hash TEXT,
+                record_hash TEXT,
+                record BLOB,
+                live INTEGER NOT NULL,
+                seen_run REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        # Flushed by _commit_locked, ahead of the state commit
+        self._delta = JsonlWriter(delta_path, flush_every=1 << 30, fsync=True, append=append)
+        self._delta_pending = False
+
+    def lookup(self, url: str, html: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Fingerprint a fetched page; also return the stored record when the
+        page is unchanged since it was last parsed.
+        """
+        page_hash = page_fingerprint(html, self.options_key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_hash, record FROM pages WHERE key = ? AND live = 1", (_state_key(url),)
+            ).fetchone()
+        if row is None or row[0] != page_hash or row[1] is None:
+            return page_hash, None
+        return page_hash, json.loads(zlib.decompress(row[1]).decode("utf-8"))
+
+    def observe(self, url: str, page_hash: Optional[str], record: Record, reused: bool) -> None:
+        """Compare a finished record with the stored state, update it and emit the delta."""
+        key = _state_key(url)
+        with self._lock:
+            if reused:
+                self.counts["reused"] += 1
+                self._touch_locked(key)
+                return
+            if record.get("error"):
+                # Transient failures neither change nor remove a business
+                self._touch_locked(key)
+                return
+
+            row = self._conn.execute("SELECT record_hash, live, record FROM pages WHERE key = ?", (key,)).fetchone()
+            was_live = row is not None and row[1] == 1
+
+            if record.get("is_page_not_found"):
+                if was_live:
+                    previous = json.loads(zlib.decompress(row[2]).decode("utf-8"))
+                    self._emit_locked(CHANGE_REMOVED, url, previous)
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO pages (key, url, page_hash, record_hash, record, live, seen_run)
+                    VALUES (?, ?, NULL, NULL, NULL, 0, ?)
+                    """,
+                    (key, url, self.run_id),
+                )
+                self._commit_locked()
+                return
+
+            data = record.to_dict() if hasattr(record, "to_dict") else dict(record)
+            record_hash = record_fingerprint(data)
+            if not was_live:
+                self._emit_locked(CHANGE_ADDED, url, data)
+            elif row[0] != record_hash:
+                self._emit_locked(CHANGE_CHANGED, url, data)
+            else:
+                self.counts["unchanged"] += 1
+            blob = zlib.compress(serialize_record(record).encode("utf-8"), 6)
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO pages (key, url, page_hash, record_hash, record, live, seen_run)
+                VALUES (?, ?, ?, ?, ?, 1, ?)
+                """,
+                (key, url, page_hash, record_hash, blob, self.run_id),
+            )
+            self._commit_locked()
+
+    def _touch_locked(self, key: str) -> None:
+        self._conn.execute("UPDATE pages SET seen_run = ? WHERE key = ?", (self.run_id, key))
+        self._conn.commit()
+
+    def _emit_locked(self, change: str, url: str, record: Optional[Dict[str, Any]]) -> None:
+        self.counts[change] += 1
+        self._delta.write({"change": change, "url": url, "record": record})
+        self._delta_pending = True
+
+    def _commit_locked(self) -> None:
+        # Once committed, a change is never detected again: its delta line
+        # has to be on disk first
+        if self._delta_pending:
+            self._delta.flush()
+            self._delta_pending = False
+        self._conn.commit()
+
+    def finish(self, detect_removed: bool = True) -> Dict[str, int]:
+        """
+        Report live businesses this run never saw as removed (only
+        meaningful when the run covered the whole input), then close.
+        """
+        with self._lock:
+            if detect_removed:
+                rows = self._conn.execute(
+                    "SELECT key, url, record FROM pages WHERE live = 1 AND seen_run < ?", (self.run_id,)
+                ).fetchall()
+                for key, url, blob in rows:
+                    self._emit_locked(CHANGE_REMOVED, url, json.loads(zlib.decompress(blob).decode("utf-8")))
+                    self._conn.execute("UPDATE pages SET live = 0 WHERE key = ?", (key,))
+                self._commit_locked()
+            self._delta.close()
+            self._conn.close()
+        logging.info(
+            "Incremental: %d added, %d changed, %d removed, %d unchanged (%d not re-parsed)",
+            self.counts[CHANGE_ADDED],
+            self.counts[CHANGE_CHANGED],
+            self.counts[CHANGE_REMOVED],
+            self.counts["unchanged"] + self.counts["reused"],
+            self.counts["reused"],
+        )
+        return self.counts
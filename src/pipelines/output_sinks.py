@@ -0,0 +1,310 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from extractors.business_record import (  # type: ignore
+    KIND_TEXT_LIST,
+    KIND_TEXT_MAP,
+    KIND_VALUE,
+    OPTIONAL_FIELDS,
+    RECORD_SCHEMA,
+)
+from pipelines.output_writers import JsonlWriter, Record, write_json_array  # type: ignore
+
+OUTPUT_FORMATS = ("json", "jsonl", "csv", "parquet", "arrow", "sqlite")
+
+# Longest suffixes first so .jsonl.gz is not taken for .gz
+_FORMAT_BY_SUFFIX = (
+    (".jsonl.gz", "jsonl"),
+    (".jsonl", "jsonl"),
+    (".csv.gz", "csv"),
+    (".csv", "csv"),
+    (".parquet", "parquet"),
+    (".arrow", "arrow"),
+    (".feather", "arrow"),
+    (".sqlite3", "sqlite"),
+    (".sqlite", "sqlite"),
+    (".db", "sqlite"),
+)
+
+HOURS_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+_INT_FIELDS = ("fetchRetries",)
+_FLOAT_FIELDS = ("throttledSeconds",)
+_MAP_FIELDS = frozenset(name for name, kind in RECORD_SCHEMA if kind == KIND_TEXT_MAP) | {"fieldSources"}
+_LIST_FIELDS = frozenset(name for name, kind in RECORD_SCHEMA if kind == KIND_TEXT_LIST)
+_BOOL_FIELDS = frozenset(name for name, kind in RECORD_SCHEMA if kind == KIND_VALUE)
+_FIELD_NAMES: Tuple[str, ...] = tuple(name for name, _ in RECORD_SCHEMA) + OPTIONAL_FIELDS
+
+def detect_output_format(path: str) -> Optional[str]:
+    """Format implied by the output file extension, or None (.json and unknown ones)."""
+    lowered = path.lower()
+    for suffix, fmt in _FORMAT_BY_SUFFIX:
+        if lowered.endswith(suffix):
+            return fmt
+    return None
+
+def _as_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+class RecordSink(ABC):
+    """
+    Base for table-shaped outputs. Records are converted to rows as they
+    arrive and handed to the subclass in batches of `batch_size` (a row
+    group, a transaction), so memory stays bounded by one batch. Output
+    goes to a temporary file that replaces `path` only when the sink is
+    closed without an error, and is deleted otherwise.
+    """
+
+    def __init__(self, path: str, batch_size: int = 5000) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+        self._batch: List[Any] = []
+
+    def write(self, record: Record) -> None:
+        self._batch.append(self.to_row(record))
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+
+    def _flush_batch(self) -> None:
+        if self._batch:
+            self.write_batch(self._batch)
+            self._batch = []
+
+    @abstractmethod
+    def to_row(self, record: Record) -> Any: ...
+
+    @abstractmethod
+    def write_batch(self, rows: List[Any]) -> None: ...
+
+    @abstractmethod
+    def finish(self) -> None: ...
+
+    def close(self, success: bool = True) -> None:
+        if success:
+            self._flush_batch()
+        self.finish()
+        if success:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            # Leave any previous output in place, without a partial file beside it
+            os.remove(self.tmp_path)
+
+    def __enter__(self) -> "RecordSink":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.close(success=exc_type is None)
+
+def csv_columns() -> List[str]:
+    """Flat CSV header: one column per field, with hours split into one per day."""
+    columns: List[str] = []
+    for name in _FIELD_NAMES:
+        if name == "hours":
+            columns.extend(f"hours_{day}" for day in HOURS_DAYS)
+        else:
+            columns.append(name)
+    return columns
+
+class CsvSink(RecordSink):
+    """
+    Flattened CSV: lists are joined with newlines, hours get a column per
+    day and the other maps are written as JSON objects. Paths ending in
+    .gz are gzip compressed.
+    """
+
+    def __init__(self, path: str, batch_size: int = 5000) -> None:
+        super().__init__(path, batch_size)
+        if path.endswith(".gz"):
+            self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8", newline="")
+        else:
+            self._file = open(self.tmp_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(csv_columns())
+
+    def to_row(self, record: Record) -> List[Any]:
+        row: List[Any] = []
+        for name in _FIELD_NAMES:
+            value = record.get(name)
+            if name == "hours":
+                hours = value if isinstance(value, dict) else {}
+                row.extend(hours.get(day) for day in HOURS_DAYS)
+            elif name in _LIST_FIELDS:
+                row.append("\n".join(str(item) for item in value) if isinstance(value, list) else value)
+            elif name in _MAP_FIELDS:
+                row.append(json.dumps(value, ensure_ascii=False) if value is not None else None)
+            else:
+                row.append(value)
+        return row
+
+    def write_batch(self, rows: List[Any]) -> None:
+        self._writer.writerows(rows)
+
+    def finish(self) -> None:
+        self._file.close()
+
+def _sqlite_type(name: str) -> str:
+    if name in _BOOL_FIELDS or name in _INT_FIELDS:
+        return "INTEGER"
+    if name in _FLOAT_FIELDS:
+        return "REAL"
+    return "TEXT"
+
+class SqliteSink(RecordSink):
+    """
+    One `businesses` table with a column per field; lists and maps are
+    stored as JSON text (query them with json_extract). Each batch is
+    inserted with executemany inside a single transaction.
+    """
+
+    TABLE = "businesses"
+
+    def __init__(self, path: str, batch_size: int = 5000) -> None:
+        super().__init__(path, batch_size)
+        self._conn = sqlite3.connect(self.tmp_path)
+        # A fresh file that only becomes visible once complete; no journal needed
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        columns = ", ".join(f'"{name}" {_sqlite_type(name)}' for name in _FIELD_NAMES)
+        self._conn.execute(f"CREATE TABLE {self.TABLE} (id INTEGER PRIMARY KEY, {columns})")
+        placeholders = ", ".join("?" for _ in _FIELD_NAMES)
+        quoted = ", ".join(f'"{name}"' for name in _FIELD_NAMES)
+        self._insert = f"INSERT INTO {self.TABLE} ({quoted}) VALUES ({placeholders})"
+
+    def to_row(self, record: Record) -> Tuple[Any, ...]:
+        row: List[Any] = []
+        for name in _FIELD_NAMES:
+            value = record.get(name)
+            if name in _LIST_FIELDS or name in _MAP_FIELDS:
+                row.append(json.dumps(value, ensure_ascii=False) if value is not None else None)
+            elif name in _BOOL_FIELDS:
+                row.append(None if value is None else int(bool(value)))
+            elif name in _INT_FIELDS or name in _FLOAT_FIELDS:
+                row.append(value)
+            else:
+                row.append(_as_text(value))
+        return tuple(row)
+
+    def write_batch(self, rows: List[Any]) -> None:
+        with self._conn:
+            self._conn.executemany(self._insert, rows)
+
+    def finish(self) -> None:
+        self._conn.execute(f'CREATE INDEX {self.TABLE}_url ON {self.TABLE} ("url")')
+        self._conn.commit()
+        self._conn.close()
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow  # type: ignore
+    except ImportError as exc:
+        raise ImportError("Parquet and Arrow output require the 'pyarrow' package (pip install pyarrow)") from exc
+    return pyarrow
+
+def check_output_format(output_format: str) -> None:
+    """Fail early when a format is unknown or its optional dependency is missing."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}; choose from {', '.join(OUTPUT_FORMATS)}")
+    if output_format in ("parquet", "arrow"):
+        _import_pyarrow()
+
+def arrow_schema(pa: Any) -> Any:
+    """Typed Arrow schema: lists and maps stay nested instead of becoming JSON text."""
+    fields = []
+    for name in _FIELD_NAMES:
+        if name in _LIST_FIELDS:
+            arrow_type = pa.list_(pa.string())
+        elif name == "businessServices":
+            arrow_type = pa.map_(pa.string(), pa.bool_())
+        elif name in _MAP_FIELDS:
+            arrow_type = pa.map_(pa.string(), pa.string())
+        elif name in _BOOL_FIELDS:
+            arrow_type = pa.bool_()
+        elif name in _INT_FIELDS:
+            arrow_type = pa.int64()
+        elif name in _FLOAT_FIELDS:
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+class ArrowSink(RecordSink):
+    """
+    Parquet (one row group per batch) or Arrow IPC file (one record batch
+    per batch), with `images`/`reviewhighlights` as list<string> and
+    `hours`/`businessServices`/`fieldSources` as map columns.
+    """
+
+    def __init__(self, path: str, batch_size: int = 5000, file_format: str = "parquet") -> None:
+        self._pa = _import_pyarrow()
+        super().__init__(path, batch_size)
+        self.schema = arrow_schema(self._pa)
+        if file_format == "parquet":
+            import pyarrow.parquet as pq  # type: ignore
+
+            self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        else:
+            self._writer = self._pa.ipc.new_file(self.tmp_path, self.schema)
+
+    def to_row(self, record: Record) -> Dict[str, Any]:
+        row: Dict[str, Any] = {}
+        for name in _FIELD_NAMES:
+            value = record.get(name)
+            if name in _LIST_FIELDS:
+                value = [_as_text(item) for item in value] if isinstance(value, list) else None
+            elif name == "businessServices":
+                value = [(key, bool(item)) for key, item in value.items()] if isinstance(value, dict) else None
+            elif name in _MAP_FIELDS:
+                value = [(key, _as_text(item)) for key, item in value.items()] if isinstance(value, dict) else None
+            elif name in _BOOL_FIELDS:
+                value = None if value is None else bool(value)
+            elif name not in _INT_FIELDS and name not in _FLOAT_FIELDS:
+                value = _as_text(value)
+            row[name] = value
+        return row
+
+    def write_batch(self, rows: List[Any]) -> None:
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self.schema))
+
+    def finish(self) -> None:
+        self._writer.close()
+
+def open_sink(path: str, output_format: str, batch_size: int = 5000) -> RecordSink:
+    if output_format == "csv":
+        return CsvSink(path, batch_size)
+    if output_format == "sqlite":
+        return SqliteSink(path, batch_size)
+    if output_format in ("parquet", "arrow"):
+        return ArrowSink(path, batch_size, file_format=output_format)
+    raise ValueError(f"No record sink for output format {output_format!r}; choose from {', '.join(OUTPUT_FORMATS)}")
+
+def write_records(records: Iterable[Record], path: str, output_format: str, batch_size: int = 5000) -> int:
+    """Stream records into a file of any output format; returns the record count."""
+    if output_format == "json":
+        return write_json_array(records, path)
+    if output_format == "jsonl":
+        with JsonlWriter(path, flush_every=batch_size, fsync=False) as writer:
+            for record in records:
+                writer.write(record)
+        return writer.count
+    with open_sink(path, output_format, batch_size) as sink:
+        for record in records:
+            sink.write(record)
+    logging.debug("Wrote %d %s rows to %s", sink.count, output_format, path)
+    return sink.count
@@ -0,0 +1,305 @@
+import gzip
+import json
+import logging
+import os
+import re
+import zlib
+from typing import IO, Any, Callable, Collection, Dict, Iterable, Iterator, Optional, Union
+
+from extractors.business_record import BusinessRecord  # type: ignore
+
+Record = Union[BusinessRecord, Dict[str, Any]]
+
+# Insignificant whitespace between JSON tokens
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+def is_jsonl_path(path: str) -> bool:
+    return path.endswith(".jsonl") or path.endswith(".jsonl.gz")
+
+def serialize_record(record: Record, indent: Optional[int] = None) -> str:
+    # BusinessRecords write themselves without an intermediate dict
+    if isinstance(record, BusinessRecord):
+        return record.to_json(indent=indent)
+    return json.dumps(record, indent=indent, ensure_ascii=False)
+
+def _open_text(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+def _truncate_after_last_newline(path: str, chunk_size: int = 65536) -> int:
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                keep = start + newline + 1
+                break
+            end = start
+        else:
+            keep = 0
+        if keep < size:
+            f.truncate(keep)
+            os.fsync(f.fileno())
+        return size - keep
+
+def _rewrite_gzip_complete_lines(path: str) -> bool:
+    tmp_path = path + ".tmp"
+    clean = True
+    with gzip.open(path, "rb") as src, open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+            try:
+                for line in src:
+                    if not line.endswith(b"\n"):
+                        clean = False
+                        break
+                    dst.write(line)
+            except (EOFError, OSError, zlib.error):
+                # Decodable up to the last sync flush of an interrupted run
+                clean = False
+        raw.flush()
+        os.fsync(raw.fileno())
+    if clean:
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+def repair_jsonl_tail(path: str) -> bool:
+    """
+    Cut a JSON Lines file back to its last complete line before it is
+    appended to, so a record torn by a crash is dropped rather than merged
+    with the next one. A gzip file is rewritten up to the last line that
+    decodes. Returns whether anything was cut.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    if path.endswith(".gz"):
+        repaired = _rewrite_gzip_complete_lines(path)
+    else:
+        repaired = _truncate_after_last_newline(path) > 0
+    if repaired:
+        logging.warning("Cut %s back to its last complete line before appending", path)
+    return repaired
+
+class JsonlWriter:
+    """
+    Append cleaned records to a JSON Lines file as they are produced.
+    The stream is flushed (and fsynced, if enabled) every `flush_every`
+    records and on close, so a crash loses at most one batch. Paths ending
+    in .gz are written as a gzip stream.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = 100,
+        fsync: bool = True,
+        append: bool = False,
+        on_flush: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self.on_flush = on_flush
+        self.count = 0
+        self._pending = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if append:
+            # Appending after a torn line would glue the next record onto it
+            repair_jsonl_tail(path)
+        mode = "a" if append else "w"
+        self._raw: Optional[IO[bytes]] = None
+        if path.endswith(".gz"):
+            # Keep a handle on the underlying file so it can be fsynced;
+            # appending starts a new gzip member, which readers concatenate.
+            self._raw = open(path, mode + "b")
+            self._gzip = gzip.GzipFile(fileobj=self._raw, mode=mode + "b")
+            self._file: Any = self._gzip
+        else:
+            self._file = open(path, mode, encoding="utf-8")
+
+    def write(self, record: Record) -> None:
+        line = serialize_record(record) + "\n"
+        if self._raw is not None:
+            self._file.write(line.encode("utf-8"))
+        else:
+            self._file.write(line)
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._raw is not None:
+            # Z_SYNC_FLUSH makes everything written so far decodable
+            self._gzip.flush()
+            self._raw.flush()
+            fileno = self._raw.fileno()
+        else:
+            self._file.flush()
+            fileno = self._file.fileno()
+        if self.fsync:
+            os.fsync(fileno)
+        self._pending = 0
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        if self._raw is not None:
+            self._raw.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    line_no = 0
+    with _open_text(path, "r") as f:
+        try:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated final line
+                    logging.warning("Skipping unreadable line %d in %s", line_no, path)
+        except EOFError:
+            # Gzip stream of an interrupted run: everything up to the last
+            # sync flush is still readable
+            logging.warning("Truncated gzip stream in %s after line %d", path, line_no)
+
+def iter_json_array(path: str, chunk_size: int = 65536) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the objects of a JSON array file one at a time, holding only the
+    current chunk and record in memory rather than the whole array.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        expect = "["
+        while True:
+            # Next significant character, reading on as needed
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    raise ValueError(f"Truncated JSON array in {path}")
+                continue
+            char = buf[pos]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError(f"{path} does not hold a JSON array")
+                pos += 1
+                expect = "item or ]"
+            elif char == "]" and expect != "item":
+                return
+            elif expect == ", or ]":
+                if char != ",":
+                    raise ValueError(f"Malformed JSON array in {path}")
+                pos += 1
+                expect = "item"
+            else:
+                while True:
+                    try:
+                        record, pos = decoder.raw_decode(buf, pos)
+                        break
+                    except json.JSONDecodeError:
+                        # The record runs past the chunk: read more of it
+                        chunk = f.read(chunk_size)
+                        if not chunk:
+                            raise
+                        buf, pos = buf[pos:] + chunk, 0
+                yield record
+                expect = ", or ]"
+
+def iter_output_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Read records back from either output format."""
+    if is_jsonl_path(path):
+        yield from iter_jsonl(path)
+        return
+    yield from iter_json_array(path)
+
+def metadata_path_for(output_path: str) -> str:
+    return output_path + ".meta.json"
+
+def write_run_metadata(output_path: str, metadata: Dict[str, Any]) -> None:
+    path = metadata_path_for(output_path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=4)
+    os.replace(tmp_path, path)
+
+def read_run_metadata(output_path: str) -> Optional[Dict[str, Any]]:
+    path = metadata_path_for(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def drop_records(jsonl_path: str, urls: Collection[str]) -> int:
+    """
+    Rewrite a JSON Lines file without the records for `urls`, e.g. the
+    error records of URLs that are about to be retried.
+    """
+    if not urls or not os.path.exists(jsonl_path):
+        return 0
+
+    tmp_path = jsonl_path + ".tmp" + (".gz" if jsonl_path.endswith(".gz") else "")
+    dropped = 0
+    with JsonlWriter(tmp_path, flush_every=1000) as writer:
+        for record in iter_jsonl(jsonl_path):
+            if record.get("url") in urls:
+                dropped += 1
+                continue
+            writer.write(record)
+    os.replace(tmp_path, jsonl_path)
+    logging.info("Dropped %d records from %s", dropped, jsonl_path)
+    return dropped
+
+def write_json_array(records: Iterable[Record], output_path: str) -> int:
+    """
+    Stream records into an indented JSON array, formatted exactly like
+    json.dump(records, indent=4), without holding them all in memory.
+    The array is written to a temporary file and moved into place when
+    complete, so an interrupted run never leaves a truncated array behind.
+    """
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = output_path + ".tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            body = serialize_record(record, indent=4)
+            f.write("[\n    " if count == 0 else ",\n    ")
+            f.write(body.replace("\n", "\n    "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    os.replace(tmp_path, output_path)
+    return count
+
+def convert_jsonl_to_json(jsonl_path: str, output_path: str) -> int:
+    count = write_json_array(iter_jsonl(jsonl_path), output_path)
+    logging.info("Converted %d records from %s to %s", count, jsonl_path, output_path)
+    return count
@@ -0,0 +1,165 @@
+import logging
+import time
+import tracemalloc
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from extractors.business_record import BusinessRecord  # type: ignore
+from extractors.field_mapper import map_raw_to_record  # type: ignore
+from extractors.rate_limiter import RETRY_STATUSES  # type: ignore
+from extractors.utils_metrics import enable_metrics, get_registry  # type: ignore
+from extractors.utils_time import current_timestamp  # type: ignore
+from extractors.yelp_parser import detect_page_not_found, parse_business_page  # type: ignore
+from pipelines.data_cleaner import clean_record  # type: ignore
+from pipelines.output_writers import Record  # type: ignore
+
+class FetchedPage:
+    """Output of the fetch stage: everything the parse stage needs, and nothing live."""
+
+    __slots__ = ("url", "html", "status_code", "fetch_stats", "page_hash", "previous_record")
+
+    def __init__(
+        self,
+        url: str,
+        html: Optional[str],
+        status_code: int,
+        fetch_stats: Optional[Dict[str, Any]] = None,
+        page_hash: Optional[str] = None,
+        previous_record: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.fetch_stats = fetch_stats or {"retries": 0, "throttledSeconds": 0.0}
+        # Set by incremental runs; a previous record means the page is
+        # unchanged and is not parsed again
+        self.page_hash = page_hash
+        self.previous_record = previous_record
+
+class ParseOptions:
+    __slots__ = ("parser_backend", "structured_data", "field_sources", "fields", "compact_parse", "report_memory")
+
+    def __init__(
+        self,
+        parser_backend: str = "html.parser",
+        structured_data: bool = True,
+        field_sources: bool = False,
+        fields: Optional[Sequence[str]] = None,
+        compact_parse: bool = False,
+        report_memory: bool = False,
+    ) -> None:
+        self.parser_backend = parser_backend
+        self.structured_data = structured_data
+        self.field_sources = field_sources
+        # None extracts every field; unselected fields keep their mapper defaults
+        self.fields = tuple(fields) if fields is not None else None
+        self.compact_parse = compact_parse
+        self.report_memory = report_memory
+
+    def cache_key(self) -> str:
+        """Identifies options that change what a page parses to."""
+        # compact_parse and report_memory are left out: neither changes the output
+        fields = ",".join(self.fields) if self.fields is not None else "*"
+        return f"{self.parser_backend}|{int(self.structured_data)}|{int(self.field_sources)}|{fields}"
+
+def build_error_record(url: str, error: Any) -> BusinessRecord:
+    # Still produce a record that describes the failure
+    record = map_raw_to_record({}, url, current_timestamp(), True)
+    record["error"] = str(error)
+    return record
+
+def log_parse_memory(url: str, memory: Dict[str, Optional[int]]) -> None:
+    if not memory["domChars"]:
+        logging.info("Parse memory for %s: no DOM built (structured data covered every field)", url)
+        return
+    logging.info(
+        "Parse memory for %s: peak %.1f KiB; %d of %d page characters parsed into the tree",
+        url,
+        (memory["peakBytes"] or 0) / 1024,
+        memory["domChars"],
+        memory["pageChars"],
+    )
+
+def build_record(page: FetchedPage, options: ParseOptions) -> Record:
+    """
+    Run detect -> parse -> map -> clean for one fetched page.
+    Pure CPU work with picklable inputs and output, so it can run in a
+    worker process as well as inline.
+    """
+    url = page.url
+    if page.previous_record is not None:
+        # Unchanged since the last incremental run: reuse its cleaned record
+        record: Record = dict(page.previous_record)
+        # Stored under the canonical URL; report the spelling asked for now
+        record["url"] = url
+        record["timestamp"] = current_timestamp()
+        record["fetchRetries"] = page.fetch_stats["retries"]
+        record["throttledSeconds"] = page.fetch_stats["throttledSeconds"]
+        return record
+
+    registry = get_registry()
+    sources: Dict[str, Optional[str]] = {}
+    try:
+        if page.html is None and (page.status_code == 0 or page.status_code in RETRY_STATUSES):
+            # Transport failures and throttling are not answers about the
+            # page; record them as errors so --retry-failed picks them up.
+            record = build_error_record(url, f"Fetch failed with status {page.status_code}")
+        else:
+            is_not_found = detect_page_not_found(page.html, page.status_code)
+
+            if is_not_found or not page.html:
+                logging.warning("Page not found or empty HTML for URL: %s", url)
+                raw_data: Dict[str, Any] = {}
+            else:
+                memory: Optional[Dict[str, Optional[int]]] = None
+                if options.report_memory:
+                    memory = {}
+                    if not tracemalloc.is_tracing():
+                        # Started in whichever process parses, workers included
+                        tracemalloc.start()
+                started = time.perf_counter()
+                raw_data = parse_business_page(
+                    page.html,
+                    backend=options.parser_backend,
+                    structured_data=options.structured_data,
+                    sources=sources,
+                    fields=options.fields,
+                    compact=options.compact_parse,
+                    memory=memory,
+                )
+                if registry is not None:
+                    registry.observe("parse", time.perf_counter() - started)
+                if memory is not None:
+                    log_parse_memory(url, memory)
+
+            timestamp = current_timestamp()
+            started = time.perf_counter()
+            mapped = map_raw_to_record(
+                raw_data=raw_data,
+                url=url,
+                timestamp=timestamp,
+                is_page_not_found=is_not_found,
+            )
+            if registry is not None:
+                registry.observe("map", time.perf_counter() - started)
+                started = time.perf_counter()
+            record = clean_record(mapped)
+            if registry is not None:
+                registry.observe("clean", time.perf_counter() - started)
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Unexpected error while scraping %s: %s", url, exc)
+        record = build_error_record(url, exc)
+
+    record["fetchRetries"] = page.fetch_stats["retries"]
+    record["throttledSeconds"] = page.fetch_stats["throttledSeconds"]
+    if options.field_sources:
+        record["fieldSources"] = sources
+    return record
+
+def build_record_measured(page: FetchedPage, options: ParseOptions) -> Tuple[Record, Dict[str, Any]]:
+    """
+    build_record for worker processes: timings are collected in a fresh
+    per-call registry and returned with the record for the parent to merge.
+    """
+    registry = enable_metrics(fresh=True)
+    record = build_record(page, options)
+    return record, registry.drain()
@@ -0,0 +1,75 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Sequence, Tuple
+
+from extractors.html_archive import HtmlArchive, decode_member  # type: ignore
+from pipelines.output_writers import Record  # type: ignore
+from pipelines.parse_stage import FetchedPage, ParseOptions, build_record  # type: ignore
+
+# (url, offset, length) of one archived response
+Entry = Tuple[str, int, int]
+
+def _fetch_timestamp(fetched_at: float) -> str:
+    # Same format as utils_time.current_timestamp, but for the fetch time
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(fetched_at))
+
+def replay_entries(archive_path: str, entries: Sequence[Entry], options: ParseOptions) -> List[Record]:
+    """
+    Run detect -> parse -> map -> clean over a batch of archived responses.
+    Workers read the archive themselves, so only offsets cross the process
+    boundary on the way in.
+    """
+    records: List[Record] = []
+    with open(archive_path, "rb") as f:
+        for url, offset, length in entries:
+            f.seek(offset)
+            response = decode_member(f.read(length))
+            if not response.complete and response.status != 404:
+                # Stopped early or cut at the size cap when it was fetched
+                # (a 404 body is skipped on purpose)
+                logging.warning("Archived body of %s is incomplete; its record may miss fields", url)
+            record = build_record(FetchedPage(url, response.body, response.status), options)
+            record["timestamp"] = _fetch_timestamp(response.fetched_at)
+            records.append(record)
+    return records
+
+def iter_replayed_records(
+    archive_path: str,
+    options: ParseOptions,
+    workers: int = 0,
+    latest_only: bool = True,
+    batch_size: int = 64,
+) -> Iterator[Record]:
+    """
+    Re-extract records from an archive without touching the network, in
+    archive order. With `workers` > 0 batches are parsed on a process pool
+    with a bounded window of in-flight batches; 0 parses inline.
+    """
+    with HtmlArchive(archive_path, writable=False) as archive:
+        entries = archive.entries(latest_only=latest_only)
+    logging.info("Replaying %d archived responses from %s", len(entries), archive_path)
+    batches = [entries[i : i + batch_size] for i in range(0, len(entries), batch_size)]
+
+    if workers <= 0:
+        for batch in batches:
+            yield from replay_entries(archive_path, batch, options)
+        return
+
+    done = 0
+    pending: Deque[Future] = deque()
+    batch_iter = iter(batches)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < workers * 2:
+                batch = next(batch_iter, None)
+                if batch is None:
+                    break
+                pending.append(executor.submit(replay_entries, archive_path, batch, options))
+            if not pending:
+                break
+            records = pending.popleft().result()
+            done += len(records)
+            logging.info("Replayed %d/%d", done, len(entries))
+            yield from records
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from pipelines.output_writers import Record, serialize_record  # type: ignore
+
+UNIX_PREFIX = "unix:"
+
+# Scrapes one batch of URLs and yields a record per URL, in order
+BatchScraper = Callable[[List[str]], Iterator[Record]]
+
+def parse_service_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    "HOST:PORT" or ":PORT" (127.0.0.1) for TCP, "unix:/path/to.sock" for a
+    Unix socket.
+    """
+    if address.startswith(UNIX_PREFIX):
+        path = address[len(UNIX_PREFIX) :]
+        if not path:
+            raise ValueError(f"Invalid service address {address!r}; expected unix:/path/to.sock")
+        return path
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid service address {address!r}; expected HOST:PORT, :PORT or unix:PATH")
+    return host or "127.0.0.1", int(port)
+
+def _read_urls(body: bytes, content_type: str) -> List[str]:
+    if content_type.startswith("application/json"):
+        payload = json.loads(body)
+        urls = payload.get("urls") if isinstance(payload, dict) else payload
+        if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+            raise ValueError('expected {"urls": [...]} or a JSON array of URL strings')
+        return [url.strip() for url in urls if url.strip()]
+    # Anything else is read as text, one URL per line
+    lines = body.decode("utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+class ScrapeRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /scrape with {"urls": [...]} (or text, one URL per line) streams
+    back one JSON record per line, in request order, as records finish.
+    GET /health reports uptime and totals.
+    """
+
+    server_version = "yelp-scraper"
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, self.server.service.health())  # type: ignore[attr-defined]
+
+    def do_POST(self) -> None:  # noqa: N802
+        service: ScrapeService = self.server.service  # type: ignore[attr-defined]
+        if self.path != "/scrape":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            urls = _read_urls(self.rfile.read(length), self.headers.get("Content-Type") or "")
+        except (ValueError, UnicodeDecodeError) as exc:
+            self._send_json(400, {"error": f"unreadable request body: {exc}"})
+            return
+        if not urls:
+            self._send_json(400, {"error": "no URLs in request"})
+            return
+        if len(urls) > service.max_batch:
+            message = f"batch of {len(urls)} URLs exceeds the limit of {service.max_batch}"
+            self._send_json(413, {"error": message})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        # HTTP/1.0 without a Content-Length: the body ends when the
+        # connection closes, so records can be sent as they finish
+        try:
+            for record in service.scrape(urls):
+                self.wfile.write((serialize_record(record) + "\n").encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logging.warning("Client went away during a batch of %d URLs", len(urls))
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class ScrapeService:
+    """
+    Resident scraper: batches arrive over a local HTTP API and are scraped
+    by `scrape_batch`, which keeps its sessions, connection pools, caches
+    and parse workers warm between batches.
+    """
+
+    def __init__(self, scrape_batch: BatchScraper, max_batch: int = 1000) -> None:
+        self.scrape_batch = scrape_batch
+        self.max_batch = max(1, max_batch)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._urls = 0
+        self._active = 0
+
+    def scrape(self, urls: List[str]) -> Iterable[Record]:
+        with self._lock:
+            self._batches += 1
+            self._active += 1
+        try:
+            for record in self.scrape_batch(urls):
+                with self._lock:
+                    self._urls += 1
+                yield record
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": "ok",
+                "uptimeSeconds": round(time.time() - self.started_at, 1),
+                "batches": self._batches,
+                "urls": self._urls,
+                "activeBatches": self._active,
+            }
+
+    def make_server(self, address: str) -> socketserver.BaseServer:
+        """Bind the HTTP server for `address` without starting to serve."""
+        bind = parse_service_address(address)
+        server: socketserver.BaseServer
+        if isinstance(bind, str):
+            if os.path.exists(bind):
+                # Left behind by a previous run that was killed
+                os.remove(bind)
+            server = _ThreadingUnixHTTPServer(bind, ScrapeRequestHandler)
+        else:
+            server = ThreadingHTTPServer(bind, ScrapeRequestHandler)
+        server.service = self  # type: ignore[attr-defined]
+        return server
+
+    def serve(self, address: str) -> None:
+        """Serve until interrupted (Ctrl+C / SIGTERM raising KeyboardInterrupt)."""
+        bind = parse_service_address(address)
+        server = self.make_server(address)
+        logging.info("Scrape service listening on %s", address)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Shutting down scrape service")
+        finally:
+            server.server_close()
+            if isinstance(bind, str) and os.path.exists(bind):
+                os.remove(bind)
@@ -0,0 +1,179 @@
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from pipelines.output_writers import (  # type: ignore
+    JsonlWriter,
+    is_jsonl_path,
+    iter_json_array,
+    iter_jsonl,
+    read_run_metadata,
+    write_json_array,
+    write_run_metadata,
+)
+from pipelines.url_input import iter_input_urls, shard_for_url  # type: ignore
+
+# Formats a shard can be read back from, record by record, for the merge
+SHARD_OUTPUT_FORMATS = ("json", "jsonl")
+
+# Records read ahead of the current URL while looking for its record
+MAX_LOOKAHEAD = 10000
+
+class _ShardStream:
+    """
+    One shard's records, consumed in input order. Records that turn up
+    ahead of their turn (e.g. retried URLs appended after a --retry-failed
+    run) are stashed until their URL comes up. Without input dedupe a URL
+    can have several records; they are handed out in the order read.
+
+    A search reads at most `max_lookahead` records ahead, so a URL with no
+    record (e.g. a run that stopped early) costs one window instead of the
+    rest of the shard. The stash then holds that window plus any records
+    whose URL has already gone by. A record more than `max_lookahead` out
+    of place is reported missing at its URL. It still ends up stashed or
+    left unread, and is written with the leftovers at the end.
+    """
+
+    def __init__(self, path: str, output_format: str, max_lookahead: int = MAX_LOOKAHEAD) -> None:
+        self.path = path
+        self.max_lookahead = max(1, max_lookahead)
+        self._records = iter_jsonl(path) if output_format == "jsonl" else iter_json_array(path)
+        self._stash: Dict[str, List[Dict[str, Any]]] = {}
+        self.exhausted = False
+
+    def take(self, url: str) -> Optional[Dict[str, Any]]:
+        stashed = self._stash.get(url)
+        if stashed:
+            record = stashed.pop(0)
+            if not stashed:
+                del self._stash[url]
+            return record
+        if self.exhausted:
+            return None
+        for _ in range(self.max_lookahead):
+            record = next(self._records, None)
+            if record is None:
+                self.exhausted = True
+                break
+            if record.get("url") == url:
+                return record
+            self._stash.setdefault(record.get("url"), []).append(record)
+        return None
+
+    def leftovers(self) -> Iterator[Dict[str, Any]]:
+        for records in self._stash.values():
+            yield from records
+        self._stash = {}
+        if not self.exhausted:
+            yield from self._records
+            self.exhausted = True
+
+def load_shard_metadata(shard_outputs: Sequence[str]) -> Dict[int, Dict[str, Any]]:
+    """Read and cross-check the metadata each sharded run wrote next to its output."""
+    shards: Dict[int, Dict[str, Any]] = {}
+    num_shards: Optional[int] = None
+    for path in shard_outputs:
+        metadata = read_run_metadata(path)
+        if metadata is None or "shard" not in metadata:
+            raise ValueError(f"{path} has no shard metadata; was it written with --shard?")
+        if num_shards is None:
+            num_shards = metadata["num_shards"]
+        elif metadata["num_shards"] != num_shards:
+            raise ValueError(f"{path} is shard {metadata['shard']}/{metadata['num_shards']}, expected N={num_shards}")
+        if metadata["shard"] in shards:
+            raise ValueError(f"Shard {metadata['shard']} given twice ({shards[metadata['shard']]['path']} and {path})")
+        # Shards from before the format was recorded were JSON or JSON Lines
+        output_format = metadata.get("output_format") or ("jsonl" if is_jsonl_path(path) else "json")
+        if output_format not in SHARD_OUTPUT_FORMATS:
+            raise ValueError(f"{path} is {output_format} output; only {' and '.join(SHARD_OUTPUT_FORMATS)} shards can be merged")
+        metadata["output_format"] = output_format
+        shards[metadata["shard"]] = dict(metadata, path=path)
+    if num_shards is not None:
+        missing = sorted(set(range(num_shards)) - set(shards))
+        if missing:
+            logging.warning("Merging without shard(s) %s of %d", ", ".join(map(str, missing)), num_shards)
+    return shards
+
+def _iter_merged(
+    shards: Dict[int, Dict[str, Any]],
+    input_paths: Sequence[str],
+    input_options: Dict[str, Any],
+    stats: Dict[str, int],
+) -> Iterator[Dict[str, Any]]:
+    num_shards = next(iter(shards.values()))["num_shards"]
+    streams = {shard: _ShardStream(meta["path"], meta["output_format"]) for shard, meta in shards.items()}
+
+    for url in iter_input_urls(input_paths, **input_options):
+        stream = streams.get(shard_for_url(url, num_shards))
+        if stream is None:
+            continue
+        record = stream.take(url)
+        if record is None:
+            stats["missing"] += 1
+            continue
+        stats["merged"] += 1
+        yield record
+
+    # Records whose URL never came up (input changed, or a Bloom false
+    # positive during the merge) are kept rather than dropped
+    for stream in streams.values():
+        for record in stream.leftovers():
+            stats["unmatched"] += 1
+            yield record
+
+def merge_shard_outputs(
+    shard_outputs: Sequence[str],
+    output_path: str,
+    input_paths: Optional[Sequence[str]] = None,
+    input_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, int]:
+    """
+    Combine per-shard outputs into one file in the original input order.
+    The input is re-read (from the paths recorded in the shard metadata
+    unless given) and each URL's record is taken from the shard that owns
+    it. Memory is bounded by the records found out of place, plus at most
+    MAX_LOOKAHEAD per shard read ahead while looking for a missing record
+    (see _ShardStream).
+    """
+    shards = load_shard_metadata(shard_outputs)
+    if not shards:
+        raise ValueError("No shard outputs given")
+    first = next(iter(shards.values()))
+    paths: List[str] = list(input_paths or first["inputs"])
+    options = {
+        "input_format": first.get("input_format", "auto"),
+        "url_column": first.get("input_url_column", "url"),
+        "dedupe": first.get("input_dedupe", "bloom"),
+        "dedupe_error_rate": first.get("input_dedupe_error_rate", 1e-6),
+    }
+    options.update(input_options or {})
+
+    stats = {"merged": 0, "missing": 0, "unmatched": 0}
+    records = _iter_merged(shards, paths, options, stats)
+    if is_jsonl_path(output_path):
+        with JsonlWriter(output_path, flush_every=1000, fsync=False) as writer:
+            for record in records:
+                writer.write(record)
+    else:
+        write_json_array(records, output_path)
+
+    if stats["missing"]:
+        logging.warning("%d input URLs had no record in their shard output", stats["missing"])
+    if stats["unmatched"]:
+        logging.warning("%d records did not match an input URL and were appended at the end", stats["unmatched"])
+    write_run_metadata(
+        output_path,
+        {
+            "merged_shards": sorted(shards),
+            "num_shards": first["num_shards"],
+            "inputs": paths,
+            "input_format": options["input_format"],
+            "input_url_column": options["url_column"],
+            "input_dedupe": options["dedupe"],
+            "input_dedupe_error_rate": options["dedupe_error_rate"],
+            "records": stats["merged"] + stats["unmatched"],
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+        },
+    )
+    logging.info("Merged %d records from %d shard(s) into %s", stats["merged"], len(shards), output_path)
+    return stats
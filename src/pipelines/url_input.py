@@ -0,0 +1,313 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import sys
+from typing import IO, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from extractors.url_tools import canonicalize_url  # type: ignore
+
+INPUT_FORMATS = ("auto", "text", "csv", "tsv", "jsonl")
+DEDUPE_MODES = ("bloom", "exact", "none")
+
+STDIN_PATH = "-"
+
+_COMPRESSED_SUFFIXES = (".gz", ".zst", ".zstd")
+_FORMAT_BY_EXTENSION = {
+    ".txt": "text",
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+def _url_digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+def _hash_pair(digest: bytes) -> Tuple[int, int]:
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 128-bit URL digests (double hashing)."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits, num_bits = self._bits, self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, h1: int, h2: int) -> None:
+        bits, num_bits = self._bits, self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows as URLs arrive instead of reserving memory for
+    the largest possible seed list. Each new stage is four times larger with
+    half the error rate, so the overall false-positive rate stays below
+    `error_rate` (a false positive drops a URL as a duplicate).
+    """
+
+    def __init__(self, error_rate: float = 1e-6, initial_capacity: int = 100_000) -> None:
+        self.error_rate = error_rate
+        self._next_capacity = initial_capacity
+        self._next_error_rate = error_rate / 2
+        self._filters: List[BloomFilter] = []
+        self._add_stage()
+
+    def _add_stage(self) -> None:
+        self._filters.append(BloomFilter(self._next_capacity, self._next_error_rate))
+        self._next_capacity *= 4
+        self._next_error_rate /= 2
+
+    def add_if_new(self, key: str) -> bool:
+        h1, h2 = _hash_pair(_url_digest(key))
+        for stage in self._filters:
+            if stage.contains(h1, h2):
+                return False
+        if self._filters[-1].count >= self._filters[-1].capacity:
+            self._add_stage()
+        self._filters[-1].add(h1, h2)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        h1, h2 = _hash_pair(_url_digest(key))
+        return any(stage.contains(h1, h2) for stage in self._filters)
+
+    def memory_bytes(self) -> int:
+        return sum(len(stage._bits) for stage in self._filters)
+
+class ExactSet:
+    """Exact dedupe on 128-bit digests: no false positives, memory grows with the input."""
+
+    def __init__(self) -> None:
+        self._seen: Set[bytes] = set()
+
+    def add_if_new(self, key: str) -> bool:
+        digest = _url_digest(key)
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return _url_digest(key) in self._seen
+
+UrlDeduper = Union[ScalableBloomFilter, ExactSet]
+
+def build_deduper(mode: str, error_rate: float = 1e-6) -> Optional[UrlDeduper]:
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return ExactSet()
+    if mode == "bloom":
+        return ScalableBloomFilter(error_rate=error_rate)
+    raise ValueError(f"Unknown dedupe mode {mode!r}; choose from {', '.join(DEDUPE_MODES)}")
+
+def _strip_compression(path: str) -> str:
+    for suffix in _COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+def detect_format(path: str, input_format: str = "auto") -> str:
+    if input_format != "auto":
+        return input_format
+    if path == STDIN_PATH:
+        return "text"
+    _, ext = os.path.splitext(_strip_compression(path).lower())
+    return _FORMAT_BY_EXTENSION.get(ext, "text")
+
+def open_text_source(path: str) -> IO[str]:
+    """Open a URL source for reading text: stdin, gzip, zstd or a plain file."""
+    if path == STDIN_PATH:
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")  # type: ignore[return-value]
+    if path.endswith((".zst", ".zstd")):
+        try:
+            import zstandard  # type: ignore
+        except ImportError as exc:
+            raise ImportError(
+                f"Reading {path} requires the 'zstandard' package (pip install zstandard)"
+            ) from exc
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def _iter_text(f: IO[str]) -> Iterator[str]:
+    for line in f:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+def _column_index(header: List[str], path: str, column: str) -> int:
+    names = [name.strip().lower() for name in header]
+    if column.lower() not in names:
+        raise ValueError(f"Column {column!r} not found in the header of {path}: {header}")
+    return names.index(column.lower())
+
+def _iter_delimited(f: IO[str], path: str, column: str, delimiter: str) -> Iterator[str]:
+    reader = csv.reader(f, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    index = _column_index(header, path, column)
+    for row in reader:
+        if index < len(row) and row[index].strip():
+            yield row[index].strip()
+
+def _iter_jsonl(f: IO[str], path: str, column: str) -> Iterator[str]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            logging.warning("Skipping unreadable line %d in %s", line_no, path)
+            continue
+        url = item.get(column) if isinstance(item, dict) else item
+        if isinstance(url, str) and url.strip():
+            yield url.strip()
+
+def _iter_source(path: str, input_format: str, column: str) -> Iterator[str]:
+    fmt = detect_format(path, input_format)
+    f = open_text_source(path)
+    try:
+        if fmt == "csv":
+            yield from _iter_delimited(f, path, column, ",")
+        elif fmt == "tsv":
+            yield from _iter_delimited(f, path, column, "\t")
+        elif fmt == "jsonl":
+            yield from _iter_jsonl(f, path, column)
+        else:
+            yield from _iter_text(f)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def check_source(path: str, input_format: str = "auto", column: str = "url") -> None:
+    """
+    Open a URL source and read its first line, so a missing decompressor,
+    a corrupt stream or a CSV/TSV header without `column` is reported
+    before the run starts rather than when the source is reached. Stdin
+    cannot be read twice and is not checked.
+    """
+    if path == STDIN_PATH:
+        return
+    fmt = detect_format(path, input_format)
+    f = open_text_source(path)
+    try:
+        try:
+            first_line = f.readline()
+        except Exception as exc:  # noqa: BLE001
+            # Bad gzip/zstd framing or undecodable text; the zstd errors
+            # have no common base class with the others
+            raise ValueError(f"Cannot read URL source {path}: {exc}") from exc
+        if fmt in ("csv", "tsv") and first_line:
+            header = next(csv.reader([first_line], delimiter="," if fmt == "csv" else "\t"))
+            _column_index(header, path, column)
+    finally:
+        f.close()
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """Parse "K/N" (0 <= K < N) into (K, N)."""
+    index, sep, count = spec.partition("/")
+    try:
+        shard, num_shards = int(index), int(count)
+    except ValueError:
+        shard, num_shards = -1, 0
+    if not sep or num_shards < 1 or not 0 <= shard < num_shards:
+        raise ValueError(f"Invalid shard {spec!r}; expected K/N with 0 <= K < N, e.g. 0/4")
+    return shard, num_shards
+
+def shard_for_key(key: str, num_shards: int) -> int:
+    # Keyed separately from the dedupe digest so shard membership does not
+    # correlate with Bloom filter bit positions; stable across machines
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8, person=b"url-shard").digest()
+    return int.from_bytes(digest, "little") % num_shards
+
+def shard_for_url(url: str, num_shards: int) -> int:
+    """Shard that owns `url`: a stable hash of its canonical form, modulo N."""
+    return shard_for_key(_dedupe_key(url), num_shards)
+
+def _dedupe_key(url: str) -> str:
+    try:
+        return canonicalize_url(url)
+    except ValueError:
+        # Unparseable (e.g. a bad port): fall back to the raw spelling
+        return url
+
+def iter_input_urls(
+    paths: Sequence[str],
+    input_format: str = "auto",
+    url_column: str = "url",
+    dedupe: str = "bloom",
+    dedupe_error_rate: float = 1e-6,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Iterator[str]:
+    """
+    Lazily yield input URLs from one or more sources, in order. Sources are
+    plain text (one URL per line, # comments), CSV/TSV or JSON Lines with a
+    `url_column`, optionally gzip or zstd compressed; "-" reads stdin.
+    URLs whose canonical form was already seen are dropped. With `shard`
+    (K, N) only the URLs owned by shard K of N are yielded, and stdin is
+    refused since the merge cannot read it again. Missing files,
+    unknown options and unreadable sources (see check_source) are
+    reported here, before the first URL is read.
+    """
+    for path in paths:
+        if path != STDIN_PATH and not os.path.exists(path):
+            logging.error("Input URLs file not found: %s", path)
+            raise FileNotFoundError(f"Input URLs file not found: {path}")
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format {input_format!r}; choose from {', '.join(INPUT_FORMATS)}")
+    if shard is not None and STDIN_PATH in paths:
+        # tools/merge_shards.py re-reads the input to restore its order
+        raise ValueError("--shard cannot read URLs from stdin; the shard merge has to read the input again")
+    for path in paths:
+        check_source(path, input_format, url_column)
+    deduper = build_deduper(dedupe, dedupe_error_rate)
+    return _iter_deduped(paths, input_format, url_column, deduper, shard)
+
+def _iter_deduped(
+    paths: Sequence[str],
+    input_format: str,
+    url_column: str,
+    deduper: Optional[UrlDeduper],
+    shard: Optional[Tuple[int, int]] = None,
+) -> Iterator[str]:
+    total = 0
+    duplicates = 0
+    for path in paths:
+        for url in _iter_source(path, input_format, url_column):
+            total += 1
+            key = _dedupe_key(url)
+            # Duplicates always share a shard, so filtering first keeps the
+            # dedupe structure to this shard's slice
+            if shard is not None and shard_for_key(key, shard[1]) != shard[0]:
+                continue
+            if deduper is not None and not deduper.add_if_new(key):
+                duplicates += 1
+                continue
+            yield url
+    if duplicates:
+        logging.info("Skipped %d duplicate URLs out of %d read", duplicates, total)
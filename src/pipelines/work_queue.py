@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+JOB_PENDING = "pending"
+JOB_LEASED = "leased"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class WorkQueue:
+    """
+    Job table in a single SQLite (WAL) file shared by cooperating worker
+    processes. Jobs keep their enqueue order (rowid). A worker leases a
+    batch for `lease_seconds`; jobs whose lease runs out (a worker died or
+    stalled) go back to the pool, and each lease counts as an attempt until
+    `max_attempts` is reached.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        # Autocommit mode; transactions are opened explicitly where needed.
+        # The busy timeout lets writers from other processes queue up.
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def enqueue(self, urls: Iterable[str], batch_size: int = 1000) -> int:
+        """Add URLs not already queued, in order; returns how many were new."""
+        added = 0
+        batch: List[Tuple[str, str, float]] = []
+        for url in urls:
+            batch.append((url, JOB_PENDING, time.time()))
+            if len(batch) >= batch_size:
+                added += self._insert(batch)
+                batch = []
+        if batch:
+            added += self._insert(batch)
+        return added
+
+    def _insert(self, batch: Sequence[Tuple[str, str, float]]) -> int:
+        before = self._conn.total_changes
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (url, status, updated_at) VALUES (?, ?, ?)", batch
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return self._conn.total_changes - before
+
+    def lease(self, worker_id: str, batch_size: int) -> List[Tuple[int, str]]:
+        """
+        Claim up to `batch_size` pending or lease-expired jobs, oldest first.
+        Expired jobs that have used up their attempts are marked failed
+        instead of being handed out again.
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ?
+                WHERE status = ? AND lease_expires < ? AND attempts >= ?
+                """,
+                (JOB_FAILED, now, JOB_LEASED, now, self.max_attempts),
+            )
+            rows = self._conn.execute(
+                """
+                SELECT id, url FROM jobs
+                WHERE status = ? OR (status = ? AND lease_expires < ?)
+                ORDER BY id LIMIT ?
+                """,
+                (JOB_PENDING, JOB_LEASED, now, batch_size),
+            ).fetchall()
+            self._conn.executemany(
+                """
+                UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?,
+                    lease_expires = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                [(JOB_LEASED, worker_id, now + self.lease_seconds, now, job_id) for job_id, _ in rows],
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return [(job_id, url) for job_id, url in rows]
+
+    def complete(self, worker_id: str, results: Sequence[Tuple[int, str, bool]]) -> int:
+        """
+        Store (job_id, result_json, retryable) for jobs this worker still
+        holds. Retryable results go back to pending until the job runs out
+        of attempts, then are kept as its final (failed) result. Returns how
+        many results were accepted; a job whose lease was lost is skipped.
+        """
+        now = time.time()
+        accepted = 0
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for job_id, result, retryable in results:
+                cursor = self._conn.execute(
+                    """
+                    UPDATE jobs SET
+                        status = CASE
+                            WHEN NOT ? THEN ?
+                            WHEN attempts < ? THEN ?
+                            ELSE ?
+                        END,
+                        result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                    WHERE id = ? AND status = ? AND lease_owner = ?
+                    """,
+                    (
+                        retryable,
+                        JOB_DONE,
+                        self.max_attempts,
+                        JOB_PENDING,
+                        JOB_FAILED,
+                        result,
+                        now,
+                        job_id,
+                        JOB_LEASED,
+                        worker_id,
+                    ),
+                )
+                accepted += cursor.rowcount
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return accepted
+
+    def counts(self) -> Dict[str, int]:
+        counts = {JOB_PENDING: 0, JOB_LEASED: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def is_drained(self) -> bool:
+        """True once every job is done or failed."""
+        row = self._conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (JOB_PENDING, JOB_LEASED)
+        ).fetchone()
+        return row[0] == 0
+
+    def requeue_failed(self) -> int:
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, updated_at = ? WHERE status = ?",
+            (JOB_PENDING, time.time(), JOB_FAILED),
+        )
+        return cursor.rowcount
+
+    def iter_results(self) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """Yield (url, status, result_json) for finished jobs in enqueue order."""
+        cursor = self._conn.execute(
+            "SELECT url, status, result FROM jobs WHERE status IN (?, ?) ORDER BY id",
+            (JOB_DONE, JOB_FAILED),
+        )
+        yield from cursor
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The sources import each other as top-level packages, the way main.py runs them
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,102 @@
+from pipelines.business_aliases import AliasMap, business_key, iter_with_aliases, page_identity  # type: ignore
+
+BIZ = "https://www.yelp.com/biz/golden-gate-noodles"
+PAGE = (
+    '<html><head><meta name="yelp-biz-id" content="abc123">'
+    f'<link rel="canonical" href="{BIZ}"></head><body></body></html>'
+)
+
+def test_spellings_of_one_business_share_a_key():
+    keys = {
+        business_key(BIZ),
+        business_key("https://m.yelp.com/biz/Golden-Gate-Noodles/?osq=noodles"),
+        business_key("https://yelp.com/biz/golden-gate-noodles?hrid=x&utm_source=y"),
+    }
+    assert keys == {"biz:yelp.com/golden-gate-noodles"}
+    assert business_key("https://www.yelp.com/search?q=x") != business_key(BIZ)
+
+def test_page_identity_reads_the_head_only():
+    body_link = '<link rel="canonical" href="https://www.yelp.com/biz/other">'
+    assert page_identity(PAGE) == ("abc123", BIZ)
+    assert page_identity(f"<html><head></head><body>{body_link}</body></html>") == (None, None)
+
+class _Scraper:
+    """Fetches everything it is handed before yielding, so all of it is in flight at once."""
+
+    def __init__(self, aliases, failing=()):
+        self.aliases = aliases
+        self.failing = set(failing)
+        self.fetched = []
+
+    def stream(self, urls):
+        batch = list(urls)
+        for url in batch:
+            yield self.single(url)
+
+    def single(self, url):
+        self.fetched.append(url)
+        if url in self.failing:
+            self.failing.discard(url)
+            return {"url": url, "error": "timeout"}
+        self.aliases.learn(url, None, PAGE)
+        return {"url": url, "name": "Golden Gate Noodles", "fetchRetries": 2, "throttledSeconds": 1.5}
+
+def _run(aliases, scraper, urls):
+    return list(iter_with_aliases(urls, aliases, scraper.stream, scraper.single))
+
+def test_each_business_is_fetched_once_and_records_keep_input_order(tmp_path):
+    urls = [
+        BIZ,
+        "https://m.yelp.com/biz/golden-gate-noodles?osq=noodles",
+        "https://www.yelp.com/biz/other-place",
+        BIZ + "?hrid=1",
+    ]
+    aliases = AliasMap(str(tmp_path / "aliases.sqlite"))
+    scraper = _Scraper(aliases)
+    try:
+        records = _run(aliases, scraper, urls)
+    finally:
+        aliases.close()
+
+    assert scraper.fetched == [BIZ, "https://www.yelp.com/biz/other-place"]
+    assert [record["url"] for record in records] == urls
+    # Reused records carry their own URL and no fetch costs
+    assert records[1]["name"] == records[0]["name"]
+    assert (records[1]["fetchRetries"], records[1]["throttledSeconds"]) == (0, 0.0)
+    assert (records[0]["fetchRetries"], records[0]["throttledSeconds"]) == (2, 1.5)
+
+def test_learned_aliases_carry_over_to_later_runs(tmp_path):
+    path = str(tmp_path / "aliases.sqlite")
+    alias = "https://www.yelp.com/biz/golden-gate-noodles-san-francisco-2"
+    aliases = AliasMap(path)
+    try:
+        aliases.learn(alias, BIZ, PAGE)
+    finally:
+        aliases.close()
+
+    aliases = AliasMap(path)
+    scraper = _Scraper(aliases)
+    try:
+        assert aliases.resolve(alias) == aliases.resolve(BIZ) == "id:abc123"
+        records = _run(aliases, scraper, [BIZ, alias])
+        # Records do not outlive their run
+        assert _run(aliases, scraper, [alias])[0]["url"] == alias
+    finally:
+        aliases.close()
+
+    assert scraper.fetched == [BIZ, alias]
+    assert [record["url"] for record in records] == [BIZ, alias]
+
+def test_alias_of_a_failed_fetch_is_scraped_itself(tmp_path):
+    urls = [BIZ, BIZ + "?osq=noodles", BIZ + "?hrid=1"]
+    aliases = AliasMap(str(tmp_path / "aliases.sqlite"))
+    scraper = _Scraper(aliases, failing=[BIZ])
+    try:
+        records = _run(aliases, scraper, urls)
+    finally:
+        aliases.close()
+
+    assert records[0]["error"]
+    assert scraper.fetched == [BIZ, BIZ + "?osq=noodles"]
+    assert [record["url"] for record in records] == urls
+    assert not any(record.get("error") for record in records[1:])
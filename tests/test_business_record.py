@@ -0,0 +1,87 @@
+import glob
+import json
+import os
+import pickle
+import sys
+
+import pytest
+
+from extractors.business_record import BusinessRecord  # type: ignore
+from extractors.field_mapper import map_raw_to_business, map_raw_to_record  # type: ignore
+from extractors.yelp_parser import parse_business_page  # type: ignore
+from pipelines.data_cleaner import clean_business_record, clean_record  # type: ignore
+from pipelines.output_writers import serialize_record  # type: ignore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from synthetic_pages import PAGE_SIZES, generate_business_page  # type: ignore  # noqa: E402
+
+URL = "https://www.yelp.com/biz/x"
+TIMESTAMP = "2025-01-01 00:00:00"
+
+def _raw_pages():
+    for path in sorted(glob.glob(os.path.join(ROOT, "data", "fixtures", "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            yield os.path.basename(path), parse_business_page(f.read())
+    for size in PAGE_SIZES:
+        if size == "huge":
+            continue
+        for seed in range(8):
+            yield f"{size}-{seed}", parse_business_page(generate_business_page(seed, size, jsonld=seed % 2 == 0))
+    # Values the cleaner has to change, and ones it must leave alone
+    yield "messy", {
+        "title": "  Café  Nuñez \n",
+        "rating": "",
+        "reviewCount": "1,234 reviews",
+        "categories": [" Bakery ", "", "Cafés"],
+        "images": ["a.jpg", " b.jpg ", {"src": "  c.jpg  "}, 3],
+        "hours": {"Mon": "  9 AM  -  5 PM ", "Tue": "", "Wed": None},
+        "businessServices": {"Delivery": True, "Note": "\tyes\t"},
+        "reviewhighlights": "one  highlight",
+        "about": 'Quotes " and \\ backslashes   and \U0001f600',
+    }
+    yield "empty", {}
+
+RAW_PAGES = list(_raw_pages())
+
+def _both(raw, is_page_not_found=False):
+    record = clean_record(map_raw_to_record(raw, URL, TIMESTAMP, is_page_not_found))
+    expected = clean_business_record(map_raw_to_business(raw, URL, TIMESTAMP, is_page_not_found))
+    return record, expected
+
+@pytest.mark.parametrize("name,raw", RAW_PAGES, ids=[name for name, _ in RAW_PAGES])
+def test_record_output_is_byte_identical_to_the_dict_path(name, raw):
+    record, expected = _both(raw, is_page_not_found=name == "empty")
+
+    assert record.to_dict() == expected
+    assert serialize_record(record) == json.dumps(expected, ensure_ascii=False)
+    assert serialize_record(record, indent=4) == json.dumps(expected, ensure_ascii=False, indent=4)
+
+def test_optional_fields_serialize_once_set():
+    record, expected = _both(RAW_PAGES[0][1])
+    for key, value in (("error", "boom"), ("fetchRetries", 2), ("throttledSeconds", 1.5), ("fieldSources", {"title": "jsonld"})):
+        record[key] = value
+        expected[key] = value
+
+    assert list(record.keys()) == list(expected)
+    assert serialize_record(record) == json.dumps(expected, ensure_ascii=False)
+    assert serialize_record(record, indent=4) == json.dumps(expected, ensure_ascii=False, indent=4)
+
+def test_mapping_protocol_and_pickle_round_trip():
+    record, expected = _both(RAW_PAGES[0][1])
+    record["error"] = "boom"
+
+    assert record["url"] == URL
+    assert "error" in record and "fetchRetries" not in record
+    assert record.get("fetchRetries", 0) == 0
+    with pytest.raises(KeyError):
+        record["fetchRetries"]
+    with pytest.raises(KeyError):
+        record["unknown"] = 1
+
+    copy = pickle.loads(pickle.dumps(record))
+    assert isinstance(copy, BusinessRecord)
+    assert copy == record
+    assert "fetchRetries" not in copy
+    assert serialize_record(copy) == serialize_record(record)
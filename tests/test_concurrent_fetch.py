@@ -0,0 +1,44 @@
+import threading
+import time
+
+import main  # type: ignore
+
+URLS = [f"https://example.com/biz/business-{i}" for i in range(12)]
+FAILING = {URLS[2], URLS[7]}
+PAGE = "<html><head><title>{name}</title></head><body><h1>{name}</h1></body></html>"
+
+class _StubFetch:
+    """Answers later URLs sooner, so completion order is the reverse of input order."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def __call__(self, url, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.01 * (len(URLS) - URLS.index(url)))
+            if url in FAILING:
+                raise ConnectionError(f"connection reset by {url}")
+            return PAGE.format(name=url.rsplit("-", 1)[-1]), 200
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def test_thread_pool_keeps_input_order_through_failures(monkeypatch):
+    fetch = _StubFetch()
+    monkeypatch.setattr(main, "fetch_html", fetch)
+
+    records = list(main.iter_scrape_results(iter(URLS), {"concurrent_requests": 4}))
+
+    assert [record["url"] for record in records] == URLS
+    assert fetch.max_active > 1
+    for url, record in zip(URLS, records):
+        if url in FAILING:
+            assert record.get("error") and record["is_page_not_found"]
+        else:
+            assert not record.get("error")
+            assert record["title"] == url.rsplit("-", 1)[-1]
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+
+import main  # type: ignore
+from extractors.business_record import REQUIRED_FIELDS  # type: ignore
+from extractors.field_mapper import map_raw_to_business  # type: ignore
+from extractors.yelp_parser import parse_field_list, select_fields  # type: ignore
+from pipelines.output_writers import iter_jsonl  # type: ignore
+
+FIXTURE = os.path.join(os.path.dirname(__file__), os.pardir, "data", "fixtures", "claimed_bakery.html")
+URL = "https://www.yelp.com/biz/claimed-bakery"
+
+def _scrape(monkeypatch, settings: dict) -> dict:
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        html = f.read()
+    monkeypatch.setattr(main, "fetch_html", lambda url, **kwargs: (html, 200))
+    (record,) = main.iter_scrape_results([URL], settings)
+    return dict(record)
+
+def test_narrowed_run_keeps_the_full_schema(monkeypatch):
+    fields = list(select_fields(parse_field_list("phoneNumber, title")))
+    full = _scrape(monkeypatch, {})
+    narrowed = _scrape(monkeypatch, {"fields": fields})
+    defaults = map_raw_to_business({}, URL, narrowed["timestamp"], False)
+
+    assert fields == ["title", "phoneNumber"]
+    assert list(narrowed) == list(full)
+    assert list(narrowed)[: len(REQUIRED_FIELDS)] == list(REQUIRED_FIELDS)
+    assert narrowed["title"] == full["title"] and narrowed["title"]
+    assert narrowed["phoneNumber"] == full["phoneNumber"] and narrowed["phoneNumber"]
+    for name in REQUIRED_FIELDS:
+        if name not in fields:
+            # Fields that were not extracted keep what the mapper fills in
+            assert narrowed[name] == defaults[name], name
+    # The fixture does have data for the fields left out
+    assert full["rating"] != defaults["rating"]
+
+def test_settings_file_fields_may_be_a_comma_separated_string(tmp_path, monkeypatch):
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({"fields": "title, phoneNumber"}), encoding="utf-8")
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text(URL + "\n", encoding="utf-8")
+    output = str(tmp_path / "out.jsonl")
+    load_settings = main.load_settings
+    monkeypatch.setattr(main, "load_settings", lambda path: load_settings(str(settings_path)))
+    monkeypatch.setattr(sys, "argv", ["main.py", "-i", str(input_path), "-o", output])
+    narrowed = _scrape(monkeypatch, {"fields": ["title", "phoneNumber"]})
+
+    main.main()
+
+    (record,) = iter_jsonl(output)
+    assert {key: value for key, value in record.items() if key != "timestamp"} == {
+        key: value for key, value in narrowed.items() if key != "timestamp"
+    }
@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from extractors.http_cache import ResponseCache  # type: ignore
+from extractors.yelp_parser import fetch_html  # type: ignore
+
+BODY = "<html><body><h1>Golden Gate Noodles</h1></body></html>"
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+class _Origin(BaseHTTPRequestHandler):
+    """/etag pages answer If-None-Match, /dated ones If-Modified-Since."""
+
+    # Bumped by the tests: the server hands out a new ETag on each 304
+    etag_version = 1
+    requests: list = []
+
+    def do_GET(self):  # noqa: N802
+        conditional = {key: value for key, value in self.headers.items() if key.startswith("If-")}
+        type(self).requests.append((self.path, conditional))
+        etag = f'"v{type(self).etag_version}"'
+        if self.path.startswith("/etag"):
+            if "If-None-Match" in conditional:
+                type(self).etag_version += 1
+                self._reply(304, {"ETag": f'"v{type(self).etag_version}"'})
+            else:
+                self._reply(200, {"ETag": etag}, BODY)
+        elif "If-Modified-Since" in conditional and conditional["If-Modified-Since"] == LAST_MODIFIED:
+            self._reply(304, {})
+        else:
+            self._reply(200, {"Last-Modified": LAST_MODIFIED}, BODY)
+
+    def _reply(self, status, headers, body=""):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def origin():
+    _Origin.requests = []
+    _Origin.etag_version = 1
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600)
+    yield cache
+    cache.close()
+
+def test_fresh_entries_are_served_without_a_request(origin, cache):
+    url = origin + "/etag/a"
+    assert fetch_html(url, None, cache=cache) == (BODY, 200)
+    assert fetch_html(url, None, cache=cache) == (BODY, 200)
+
+    assert len(_Origin.requests) == 1
+
+def test_expired_entry_is_revalidated_with_its_etag(origin, cache):
+    url = origin + "/etag/a"
+    fetch_html(url, None, cache=cache)
+    # Past the TTL: every entry is stale
+    cache.ttl_seconds = 0
+
+    assert fetch_html(url, None, cache=cache) == (BODY, 200)
+    assert fetch_html(url, None, cache=cache) == (BODY, 200)
+
+    # The second revalidation sends the ETag the first 304 handed out
+    assert [conditional for _, conditional in _Origin.requests] == [
+        {},
+        {"If-None-Match": '"v1"'},
+        {"If-None-Match": '"v2"'},
+    ]
+    assert cache.get(url).etag == '"v3"'
+    assert cache.get(url).body == BODY
+
+def test_revalidation_with_last_modified(origin, cache):
+    url = origin + "/dated/a"
+    fetch_html(url, None, cache=cache)
+    cache.ttl_seconds = 0
+    stale = cache.get(url)
+
+    assert fetch_html(url, None, cache=cache) == (BODY, 200)
+
+    assert _Origin.requests[-1][1] == {"If-Modified-Since": LAST_MODIFIED}
+    # The 304 renewed the entry and kept its validator
+    renewed = cache.get(url)
+    assert renewed.fetched_at > stale.fetched_at
+    assert renewed.last_modified == LAST_MODIFIED
+
+def test_unparseable_url_is_cached_under_its_raw_spelling(cache):
+    url = "http://example.com:99999/biz/a"
+
+    assert cache.get(url) is None
+    cache.put(url, 200, BODY, None, None)
+    assert cache.get(url).body == BODY
+
+def test_reads_record_access_times_in_batches(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path, access_batch=3)
+    for i in range(3):
+        cache.put(f"https://example.com/biz/{i}", 200, BODY, None, None)
+
+    def stored_access_times():
+        with sqlite3.connect(path) as conn:
+            return dict(conn.execute("SELECT url, accessed_at FROM responses").fetchall())
+
+    before = stored_access_times()
+    cache.get("https://example.com/biz/0")
+    cache.get("https://example.com/biz/1")
+    assert stored_access_times() == before
+    cache.get("https://example.com/biz/2")
+    after = stored_access_times()
+    assert all(after[url] >= before[url] for url in before) and after != before
+
+    cache.get("https://example.com/biz/0")
+    cache.close()
+    assert stored_access_times()["https://example.com/biz/0"] > after["https://example.com/biz/0"]
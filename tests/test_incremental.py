@@ -0,0 +1,74 @@
+from pipelines.incremental import IncrementalTracker  # type: ignore
+from pipelines.parse_stage import FetchedPage, ParseOptions, build_record  # type: ignore
+from pipelines.output_writers import iter_jsonl  # type: ignore
+
+URLS = [f"https://example.com/biz/business-{i}" for i in range(6)]
+
+def _record(url: str, rating: str) -> dict:
+    return {"url": url, "title": url.rsplit("/", 1)[-1], "rating": rating, "timestamp": "now"}
+
+def _changes(path: str) -> list:
+    return [(line["change"], line["url"]) for line in iter_jsonl(path)]
+
+def test_resumed_run_appends_to_the_delta(tmp_path):
+    state = str(tmp_path / "state.sqlite")
+    delta = str(tmp_path / "out.jsonl.delta.jsonl")
+
+    first = IncrementalTracker(state, delta)
+    for url in URLS:
+        first.observe(url, "hash", _record(url, "4"), reused=False)
+    first.finish()
+
+    # Second run: every rating changed, but it dies after three pages
+    # without closing anything
+    interrupted = IncrementalTracker(state, delta)
+    for url in URLS[:3]:
+        interrupted.observe(url, "hash", _record(url, "5"), reused=False)
+    # The state already holds these changes, so their delta lines must be
+    # on disk before the run gets any further
+    assert _changes(delta) == [("changed", url) for url in URLS[:3]]
+
+    resumed = IncrementalTracker(state, delta, append=True)
+    for url in URLS[:3]:
+        # Checkpointed pages are skipped on resume; a repeat is not a change
+        resumed.observe(url, "hash", _record(url, "5"), reused=False)
+    for url in URLS[3:]:
+        resumed.observe(url, "hash", _record(url, "5"), reused=False)
+    counts = resumed.finish(detect_removed=False)
+
+    assert _changes(delta) == [("changed", url) for url in URLS]
+    assert counts["changed"] == 3 and counts["unchanged"] == 3
+
+def test_new_run_replaces_the_delta(tmp_path):
+    state = str(tmp_path / "state.sqlite")
+    delta = str(tmp_path / "out.jsonl.delta.jsonl")
+
+    first = IncrementalTracker(state, delta)
+    first.observe(URLS[0], "hash", _record(URLS[0], "4"), reused=False)
+    first.finish()
+    second = IncrementalTracker(state, delta)
+    second.observe(URLS[1], "hash", _record(URLS[1], "4"), reused=False)
+    second.finish(detect_removed=False)
+
+    assert _changes(delta) == [("added", URLS[1])]
+
+def test_reused_record_keeps_the_requested_url(tmp_path):
+    state = str(tmp_path / "state.sqlite")
+    delta = str(tmp_path / "out.jsonl.delta.jsonl")
+    html = "<html><body><h1>Business</h1></body></html>"
+
+    first = IncrementalTracker(state, delta)
+    page_hash, _ = first.lookup(URLS[0], html)
+    first.observe(URLS[0], page_hash, _record(URLS[0], "4"), reused=False)
+    first.finish()
+
+    # The same business under another spelling of its URL
+    url = URLS[0].replace("https://example.com", "https://EXAMPLE.com:443") + "/?utm_source=mail"
+    second = IncrementalTracker(state, delta)
+    page_hash, previous = second.lookup(url, html)
+    assert previous is not None
+    record = build_record(FetchedPage(url, html, 200, page_hash=page_hash, previous_record=previous), ParseOptions())
+    second.finish(detect_removed=False)
+
+    assert record["url"] == url
+    assert record["rating"] == "4"
@@ -0,0 +1,154 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from extractors.latency import LatencyPolicy, LatencyTracker  # type: ignore
+
+FAST = 0.01
+SLOW = 0.6
+
+class _DelayingOrigin(BaseHTTPRequestHandler):
+    """
+    /fast answers after FAST seconds and /slow after SLOW. /slow-first/<key>
+    is slow only the first time a key is requested, so a hedge wins.
+    """
+
+    seen: set = set()
+    hits: list = []
+    lock = threading.Lock()
+
+    def do_GET(self):  # noqa: N802
+        cls = type(self)
+        with cls.lock:
+            cls.hits.append(self.path)
+            first = self.path not in cls.seen
+            cls.seen.add(self.path)
+        if self.path == "/slow" or (self.path.startswith("/slow-first/") and first):
+            time.sleep(SLOW)
+        else:
+            time.sleep(FAST)
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def origin():
+    _DelayingOrigin.seen = set()
+    _DelayingOrigin.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _DelayingOrigin)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def session():
+    with requests.Session() as session:
+        yield session
+
+def _get(policy, session, url):
+    timeout = policy.timeout_for(url)
+    return policy.send(url, lambda: session.get(url, timeout=timeout))
+
+def _warm(policy, session, origin, count=10):
+    for _ in range(count):
+        _get(policy, session, origin + "/fast")
+
+def _seed(origin, seconds=0.1, count=10):
+    # A host that usually answers within `seconds`; hedges go out after that
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(count):
+        tracker.observe(origin + "/fast", seconds)
+    return tracker
+
+def test_adaptive_timeouts_follow_observed_latency(origin, session):
+    policy = LatencyPolicy(max_timeout=10, min_timeout=0.1, tracker=LatencyTracker(min_samples=5))
+    # Too few samples yet: the configured timeout
+    assert policy.timeout_for(origin + "/fast") == 10
+
+    _warm(policy, session, origin)
+    connect, read = policy.timeout_for(origin + "/fast")
+
+    assert 0.1 <= connect <= read < 1
+    # A request far slower than the host's usual latency times out early
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        _get(policy, session, origin + "/slow")
+    assert time.monotonic() - started < SLOW
+
+def test_hedges_stop_when_the_budget_is_spent(origin, session):
+    # No refill: exactly the initial burst of 5 hedges is available
+    policy = LatencyPolicy(
+        max_timeout=10,
+        adaptive_timeouts=False,
+        hedge=True,
+        hedge_quantile=0.5,
+        hedge_budget=0.0,
+        max_workers=8,
+        tracker=_seed(origin),
+    )
+    try:
+        for i in range(7):
+            response = _get(policy, session, f"{origin}/slow-first/{i}")
+            assert response.text == f"/slow-first/{i}"
+        # Let the losing requests finish before counting hits
+        time.sleep(SLOW)
+    finally:
+        policy.close()
+
+    assert policy.hedges_sent == 5
+    assert policy.hedges_won == 5
+    hits = [path for path in _DelayingOrigin.hits if path.startswith("/slow-first/")]
+    assert len(hits) == 5 * 2 + 2
+
+def test_unfinished_hedges_are_capped_at_max_workers(origin, session):
+    policy = LatencyPolicy(
+        max_timeout=10,
+        adaptive_timeouts=False,
+        hedge=True,
+        hedge_quantile=0.5,
+        max_workers=1,
+        tracker=_seed(origin),
+    )
+    try:
+        _get(policy, session, origin + "/slow-first/a")
+        # The first pair's slow primary still holds the only hedge slot
+        started = time.monotonic()
+        _get(policy, session, origin + "/slow-first/b")
+        elapsed = time.monotonic() - started
+    finally:
+        policy.close()
+
+    assert policy.hedges_sent == 1
+    assert elapsed >= SLOW * 0.9
+
+def test_time_queued_for_the_pool_does_not_trigger_hedges(origin, session):
+    policy = LatencyPolicy(
+        max_timeout=10,
+        adaptive_timeouts=False,
+        hedge=True,
+        hedge_quantile=0.5,
+        max_workers=1,
+        tracker=_seed(origin),
+    )
+    # Other fetches hold both pool threads for longer than the hedge delay
+    busy = threading.Event()
+    for _ in range(2):
+        policy._pool.submit(busy.wait, 10)
+    threading.Timer(0.3, busy.set).start()
+    try:
+        response = _get(policy, session, origin + "/fast")
+    finally:
+        busy.set()
+        policy.close()
+
+    assert response.text == "/fast"
+    assert policy.hedges_sent == 0
@@ -0,0 +1,133 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import main  # type: ignore
+from pipelines.output_sinks import (  # type: ignore
+    HOURS_DAYS,
+    ArrowSink,
+    CsvSink,
+    SqliteSink,
+    check_output_format,
+    csv_columns,
+    write_records,
+)
+
+SAMPLE_OUTPUT = os.path.join(os.path.dirname(__file__), os.pardir, "data", "sample_output.json")
+
+def _records() -> list:
+    with open(SAMPLE_OUTPUT, "r", encoding="utf-8") as f:
+        sample = json.load(f)[0]
+    retried = dict(sample, url=sample["url"] + "-2", fetchRetries=2, throttledSeconds=1.5)
+    failed = {"url": "https://www.yelp.com/biz/missing", "is_page_not_found": True, "error": "HTTP 503"}
+    return [sample, retried, failed]
+
+def test_csv_round_trip(tmp_path):
+    path = str(tmp_path / "out.csv")
+    records = _records()
+    assert write_records(records, path, "csv") == 3
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert reader.fieldnames == csv_columns()
+    assert [f"hours_{day}" for day in HOURS_DAYS] == [name for name in reader.fieldnames if name.startswith("hours")]
+
+    sample, retried, failed = rows
+    for day in HOURS_DAYS:
+        assert sample[f"hours_{day}"] == records[0]["hours"].get(day, "")
+    assert sample["images"].split("\n") == records[0]["images"]
+    assert json.loads(sample["businessServices"]) == records[0]["businessServices"]
+    assert sample["is_page_not_found"] == "False"
+    assert (retried["fetchRetries"], retried["throttledSeconds"]) == ("2", "1.5")
+    # Missing fields are empty cells
+    assert (failed["error"], failed["title"], failed["hours_Mon"]) == ("HTTP 503", "", "")
+
+def test_sqlite_types_and_json_columns(tmp_path):
+    path = str(tmp_path / "out.sqlite")
+    records = _records()
+    assert write_records(records, path, "sqlite", batch_size=2) == 3
+
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT url, typeof(is_page_not_found), is_page_not_found, typeof(fetchRetries), "
+            "typeof(throttledSeconds), json_extract(hours, '$.Mon'), json_extract(images, '$[1]'), "
+            "json_extract(businessServices, '$.\"Offers Delivery\"') FROM businesses ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    sample, retried, failed = records
+    assert rows[0] == (
+        sample["url"], "integer", 0, "null", "null", sample["hours"]["Mon"], sample["images"][1], 1
+    )
+    assert rows[1][:5] == (retried["url"], "integer", 0, "integer", "real")
+    assert rows[2] == (failed["url"], "integer", 1, "null", "null", None, None, None)
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_arrow_schema_round_trip(tmp_path, file_format):
+    pa = pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"out.{file_format}")
+    records = _records()
+    assert write_records(records, path, file_format, batch_size=2) == 3
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+    else:
+        with pa.OSFile(path, "rb") as source:
+            table = pa.ipc.open_file(source).read_all()
+
+    schema = table.schema
+    assert schema.field("images").type == pa.list_(pa.string())
+    assert schema.field("hours").type == pa.map_(pa.string(), pa.string())
+    assert schema.field("businessServices").type == pa.map_(pa.string(), pa.bool_())
+    assert schema.field("is_page_not_found").type == pa.bool_()
+    assert schema.field("fetchRetries").type == pa.int64()
+    assert schema.field("throttledSeconds").type == pa.float64()
+
+    rows = table.to_pylist()
+    assert rows[0]["images"] == records[0]["images"]
+    assert dict(rows[0]["hours"]) == records[0]["hours"]
+    assert dict(rows[0]["businessServices"]) == records[0]["businessServices"]
+    assert (rows[1]["fetchRetries"], rows[1]["throttledSeconds"]) == (2, 1.5)
+    assert (rows[2]["is_page_not_found"], rows[2]["hours"]) == (True, None)
+
+@pytest.mark.parametrize("sink_class, name", [(CsvSink, "out.csv"), (SqliteSink, "out.sqlite"), (ArrowSink, "out.parquet")])
+def test_failed_write_discards_the_tmp_file(tmp_path, sink_class, name):
+    if sink_class is ArrowSink:
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("previous run")
+
+    with pytest.raises(RuntimeError):
+        with sink_class(path, batch_size=1) as sink:
+            sink.write(_records()[0])
+            raise RuntimeError("scrape failed")
+
+    assert not os.path.exists(path + ".tmp")
+    # The previous output is left as it was
+    with open(path, "r", encoding="utf-8") as f:
+        assert f.read() == "previous run"
+
+@pytest.mark.parametrize("output", ["out.parquet", "out.arrow"])
+def test_missing_pyarrow_exits_before_scraping(tmp_path, monkeypatch, output):
+    # A None entry makes `import pyarrow` raise ImportError
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setattr(main, "iter_input_urls", pytest.fail)
+    monkeypatch.setattr(sys, "argv", ["main.py", "-o", str(tmp_path / output)])
+
+    with pytest.raises(ImportError, match="pyarrow"):
+        check_output_format(output.rsplit(".", 1)[1])
+    check_output_format("csv")
+    with pytest.raises(SystemExit) as exc_info:
+        main.main()
+    assert exc_info.value.code == 1
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,150 @@
+import argparse
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import main  # type: ignore
+from main import write_output_stream  # type: ignore
+from pipelines.checkpoint import Checkpoint, checkpoint_path_for, record_status  # type: ignore
+from pipelines.output_writers import JsonlWriter, iter_jsonl  # type: ignore
+
+def _record(i: int) -> dict:
+    return {"url": f"https://example.com/biz/business-{i}", "name": f"Business {i}"}
+
+def _torn_output(path: str) -> None:
+    """Two whole records and half of a third, as a crash mid-write leaves them."""
+    lines = [json.dumps(_record(i)) + "\n" for i in range(3)]
+    data = "".join(lines[:2]) + lines[2][: len(lines[2]) // 2]
+    if path.endswith(".gz"):
+        # A gzip stream cut off after a sync flush, without its trailer
+        raw = io.BytesIO()
+        stream = gzip.GzipFile(fileobj=raw, mode="wb")
+        stream.write(data.encode("utf-8"))
+        stream.flush()
+        with open(path, "wb") as f:
+            f.write(raw.getvalue())
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+def test_resume_after_torn_last_line(tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    _torn_output(output)
+    checkpoint = Checkpoint(checkpoint_path_for(output))
+    for i in range(2):
+        checkpoint.mark(_record(i)["url"], "ok")
+    checkpoint.close()
+
+    checkpoint = Checkpoint(checkpoint_path_for(output)).load()
+    settings = {"flush_every": 1, "fsync": False}
+    write_output_stream(iter([_record(2), _record(3)]), output, settings, checkpoint=checkpoint, append=True)
+
+    assert [record["url"] for record in iter_jsonl(output)] == [_record(i)["url"] for i in range(4)]
+
+def test_gzip_append_after_torn_last_line(tmp_path):
+    output = str(tmp_path / "out.jsonl.gz")
+    _torn_output(output)
+    with JsonlWriter(output, fsync=False, append=True) as writer:
+        writer.write(_record(2))
+
+    assert [record["url"] for record in iter_jsonl(output)] == [_record(i)["url"] for i in range(3)]
+
+def test_append_keeps_complete_output(tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    with JsonlWriter(output, fsync=False) as writer:
+        writer.write(_record(0))
+    with JsonlWriter(output, fsync=False, append=True) as writer:
+        writer.write(_record(1))
+
+    assert [record["url"] for record in iter_jsonl(output)] == [_record(i)["url"] for i in range(2)]
+
+# Writes 99 records with long URLs, then dies before the first batch flush
+_KILLED_RUN = textwrap.dedent(
+    """
+    import os
+    import sys
+
+    sys.path.insert(0, sys.argv[1])
+    from main import write_output_stream
+    from pipelines.checkpoint import Checkpoint, checkpoint_path_for
+
+    def records():
+        for i in range(99):
+            yield {"url": "https://example.com/biz/business-%d?" % i + "x" * 400, "name": "Business %d" % i}
+        os._exit(1)
+
+    output = sys.argv[2]
+    settings = {"flush_every": 100, "fsync": False}
+    write_output_stream(records(), output, settings, checkpoint=Checkpoint(checkpoint_path_for(output)))
+    """
+)
+
+def _long_url(i: int) -> str:
+    return f"https://example.com/biz/business-{i}?" + "x" * 400
+
+def _resume_args(retry_failed: bool = False) -> argparse.Namespace:
+    return argparse.Namespace(resume=not retry_failed, retry_failed=retry_failed, output_format=None)
+
+def _stub_scrape(monkeypatch, scraped: list) -> None:
+    def iter_scrape_results(urls, settings, incremental=None):
+        for url in urls:
+            scraped.append(url)
+            yield {"url": url, "name": "fresh"}
+
+    monkeypatch.setattr(main, "iter_scrape_results", iter_scrape_results)
+
+def test_killed_run_resumes_without_losing_records(tmp_path, monkeypatch):
+    output = str(tmp_path / "out.jsonl")
+    src_dir = os.path.dirname(os.path.abspath(main.__file__))
+    subprocess.run([sys.executable, "-c", _KILLED_RUN, src_dir, output], check=False)
+
+    checkpoint = Checkpoint(checkpoint_path_for(output)).load()
+    written = {record["url"] for record in iter_jsonl(output)}
+    # The checkpoint may lag the output, never lead it
+    assert set(checkpoint.statuses) <= written
+
+    scraped: list = []
+    _stub_scrape(monkeypatch, scraped)
+    urls = [_long_url(i) for i in range(100)]
+    main.run(_resume_args(), {"flush_every": 10, "fsync": False}, iter(urls), output)
+
+    assert not set(scraped) & set(checkpoint.statuses)
+    assert {record["url"] for record in iter_jsonl(output)} == set(urls)
+    assert set(Checkpoint(checkpoint_path_for(output)).load().statuses) == set(urls)
+
+def test_retry_failed_rescrapes_only_error_records(tmp_path, monkeypatch):
+    output = str(tmp_path / "out.jsonl")
+    records = [_record(i) for i in range(4)]
+    for i in (1, 3):
+        records[i]["error"] = "HTTP 503"
+    checkpoint = Checkpoint(checkpoint_path_for(output))
+    with JsonlWriter(output, fsync=False, on_flush=checkpoint.flush) as writer:
+        for record in records:
+            writer.write(record)
+            checkpoint.mark(record["url"], record_status(record))
+    checkpoint.close()
+
+    scraped: list = []
+    _stub_scrape(monkeypatch, scraped)
+    urls = [_record(i)["url"] for i in range(4)]
+    main.run(_resume_args(retry_failed=True), {"fsync": False}, iter(urls), output)
+
+    assert scraped == [urls[1], urls[3]]
+    result = {record["url"]: record for record in iter_jsonl(output)}
+    assert sorted(result) == sorted(urls)
+    assert not any(record.get("error") for record in result.values())
+    assert not Checkpoint(checkpoint_path_for(output)).load().failed_urls()
+
+def test_checkpoint_fsync_follows_the_setting(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    for fsync in (False, True):
+        checkpoint = Checkpoint(str(tmp_path / f"{fsync}.checkpoint"), fsync=fsync)
+        checkpoint.mark(_record(0)["url"], "ok")
+        checkpoint.close()
+        assert len(synced) == int(fsync)
+    assert set(Checkpoint(str(tmp_path / "False.checkpoint")).load().statuses) == {_record(0)["url"]}
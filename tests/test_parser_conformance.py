@@ -0,0 +1,53 @@
+import glob
+import json
+import os
+
+import pytest
+
+from extractors.dom_backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS  # type: ignore
+from extractors.yelp_parser import parse_business_page  # type: ignore
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "data", "fixtures")
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def _mismatched(expected: dict, actual: dict) -> list:
+    return [
+        key
+        for key in expected
+        if json.dumps(expected[key], ensure_ascii=False) != json.dumps(actual.get(key), ensure_ascii=False)
+    ]
+
+def test_fixtures_exist():
+    assert FIXTURES
+
+# What the parser extracted from each fixture before the page index, which
+# must not change what any extractor sees
+def test_page_index_output_is_unchanged():
+    with open(os.path.join(FIXTURE_DIR, "expected_fields.json"), "r", encoding="utf-8") as f:
+        expected = json.load(f)
+
+    actual = {
+        os.path.basename(path): parse_business_page(_read(path), structured_data=False) for path in FIXTURES
+    }
+
+    assert json.dumps(actual, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+# Every backend must match the default one, in full and compact mode, and
+# with and without the structured-data pass
+@pytest.mark.parametrize("structured_data", [True, False], ids=["structured", "html-only"])
+@pytest.mark.parametrize("compact", [False, True], ids=["full", "compact"])
+@pytest.mark.parametrize("backend", PARSER_BACKENDS)
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_backends_extract_the_same_fields(path, backend, compact, structured_data):
+    html = _read(path)
+    try:
+        actual = parse_business_page(html, backend=backend, compact=compact, structured_data=structured_data)
+    except ImportError as exc:
+        pytest.skip(str(exc))
+    expected = parse_business_page(html, backend=DEFAULT_PARSER_BACKEND, structured_data=structured_data)
+
+    assert _mismatched(expected, actual) == []
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import extractors.rate_limiter as rate_limiter  # type: ignore
+from extractors.rate_limiter import HostRateLimiter, RetryPolicy, parse_retry_after  # type: ignore
+
+URL = "https://example.com/biz/business-0"
+
+class FakeClock:
+    """Stands in for the time module: sleeping only moves the clock."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+        self.slept: list = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+def test_bucket_spaces_requests_at_the_host_rate(clock):
+    limiter = HostRateLimiter(rate=2.0, burst=1.0)
+
+    waits = [limiter.acquire(URL) for _ in range(4)]
+
+    # The first request uses the burst token, the rest wait 1/rate each
+    assert waits == [0.0, 0.5, 0.5, 0.5]
+    assert clock.now == pytest.approx(1001.5)
+
+def test_hosts_have_separate_buckets(clock):
+    limiter = HostRateLimiter(rate=1.0)
+
+    assert limiter.acquire(URL) == 0.0
+    assert limiter.acquire("https://other.example.com/biz/a") == 0.0
+    assert limiter.acquire("https://EXAMPLE.com/biz/business-1") == pytest.approx(1.0)
+
+def test_throttling_halves_the_rate_once_per_interval(clock):
+    limiter = HostRateLimiter(rate=4.0, min_rate=0.5, decrease_interval=1.0)
+
+    # A burst of concurrent 429s is one signal
+    for _ in range(3):
+        limiter.record(URL, 429)
+    assert limiter.current_rate(URL) == 2.0
+
+    clock.now += 1.0
+    limiter.record(URL, 503)
+    assert limiter.current_rate(URL) == 1.0
+
+    for _ in range(3):
+        clock.now += 1.0
+        limiter.record(URL, 429)
+    assert limiter.current_rate(URL) == 0.5
+
+def test_success_raises_the_rate_up_to_the_cap(clock):
+    limiter = HostRateLimiter(rate=1.0, max_rate=1.2, increase=0.1)
+
+    limiter.record(URL, 200)
+    assert limiter.current_rate(URL) == pytest.approx(1.1)
+    for _ in range(5):
+        limiter.record(URL, 200)
+    assert limiter.current_rate(URL) == pytest.approx(1.2)
+    # Server errors neither raise nor cut the rate
+    limiter.record(URL, 500)
+    assert limiter.current_rate(URL) == pytest.approx(1.2)
+
+def test_retry_after_pauses_the_whole_host(clock):
+    limiter = HostRateLimiter(rate=10.0)
+    limiter.acquire(URL)
+
+    limiter.record(URL, 429, retry_after=30.0)
+
+    assert not limiter.try_acquire("https://example.com/biz/business-1")
+    assert limiter.acquire("https://example.com/biz/business-1") == pytest.approx(30.0)
+    assert limiter.try_acquire("https://other.example.com/biz/a")
+
+def test_parse_retry_after(clock):
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 7 ") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    later = datetime.fromtimestamp(clock.now + 45, tz=timezone.utc)
+    assert parse_retry_after(format_datetime(later, usegmt=True)) == pytest.approx(45.0)
+    earlier = datetime.fromtimestamp(clock.now - 45, tz=timezone.utc)
+    assert parse_retry_after(format_datetime(earlier, usegmt=True)) == 0.0
+
+def test_backoff_is_capped_and_prefers_retry_after(monkeypatch):
+    policy = RetryPolicy(max_retries=5, backoff_base=1.0, backoff_max=10.0)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+
+    assert [policy.delay(attempt) for attempt in range(6)] == [1.0, 2.0, 4.0, 8.0, 10.0, 10.0]
+    assert policy.delay(0, retry_after=3.0) == 3.0
+    assert policy.delay(0, retry_after=600.0) == 10.0
+
+class _Response:
+    def __init__(self, status_code: int, headers: dict) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.history: list = []
+        self.url = URL
+        self.text = "<html></html>"
+
+class _Session:
+    def __init__(self, statuses: list) -> None:
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.calls += 1
+        status = self.statuses.pop(0) if self.statuses else 429
+        return _Response(status, {"Retry-After": "2"} if status == 429 else {})
+
+def test_retries_stop_at_the_budget(clock, monkeypatch):
+    pytest.importorskip("requests")
+    import extractors.yelp_parser as yelp_parser  # type: ignore
+
+    monkeypatch.setattr(yelp_parser, "time", clock)
+    session = _Session([])
+    stats: dict = {}
+
+    html, status = yelp_parser.fetch_html(
+        URL, session, retry_policy=RetryPolicy(max_retries=3), limiter=HostRateLimiter(rate=100.0), stats=stats
+    )
+
+    assert (html, status) == (None, 429)
+    assert session.calls == 4
+    assert stats["retries"] == 3
+    # Every backoff honored Retry-After, and the host stayed paused for it
+    assert clock.slept.count(2.0) >= 3
+    assert stats["throttledSeconds"] >= 6.0
+
+def test_retry_recovers_within_the_budget(clock, monkeypatch):
+    pytest.importorskip("requests")
+    import extractors.yelp_parser as yelp_parser  # type: ignore
+
+    monkeypatch.setattr(yelp_parser, "time", clock)
+    session = _Session([503, 429, 200])
+    stats: dict = {}
+
+    html, status = yelp_parser.fetch_html(URL, session, retry_policy=RetryPolicy(max_retries=3), stats=stats)
+
+    assert (html, status) == ("<html></html>", 200)
+    assert session.calls == 3
+    assert stats["retries"] == 2
@@ -0,0 +1,137 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+import main  # type: ignore
+from pipelines.scrape_service import ScrapeService, parse_service_address  # type: ignore
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "tools"))
+
+from mock_server import MockConfig, MockServer  # type: ignore  # noqa: E402
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str) -> None:
+        super().__init__("localhost", timeout=30)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+def _serve(service: ScrapeService, address: str):
+    server = service.make_server(address)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def _post(conn: http.client.HTTPConnection, body, content_type: str = "application/json"):
+    data = json.dumps(body) if not isinstance(body, str) else body
+    conn.request("POST", "/scrape", body=data.encode("utf-8"), headers={"Content-Type": content_type})
+    return conn.getresponse()
+
+@pytest.fixture
+def echo_service():
+    release = threading.Event()
+
+    def scrape_batch(urls):
+        for i, url in enumerate(urls):
+            yield {"url": url, "n": i}
+            if i == 0:
+                # Hold the rest of the batch until the client saw the first line
+                release.wait(10)
+
+    service = ScrapeService(scrape_batch, max_batch=3)
+    server = _serve(service, "127.0.0.1:0")
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=30)
+    yield service, conn, release
+    release.set()
+    conn.close()
+    server.shutdown()
+    server.server_close()
+
+def test_parse_service_address():
+    assert parse_service_address("0.0.0.0:8080") == ("0.0.0.0", 8080)
+    assert parse_service_address(":9000") == ("127.0.0.1", 9000)
+    assert parse_service_address("unix:/run/scraper.sock") == "/run/scraper.sock"
+    for bad in ("unix:", "localhost", "localhost:http", ""):
+        with pytest.raises(ValueError):
+            parse_service_address(bad)
+
+def test_records_stream_back_in_request_order(echo_service):
+    service, conn, release = echo_service
+    urls = ["https://example.com/biz/a", "https://example.com/biz/b", "https://example.com/biz/c"]
+
+    response = _post(conn, {"urls": urls})
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("application/x-ndjson")
+    # The first record arrives while the rest of the batch is still running
+    first = json.loads(response.readline())
+    release.set()
+    rest = [json.loads(line) for line in response.read().decode("utf-8").splitlines()]
+
+    assert [record["url"] for record in [first] + rest] == urls
+    assert service.health()["urls"] == 3
+
+def test_plain_text_body_is_one_url_per_line(echo_service):
+    _, conn, release = echo_service
+    release.set()
+
+    response = _post(conn, "# comment\nhttps://example.com/biz/a\n\nhttps://example.com/biz/b\n", "text/plain")
+
+    assert [json.loads(line)["url"] for line in response.read().decode("utf-8").splitlines()] == [
+        "https://example.com/biz/a",
+        "https://example.com/biz/b",
+    ]
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        ("{not json", 400),
+        ({"urls": "https://example.com/biz/a"}, 400),
+        ({"urls": []}, 400),
+        ({"urls": [f"https://example.com/biz/{i}" for i in range(4)]}, 413),
+    ],
+)
+def test_bad_requests_are_rejected(echo_service, body, status):
+    service, conn, _ = echo_service
+
+    response = _post(conn, body)
+
+    assert response.status == status
+    assert "error" in json.loads(response.read())
+    assert service.health()["batches"] == 0
+
+def test_unix_socket_round_trip_against_the_mock_server(tmp_path):
+    mock = MockServer(("127.0.0.1", 0), MockConfig(size="small"))
+    threading.Thread(target=mock.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{mock.server_address[1]}"
+    urls = [f"{base_url}/biz/business-{i}" for i in range(6)] + [f"{base_url}/missing/business-6"]
+
+    settings = {"concurrent_requests": 4, "max_retries": 0, "user_agent": "test"}
+    context = main.ScrapeContext(settings)
+    service = ScrapeService(lambda batch: main.iter_scrape_results(batch, settings, context=context))
+    socket_path = str(tmp_path / "scraper.sock")
+    server = _serve(service, f"unix:{socket_path}")
+    try:
+        conn = _UnixConnection(socket_path)
+        response = _post(conn, {"urls": urls})
+        records = [json.loads(line) for line in response.read().decode("utf-8").splitlines()]
+        conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        context.close()
+        mock.shutdown()
+        mock.server_close()
+
+    assert response.status == 200
+    assert [record["url"] for record in records] == urls
+    assert all(record["title"] and not record["is_page_not_found"] for record in records[:-1])
+    assert records[-1]["is_page_not_found"]
+    assert mock.stats.snapshot()["requests"] == len(urls)
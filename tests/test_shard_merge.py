@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from pipelines.output_writers import (  # type: ignore
+    JsonlWriter,
+    iter_json_array,
+    iter_jsonl,
+    read_run_metadata,
+    write_json_array,
+    write_run_metadata,
+)
+from pipelines.shard_merge import _ShardStream, merge_shard_outputs  # type: ignore
+from pipelines.url_input import STDIN_PATH, iter_input_urls, shard_for_url  # type: ignore
+
+URLS = [f"https://example.com/biz/business-{i}" for i in range(12)]
+
+def _record(url: str, n: int = 0) -> dict:
+    return {"url": url, "title": f"Café {url[-2:]}", "n": n, "hours": {"Mon": "9 AM - 5 PM"}}
+
+def _write_shards(tmp_path, records, suffix=".jsonl", dedupe="exact", num_shards=2):
+    inputs = tmp_path / "urls.txt"
+    inputs.write_text("".join(record["url"] + "\n" for record in records), encoding="utf-8")
+    paths = []
+    for shard in range(num_shards):
+        path = str(tmp_path / f"shard-{shard}{suffix}")
+        # Later records first, as an appended --retry-failed pass leaves them
+        owned = [record for record in records if shard_for_url(record["url"], num_shards) == shard][::-1]
+        if suffix == ".jsonl":
+            with JsonlWriter(path, fsync=False) as writer:
+                for record in owned:
+                    writer.write(record)
+        else:
+            write_json_array(owned, path)
+        write_run_metadata(
+            path,
+            {
+                "shard": shard,
+                "num_shards": num_shards,
+                "inputs": [str(inputs)],
+                "input_dedupe": dedupe,
+                "input_dedupe_error_rate": 1e-4,
+            },
+        )
+        paths.append(path)
+    return paths
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".json"])
+def test_merge_restores_input_order(tmp_path, suffix):
+    records = [_record(url) for url in URLS]
+    output = str(tmp_path / "merged.jsonl")
+
+    stats = merge_shard_outputs(_write_shards(tmp_path, records, suffix), output)
+
+    assert list(iter_jsonl(output)) == records
+    assert stats == {"merged": len(URLS), "missing": 0, "unmatched": 0}
+    metadata = read_run_metadata(output)
+    assert metadata["input_dedupe_error_rate"] == 1e-4
+    assert metadata["merged_shards"] == [0, 1]
+
+def test_repeated_urls_keep_every_record_without_dedupe(tmp_path):
+    records = [_record(url, n) for n in range(2) for url in URLS[:4]]
+    output = str(tmp_path / "merged.jsonl")
+
+    stats = merge_shard_outputs(_write_shards(tmp_path, records, dedupe="none"), output)
+
+    merged = list(iter_jsonl(output))
+    assert sorted(json.dumps(record) for record in merged) == sorted(json.dumps(record) for record in records)
+    assert [record["url"] for record in merged] == [record["url"] for record in records]
+    assert stats["unmatched"] == 0
+
+def test_shards_in_other_formats_are_rejected(tmp_path):
+    path = str(tmp_path / "shard-0.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("url\n")
+    write_run_metadata(path, {"shard": 0, "num_shards": 1, "inputs": [], "output_format": "csv"})
+
+    with pytest.raises(ValueError, match="only json and jsonl shards"):
+        merge_shard_outputs([path], str(tmp_path / "merged.jsonl"))
+
+def test_json_array_is_read_in_chunks(tmp_path):
+    records = [_record(url, n) for n, url in enumerate(URLS)]
+    path = str(tmp_path / "records.json")
+    write_json_array(records, path)
+
+    # Chunks far smaller than one record
+    assert list(iter_json_array(path, chunk_size=7)) == records
+    empty = str(tmp_path / "empty.json")
+    write_json_array([], empty)
+    assert list(iter_json_array(empty, chunk_size=1)) == []
+
+def test_missing_url_reads_one_window_ahead(tmp_path):
+    path = str(tmp_path / "shard.jsonl")
+    with JsonlWriter(path, fsync=False) as writer:
+        for url in URLS:
+            writer.write(_record(url))
+    stream = _ShardStream(path, "jsonl", max_lookahead=3)
+
+    assert stream.take("https://example.com/biz/never-scraped") is None
+    assert sum(len(records) for records in stream._stash.values()) == 3
+    # The window drains as its URLs come up
+    assert [stream.take(url)["url"] for url in URLS] == URLS
+    assert not stream._stash and not list(stream.leftovers())
+
+def test_record_beyond_the_window_goes_to_the_end(tmp_path):
+    path = str(tmp_path / "shard.jsonl")
+    with JsonlWriter(path, fsync=False) as writer:
+        for url in URLS[1:] + URLS[:1]:
+            writer.write(_record(url))
+    stream = _ShardStream(path, "jsonl", max_lookahead=4)
+
+    assert stream.take(URLS[0]) is None
+    assert [stream.take(url)["url"] for url in URLS[1:]] == URLS[1:]
+    assert [record["url"] for record in stream.leftovers()] == URLS[:1]
+
+def test_sharding_refuses_stdin(tmp_path):
+    with pytest.raises(ValueError, match="stdin"):
+        iter_input_urls([STDIN_PATH], shard=(0, 2))
@@ -0,0 +1,75 @@
+import io
+import json
+
+import requests
+
+from extractors.streaming_fetch import (  # type: ignore
+    READ_COMPLETE,
+    READ_EARLY_STOP,
+    READ_NOT_FOUND,
+    StreamOptions,
+    read_body,
+)
+
+JSONLD = json.dumps({"@context": "https://schema.org", "@type": "Restaurant", "name": "Café Nuñez", "telephone": "+1-415-555-0100"})
+
+def _response(body: bytes, encoding=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    response.encoding = encoding
+    response.url = "https://www.yelp.com/biz/x"
+    return response
+
+def test_undeclared_charset_is_guessed_like_response_text():
+    html = "<html><head><title>Café Nuñez – Crème brûlée</title></head><body>"
+    html += "<p>Déjà vu à la française, très élégant.</p>" * 20 + "</body></html>"
+    body = html.encode("cp1252")
+
+    text, reason = read_body(_response(body), StreamOptions())
+
+    assert reason == READ_COMPLETE
+    assert text == _response(body).text
+    assert "�" not in text
+
+def test_declared_charset_is_used():
+    body = "<html><body>Café</body></html>".encode("utf-8")
+
+    assert read_body(_response(body, "utf-8"), StreamOptions()) == ("<html><body>Café</body></html>", READ_COMPLETE)
+
+def test_soft_404_after_the_first_chunk_is_not_found():
+    html = "<html><head>" + "<meta name='x' content='y'>" * 20 + "<title>Page Not Found - Yelp</title></head><body></body></html>"
+
+    _, reason = read_body(_response(html.encode("utf-8"), "utf-8"), StreamOptions(chunk_size=64))
+
+    assert reason == READ_NOT_FOUND
+
+def test_early_stop_waits_for_the_title():
+    # Structured data that covers the fields arrives before the soft-404 title
+    html = (
+        f'<html><head><script type="application/ld+json">{JSONLD}</script>'
+        + "<meta name='x' content='y'>" * 20
+        + "<title>Page Not Found - Yelp</title></head><body>"
+        + "<p>filler</p>" * 200
+        + "</body></html>"
+    )
+    options = StreamOptions(chunk_size=128, early_stop_fields=["title"])
+
+    _, reason = read_body(_response(html.encode("utf-8"), "utf-8"), options)
+
+    assert reason == READ_NOT_FOUND
+
+def test_early_stop_on_a_business_page():
+    html = (
+        f'<html><head><title>Café Nuñez</title><script type="application/ld+json">{JSONLD}</script></head>'
+        + "<body>"
+        + "<p>filler</p>" * 2000
+        + "</body></html>"
+    )
+    body = html.encode("utf-8")
+    options = StreamOptions(chunk_size=256, early_stop_fields=["title"])
+
+    text, reason = read_body(_response(body, "utf-8"), options)
+
+    assert reason == READ_EARLY_STOP
+    assert len(text) < len(html)
@@ -0,0 +1,33 @@
+import json
+
+from extractors.structured_data import extract_structured_data  # type: ignore
+
+PUBLISHER = {
+    "@context": "https://schema.org",
+    "@type": "Organization",
+    "name": "Yelp",
+    "url": "https://www.yelp.com",
+    "logo": "https://www.yelp.com/logo.png",
+    "telephone": "+1-415-908-3801",
+}
+BUSINESS = {
+    "@context": "https://schema.org",
+    "@type": "Restaurant",
+    "name": "Golden Gate Noodles",
+    "telephone": "+1-415-555-0100",
+    "priceRange": "$$",
+}
+
+def _page(*blocks: dict) -> str:
+    scripts = "".join(f'<script type="application/ld+json">{json.dumps(block)}</script>' for block in blocks)
+    return f"<html><head>{scripts}</head><body></body></html>"
+
+def test_publisher_organization_is_not_the_business():
+    fields = extract_structured_data(_page(PUBLISHER, BUSINESS))
+
+    assert fields["title"] == "Golden Gate Noodles"
+    assert fields["phoneNumber"] == "(415) 555-0100"
+    assert fields["priceLevel"] == "$$"
+
+def test_organization_alone_yields_nothing():
+    assert extract_structured_data(_page(PUBLISHER)) == {}
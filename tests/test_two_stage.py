@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import main  # type: ignore
+from pipelines.parse_stage import FetchedPage  # type: ignore
+
+URLS = [f"https://example.com/biz/business-{i}" for i in range(20)]
+CRASH_URL = URLS[3]
+
+def crashing_parse(page, options):
+    if page.url == CRASH_URL:
+        # What an OOM kill or a segfault in a parser extension looks like
+        os._exit(1)
+    return {"url": page.url}
+
+def plain_parse(page, options):
+    return {"url": page.url}
+
+def fake_fetch(url, context):
+    return FetchedPage(url, "<html></html>", 200)
+
+def _scrape(monkeypatch, context, urls):
+    monkeypatch.setattr(main, "build_record", crashing_parse)
+    monkeypatch.setattr(main, "fetch_page", fake_fetch)
+    return list(main._iter_two_stage(urls, context, fetch_workers=2, parse_workers=2))
+
+def test_crashed_parse_worker_does_not_abort_the_run(monkeypatch):
+    context = main.ScrapeContext({})
+    try:
+        records = _scrape(monkeypatch, context, URLS)
+    finally:
+        context.close()
+
+    assert [record["url"] for record in records] == URLS
+    assert records[3].get("error")
+    # Pages submitted after the crash go to a fresh pool
+    assert not records[-1].get("error")
+
+def test_service_pool_is_replaced_after_a_crash(monkeypatch):
+    context = main.ScrapeContext({})
+    context.parse_pool = ProcessPoolExecutor(max_workers=2)
+    try:
+        # The crash is the batch's last page, so the broken pool outlives it
+        _scrape(monkeypatch, context, URLS[:4])
+        monkeypatch.setattr(main, "build_record", plain_parse)
+        records = list(main._iter_two_stage(URLS[:2], context, fetch_workers=2, parse_workers=2))
+    finally:
+        context.parse_pool.shutdown()
+        context.close()
+
+    assert not any(record.get("error") for record in records)
+
+def test_concurrent_batches_replace_a_broken_pool_once(monkeypatch):
+    import threading
+    from concurrent.futures import process
+
+    context = main.ScrapeContext({})
+    context.parse_pool = ProcessPoolExecutor(max_workers=2)
+    _scrape(monkeypatch, context, URLS[:4])
+    broken = context.parse_pool
+
+    created = []
+
+    class CountingPool(process.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(process, "ProcessPoolExecutor", CountingPool)
+    monkeypatch.setattr(main, "build_record", plain_parse)
+    results = {}
+    start = threading.Barrier(4)
+
+    def batch(name):
+        start.wait()
+        results[name] = list(main._iter_two_stage(URLS, context, fetch_workers=2, parse_workers=2))
+
+    threads = [threading.Thread(target=batch, args=(i,)) for i in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+    finally:
+        for pool in created:
+            pool.shutdown()
+        context.close()
+
+    # Every batch moved to the one replacement pool
+    assert len(created) == 1
+    assert context.parse_pool is created[0] is not broken
+    assert len(results) == 4
+    assert not any(record.get("error") for records in results.values() for record in records)
@@ -0,0 +1,60 @@
+import gzip
+import sys
+
+import pytest
+
+from pipelines.url_input import ScalableBloomFilter, iter_input_urls  # type: ignore
+
+def _write(path, text: str) -> str:
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_bad_column_in_a_later_source_fails_before_any_url(tmp_path):
+    first = _write(tmp_path / "first.txt", "https://example.com/biz/a\n")
+    second = _write(tmp_path / "second.csv", "name,link\nB,https://example.com/biz/b\n")
+
+    with pytest.raises(ValueError, match="Column 'url' not found"):
+        iter_input_urls([first, second])
+
+def test_missing_decompressor_fails_before_any_url(tmp_path, monkeypatch):
+    first = _write(tmp_path / "first.txt", "https://example.com/biz/a\n")
+    second = str(tmp_path / "second.txt.zst")
+    (tmp_path / "second.txt.zst").write_bytes(b"\x28\xb5\x2f\xfd")
+    # An entry of None makes the import fail whether or not it is installed
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+
+    with pytest.raises(ImportError, match="zstandard"):
+        iter_input_urls([first, second])
+
+def test_corrupt_gzip_fails_before_any_url(tmp_path):
+    first = _write(tmp_path / "first.txt", "https://example.com/biz/a\n")
+    second = str(tmp_path / "second.txt.gz")
+    (tmp_path / "second.txt.gz").write_bytes(b"not gzip at all")
+
+    with pytest.raises(ValueError, match="Cannot read URL source"):
+        iter_input_urls([first, second])
+
+def test_sources_are_read_in_order_and_deduplicated(tmp_path):
+    first = _write(tmp_path / "first.txt", "# seeds\nhttps://example.com/biz/a\nhttps://EXAMPLE.com/biz/a\n")
+    second = str(tmp_path / "second.csv.gz")
+    with gzip.open(second, "wt", encoding="utf-8") as f:
+        f.write("name,URL\nB,https://example.com/biz/b\nA,https://example.com/biz/a\n")
+
+    assert list(iter_input_urls([first, second])) == ["https://example.com/biz/a", "https://example.com/biz/b"]
+    assert len(list(iter_input_urls([first, second], dedupe="none"))) == 4
+
+def test_bloom_filter_has_no_false_negatives_and_keeps_its_error_bound():
+    error_rate = 1e-3
+    bloom = ScalableBloomFilter(error_rate=error_rate, initial_capacity=1000)
+    added = [f"https://example.com/biz/added-{i}" for i in range(20_000)]
+    for url in added:
+        bloom.add_if_new(url)
+
+    # Growing past the initial capacity added stages instead of overfilling one
+    assert len(bloom._filters) == 3
+    assert all(url in bloom for url in added)
+    assert not any(bloom.add_if_new(url) for url in added)
+
+    probes = 200_000
+    false_positives = sum(f"https://example.com/biz/other-{i}" in bloom for i in range(probes))
+    assert false_positives / probes < error_rate
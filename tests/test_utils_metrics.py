@@ -0,0 +1,133 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from extractors import yelp_parser  # type: ignore
+from extractors.utils_metrics import (  # type: ignore
+    BUCKETS,
+    MetricsRegistry,
+    PeriodicExporter,
+    disable_metrics,
+    enable_metrics,
+)
+from pipelines.parse_stage import FetchedPage, ParseOptions, build_record_measured  # type: ignore
+
+FIXTURE = os.path.join(os.path.dirname(__file__), os.pardir, "data", "fixtures", "claimed_bakery.html")
+
+@pytest.fixture
+def registry():
+    yield enable_metrics(fresh=True)
+    disable_metrics()
+
+def _fixture_html() -> str:
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return f.read()
+
+def test_page_text_is_timed_before_the_extractors(registry, monkeypatch):
+    seen = []
+
+    def review_count(page):
+        # Already flattened, so none of it is billed to this extractor
+        seen.append((page._text is not None, page._text_lower is not None))
+        return None
+
+    monkeypatch.setitem(yelp_parser._FIELD_EXTRACTORS, "reviewCount", review_count)
+    yelp_parser.parse_business_page(_fixture_html(), structured_data=False)
+
+    assert seen == [(True, True)]
+    assert registry.summary()["parse.page_text"]["count"] == 1
+
+def test_page_text_is_not_flattened_for_fields_that_skip_it(registry):
+    yelp_parser.parse_business_page(_fixture_html(), structured_data=False, fields=("title", "images"))
+
+    assert "parse.page_text" not in registry.summary()
+
+def test_histogram_buckets_and_quantiles():
+    registry = MetricsRegistry()
+    for _ in range(10):
+        registry.observe("stage", 0.0003)
+        registry.observe("stage", 0.02)
+    registry.observe("edge", BUCKETS[6])
+    registry.observe("overflow", 100.0)
+    histograms = registry._histograms
+
+    stage = histograms["stage"]
+    assert stage.counts[BUCKETS.index(0.0005)] == 10 and stage.counts[BUCKETS.index(0.025)] == 10
+    # Interpolated inside the bucket holding the rank, capped at the maximum
+    assert stage.quantile(0.25) == pytest.approx(0.000375)
+    assert stage.quantile(0.75) == pytest.approx(0.0175)
+    assert stage.quantile(1.0) == pytest.approx(0.02)
+    # A value on a bound belongs to that bucket (Prometheus "le")
+    assert histograms["edge"].counts[6] == 1
+    # Past the last bound the maximum stands in as the upper edge
+    assert histograms["overflow"].counts[-1] == 1
+    assert histograms["overflow"].quantile(0.5) == pytest.approx(BUCKETS[-1] + (100.0 - BUCKETS[-1]) / 2)
+    assert MetricsRegistry().summary() == {}
+
+    summary = registry.summary()["stage"]
+    assert summary["count"] == 20
+    assert summary["mean_ms"] == pytest.approx(10.15)
+    assert summary["max_ms"] == pytest.approx(20.0)
+
+def test_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe("fetch", 0.001)
+    registry.observe("fetch", 0.2)
+    registry.observe("fetch", 120.0)
+
+    lines = registry.prometheus_text().splitlines()
+
+    assert lines[:2] == [
+        "# HELP yelp_scraper_stage_seconds Time spent in each scrape pipeline stage.",
+        "# TYPE yelp_scraper_stage_seconds histogram",
+    ]
+    assert 'yelp_scraper_stage_seconds_bucket{stage="fetch",le="0.001"} 1' in lines
+    assert 'yelp_scraper_stage_seconds_bucket{stage="fetch",le="0.1"} 1' in lines
+    assert 'yelp_scraper_stage_seconds_bucket{stage="fetch",le="0.25"} 2' in lines
+    assert 'yelp_scraper_stage_seconds_bucket{stage="fetch",le="60.0"} 2' in lines
+    assert 'yelp_scraper_stage_seconds_bucket{stage="fetch",le="+Inf"} 3' in lines
+    assert lines[-2:] == [
+        'yelp_scraper_stage_seconds_sum{stage="fetch"} 120.201000',
+        'yelp_scraper_stage_seconds_count{stage="fetch"} 3',
+    ]
+
+def test_worker_timings_merge_into_the_parent(registry):
+    page = FetchedPage("https://www.yelp.com/biz/claimed-bakery", _fixture_html(), 200)
+    registry.observe("fetch", 0.01)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(build_record_measured, [page] * 3, [ParseOptions()] * 3))
+    for _, timings in results:
+        registry.merge(timings)
+
+    summary = registry.summary()
+    assert summary["fetch"]["count"] == 1
+    assert summary["parse.build_document"]["count"] == 3
+    assert summary["parse.page_text"]["count"] == 3
+    # drain() hands the state over and starts again
+    assert set(registry.drain()) == set(summary)
+    assert registry.summary() == {}
+
+def test_periodic_export_rewrites_both_files(tmp_path):
+    registry = MetricsRegistry()
+    prefix = str(tmp_path / "metrics" / "run")
+    exporter = PeriodicExporter(registry, prefix, interval=0.02).start()
+    try:
+        registry.observe("fetch", 0.5)
+        deadline = time.monotonic() + 5
+        stages: dict = {}
+        while time.monotonic() < deadline and "fetch" not in stages:
+            time.sleep(0.02)
+            if os.path.exists(prefix + ".json"):
+                with open(prefix + ".json", "r", encoding="utf-8") as f:
+                    stages = json.load(f)["stages"]
+    finally:
+        exporter.stop()
+
+    assert stages["fetch"]["count"] == 1
+    with open(prefix + ".prom", "r", encoding="utf-8") as f:
+        assert 'yelp_scraper_stage_seconds_count{stage="fetch"} 1' in f.read()
+    assert sorted(os.listdir(tmp_path / "metrics")) == ["run.json", "run.prom"]
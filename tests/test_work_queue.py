@@ -0,0 +1,95 @@
+import multiprocessing
+import time
+
+from pipelines.work_queue import JOB_DONE, JOB_FAILED, WorkQueue  # type: ignore
+
+URLS = [f"https://example.com/biz/business-{i}" for i in range(40)]
+
+def _queue(tmp_path, **kwargs) -> WorkQueue:
+    return WorkQueue(str(tmp_path / "queue.sqlite"), **kwargs)
+
+def test_lease_and_complete_in_enqueue_order(tmp_path):
+    with _queue(tmp_path) as queue:
+        assert queue.enqueue(URLS[:5]) == 5
+        # Already queued URLs are not added twice
+        assert queue.enqueue(URLS[:6]) == 1
+
+        first = queue.lease("a", 2)
+        second = queue.lease("b", 10)
+        assert [url for _, url in first] == URLS[:2]
+        assert [url for _, url in second] == URLS[2:6]
+        assert queue.lease("c", 10) == []
+
+        assert queue.complete("a", [(job_id, f'"{url}"', False) for job_id, url in first]) == 2
+        # Jobs leased by another worker are not this worker's to complete
+        assert queue.complete("a", [(second[0][0], '"stolen"', False)]) == 0
+        assert queue.complete("b", [(job_id, f'"{url}"', False) for job_id, url in second]) == 4
+
+        assert queue.is_drained()
+        assert [(url, status) for url, status, _ in queue.iter_results()] == [(url, JOB_DONE) for url in URLS[:6]]
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    with _queue(tmp_path, lease_seconds=0.05, max_attempts=2) as queue:
+        queue.enqueue(URLS[:1])
+        [(job_id, url)] = queue.lease("stalled", 1)
+        assert queue.lease("other", 1) == []
+
+        time.sleep(0.1)
+        assert queue.lease("other", 1) == [(job_id, url)]
+        # The stalled worker lost the job; its late result is dropped
+        assert queue.complete("stalled", [(job_id, '"late"', False)]) == 0
+        assert queue.complete("other", [(job_id, '"ok"', False)]) == 1
+        assert list(queue.iter_results()) == [(url, JOB_DONE, '"ok"')]
+
+def test_jobs_fail_after_max_attempts(tmp_path):
+    with _queue(tmp_path, lease_seconds=0.05, max_attempts=2) as queue:
+        queue.enqueue(URLS[:2])
+        (expiring, _), (retried, _) = queue.lease("a", 2)
+        # A retryable result goes back to pending while attempts remain
+        assert queue.complete("a", [(retried, '"error"', True)]) == 1
+        assert [job_id for job_id, _ in queue.lease("a", 1)] == [retried]
+        queue.complete("a", [(retried, '"error"', True)])
+
+        time.sleep(0.1)
+        [(job_id, _)] = queue.lease("b", 2)
+        assert job_id == expiring
+        time.sleep(0.1)
+        assert queue.lease("b", 2) == []
+
+        assert queue.counts()[JOB_FAILED] == 2
+        assert queue.is_drained()
+        assert queue.requeue_failed() == 2
+        assert len(queue.lease("c", 2)) == 2
+
+def _work(path: str, worker_id: str, leased) -> None:
+    with WorkQueue(path) as queue:
+        while True:
+            jobs = queue.lease(worker_id, 3)
+            if not jobs:
+                return
+            leased.extend([url for _, url in jobs])
+            time.sleep(0.01)
+            queue.complete(worker_id, [(job_id, f'"{worker_id}"', False) for job_id, _ in jobs])
+
+def test_two_workers_share_one_queue(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    with WorkQueue(path) as queue:
+        queue.enqueue(URLS)
+
+    with multiprocessing.Manager() as manager:
+        leased = {worker: manager.list() for worker in ("w1", "w2")}
+        workers = [multiprocessing.Process(target=_work, args=(path, worker, leased[worker])) for worker in leased]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(30)
+        assert all(process.exitcode == 0 for process in workers)
+        by_worker = {worker: list(urls) for worker, urls in leased.items()}
+
+    # Every job was leased exactly once, and both workers got some
+    assert sorted(by_worker["w1"] + by_worker["w2"]) == sorted(URLS)
+    assert by_worker["w1"] and by_worker["w2"]
+    with WorkQueue(path) as queue:
+        results = list(queue.iter_results())
+    assert [url for url, _, _ in results] == URLS
+    assert all(status == JOB_DONE for _, status, _ in results)
@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+for path in (SRC_DIR, os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from extractors import yelp_parser  # type: ignore
+from extractors.dom_backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, build_document  # type: ignore
+from extractors.field_mapper import map_raw_to_business, map_raw_to_record  # type: ignore
+from pipelines.data_cleaner import clean_business_record, clean_record  # type: ignore
+from synthetic_pages import PAGE_SIZES, generate_business_page  # type: ignore
+
+# Pages generated per size profile; huge pages are expensive enough that a
+# handful gives stable numbers.
+DEFAULT_PAGES = {"small": 40, "typical": 20, "huge": 4}
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure(
+    name: str,
+    size: str,
+    inputs: Sequence[Any],
+    func: Callable[[Any], Any],
+    repeat: int,
+) -> Dict[str, Any]:
+    """Time func over every input `repeat` times, then trace one pass for peak memory."""
+    func(inputs[0])  # warm caches and lazy imports
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "target": name,
+        "size": size,
+        "calls": len(latencies),
+        "pages_per_sec": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def available_backends() -> List[str]:
+    backends: List[str] = []
+    for backend in PARSER_BACKENDS:
+        try:
+            build_document("<html></html>", backend)
+        except ImportError:
+            continue
+        backends.append(backend)
+    return backends
+
+def extractor_targets() -> Dict[str, Callable[[Any], Any]]:
+    targets: Dict[str, Callable[[Any], Any]] = {
+        func.__name__: func for func in yelp_parser._FIELD_EXTRACTORS.values()
+    }
+    targets["_extract_address_block"] = yelp_parser._extract_address_block
+    return dict(sorted(targets.items()))
+
+def run_size(size: str, pages: int, repeat: int, backends: Sequence[str], extractors: bool) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    html_pages = [generate_business_page(seed, size) for seed in range(pages)]
+    jsonld_pages = [generate_business_page(seed, size, jsonld=True) for seed in range(pages)]
+
+    for backend in backends:
+        results.append(
+            measure(
+                f"parse_business_page[{backend}]",
+                size,
+                html_pages,
+                lambda page, b=backend: yelp_parser.parse_business_page(page, backend=b),
+                repeat,
+            )
+        )
+        results.append(
+            measure(
+                f"parse_business_page[{backend},compact]",
+                size,
+                html_pages,
+                lambda page, b=backend: yelp_parser.parse_business_page(page, backend=b, compact=True),
+                repeat,
+            )
+        )
+        results.append(
+            measure(
+                f"parse_business_page[{backend},jsonld]",
+                size,
+                jsonld_pages,
+                lambda page, b=backend: yelp_parser.parse_business_page(page, backend=b),
+                repeat,
+            )
+        )
+
+    results.append(
+        measure(
+            f"build_page_index[{DEFAULT_PARSER_BACKEND}]",
+            size,
+            html_pages,
+            lambda page: yelp_parser._PageIndex(build_document(page, DEFAULT_PARSER_BACKEND)),
+            repeat,
+        )
+    )
+
+    if extractors:
+        indexes = [yelp_parser._PageIndex(build_document(page, DEFAULT_PARSER_BACKEND)) for page in html_pages]
+        # Flattening is cached on the index, so it gets its own rows and
+        # every extractor is measured with the text already flattened,
+        # whatever order they run in
+        results.append(measure("page_text", size, indexes, lambda index: index.document.text(" "), repeat))
+        results.append(measure("page_text_lower", size, indexes, lambda index: index.text.lower(), repeat))
+        for index in indexes:
+            index.flatten_text(lower=True)
+        for name, func in extractor_targets().items():
+            results.append(measure(name, size, indexes, func, repeat))
+
+    raw_records = [yelp_parser.parse_business_page(page) for page in html_pages]
+    results.append(
+        measure(
+            "map_raw_to_business",
+            size,
+            raw_records,
+            lambda raw: map_raw_to_business(raw, "https://www.yelp.com/biz/x", "2025-01-01 00:00:00", False),
+            repeat,
+        )
+    )
+    mapped = [map_raw_to_business(raw, "https://www.yelp.com/biz/x", "2025-01-01 00:00:00", False) for raw in raw_records]
+    results.append(measure("clean_business_record", size, mapped, clean_business_record, repeat))
+    results.append(
+        measure(
+            "map+clean+serialize[dict]",
+            size,
+            raw_records,
+            lambda raw: json.dumps(
+                clean_business_record(map_raw_to_business(raw, "https://www.yelp.com/biz/x", "2025-01-01 00:00:00", False)),
+                ensure_ascii=False,
+            ),
+            repeat,
+        )
+    )
+    results.append(
+        measure(
+            "map+clean+serialize[record]",
+            size,
+            raw_records,
+            lambda raw: clean_record(
+                map_raw_to_record(raw, "https://www.yelp.com/biz/x", "2025-01-01 00:00:00", False)
+            ).to_json(),
+            repeat,
+        )
+    )
+    return results
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results: Sequence[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    header = f"{'target':44} {'size':8} {'pages/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>10}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    for row in results:
+        line = (
+            f"{row['target']:44} {row['size']:8} {row['pages_per_sec'] or 0:>10.1f} "
+            f"{row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f} {row['peak_kib']:>10.1f}"
+        )
+        if baseline is not None:
+            previous = baseline.get(f"{row['target']}|{row['size']}")
+            if previous and previous.get("pages_per_sec") and row["pages_per_sec"]:
+                change = (row["pages_per_sec"] / previous["pages_per_sec"] - 1) * 100
+                line += f" {change:>+7.1f}%"
+            else:
+                line += f" {'-':>8}"
+        print(line)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline parse/map/clean benchmarks over a synthetic business-page corpus (no network)."
+    )
+    parser.add_argument("--sizes", nargs="+", choices=sorted(PAGE_SIZES), default=["small", "typical", "huge"])
+    parser.add_argument("--pages", type=int, default=None, help="Pages per size (default: 40/20/4 for small/typical/huge)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over each corpus (default: 3)")
+    parser.add_argument("--backends", nargs="+", choices=PARSER_BACKENDS, default=None, help="Default: every installed backend")
+    parser.add_argument("--no-extractors", action="store_true", help="Skip the per-extractor measurements")
+    parser.add_argument("--output", default=None, help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Earlier results file to report pages/sec changes against")
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    results: List[Dict[str, Any]] = []
+    for size in args.sizes:
+        pages = args.pages or DEFAULT_PAGES[size]
+        results.extend(run_size(size, pages, args.repeat, backends, not args.no_extractors))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {f"{row['target']}|{row['size']}": row for row in json.load(f)["results"]}
+    print_table(results, baseline)
+
+    if args.output:
+        report = {
+            "meta": {
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import argparse
+import logging
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from pipelines.output_writers import convert_jsonl_to_json  # type: ignore
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert streamed JSON Lines output (optionally .gz) into the indented JSON array format."
+    )
+    parser.add_argument("input", help="Path to a .jsonl or .jsonl.gz file")
+    parser.add_argument("output", help="Path of the JSON array file to write")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if not os.path.exists(args.input):
+        logging.error("Input file not found: %s", args.input)
+        return 1
+
+    convert_jsonl_to_json(args.input, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+MAIN_PATH = os.path.join(ROOT_DIR, "src", "main.py")
+MOCK_SERVER_PATH = os.path.join(ROOT_DIR, "tools", "mock_server.py")
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+from benchmark import git_revision  # type: ignore
+from mock_server import KIND_DRIP, KIND_NOT_FOUND, KIND_OVERSIZED, KIND_PAGE, KIND_SOFT_404  # type: ignore
+from synthetic_pages import PAGE_SIZES  # type: ignore
+
+def build_url_mix(base_url: str, count: int, size: str, rates: Dict[str, float], seed: int) -> List[str]:
+    """`count` mock URLs, each a distinct page, with kinds drawn at the given rates."""
+    rng = random.Random(seed)
+    urls: List[str] = []
+    for i in range(count):
+        roll = rng.random()
+        kind = KIND_PAGE
+        for candidate, rate in rates.items():
+            if roll < rate:
+                kind = candidate
+                break
+            roll -= rate
+        urls.append(f"{base_url}/{kind}/business-{i}?size={size}")
+    return urls
+
+def start_mock_server(server_args: Sequence[str]) -> Tuple[subprocess.Popen, str]:
+    process = subprocess.Popen(
+        [sys.executable, MOCK_SERVER_PATH, "--port", "0", *server_args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline() if process.stdout is not None else ""
+    if not line.startswith("Serving"):
+        process.kill()
+        raise RuntimeError(f"Mock server did not start: {line.strip() or 'no output'}")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+def mock_stats(base_url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(base_url + "/__stats", timeout=10) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+def _proc_tree_rss(root_pid: int) -> int:
+    """Resident bytes of a process and all its descendants (Linux /proc)."""
+    parents: Dict[int, int] = {}
+    rss: Dict[int, int] = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # After the command name: state, ppid, ... rss is field 24 overall
+        parents[int(entry)] = int(fields[1])
+        rss[int(entry)] = int(fields[21]) * page_size
+    total = 0
+    tree = {root_pid}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+    for pid in tree:
+        total += rss.get(pid, 0)
+    return total
+
+class RssSampler:
+    """Samples the summed RSS of a process tree (parse workers included) until stopped."""
+
+    def __init__(self, pid: int, interval: float = 0.1) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "RssSampler":
+        if os.path.isdir("/proc"):
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak, _proc_tree_rss(self.pid))
+            except (OSError, ValueError, IndexError):
+                pass
+            self._stop.wait(self.interval)
+
+    def stop(self) -> int:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        return self.peak
+
+def _stage(summary: Dict[str, Any], stage: str, key: str) -> Optional[float]:
+    values = summary.get("stages", {}).get(stage)
+    return values.get(key) if values else None
+
+def summarize_output(path: str) -> Dict[str, Any]:
+    records = errors = not_found = retries = 0
+    throttled = 0.0
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                records += 1
+                errors += 1 if record.get("error") else 0
+                not_found += 1 if record.get("is_page_not_found") and not record.get("error") else 0
+                retries += int(record.get("fetchRetries") or 0)
+                throttled += float(record.get("throttledSeconds") or 0)
+    return {
+        "records": records,
+        "errors": errors,
+        "not_found": not_found,
+        "retries": retries,
+        "throttled_seconds": round(throttled, 3),
+    }
+
+def run_scenario(
+    server_args: Sequence[str],
+    concurrency: int,
+    parse_workers: int,
+    size: str,
+    count: int,
+    rates: Dict[str, float],
+    cli_args: Sequence[str],
+    workdir: str,
+    seed: int,
+) -> Dict[str, Any]:
+    """Run the real CLI once against a fresh mock server and measure it."""
+    name = f"c{concurrency}-p{parse_workers}-{size}"
+    server, base_url = start_mock_server(server_args)
+    try:
+        urls = build_url_mix(base_url, count, size, rates, seed)
+        urls_path = os.path.join(workdir, f"{name}.txt")
+        output_path = os.path.join(workdir, f"{name}.jsonl")
+        metrics_prefix = os.path.join(workdir, f"{name}-metrics")
+        with open(urls_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(urls) + "\n")
+
+        command = [
+            sys.executable,
+            MAIN_PATH,
+            "-i",
+            urls_path,
+            "-o",
+            output_path,
+            "-c",
+            str(concurrency),
+            "--parse-workers",
+            str(parse_workers),
+            "--dedupe",
+            "none",
+            "--metrics",
+            metrics_prefix,
+            *cli_args,
+        ]
+        with open(os.path.join(workdir, f"{name}.log"), "w", encoding="utf-8") as log:
+            started = time.perf_counter()
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, cwd=ROOT_DIR)
+            sampler = RssSampler(process.pid).start()
+            # wait4 reports the largest single process's peak, even where
+            # /proc is not available to sample the whole tree
+            _, status, usage = os.wait4(process.pid, 0)
+            seconds = time.perf_counter() - started
+            process.returncode = os.waitstatus_to_exitcode(status)
+            tree_peak = sampler.stop()
+        served = mock_stats(base_url)
+    finally:
+        server.terminate()
+        server.wait()
+
+    metrics: Dict[str, Any] = {}
+    if os.path.exists(metrics_prefix + ".json"):
+        with open(metrics_prefix + ".json", "r", encoding="utf-8") as f:
+            metrics = json.load(f)
+    outcome = summarize_output(output_path)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "parse_workers": parse_workers,
+        "size": size,
+        "urls": count,
+        "exit_code": process.returncode,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(outcome["records"] / seconds, 2) if seconds else None,
+        "fetch_p50_ms": _stage(metrics, "fetch", "p50_ms"),
+        "fetch_p99_ms": _stage(metrics, "fetch", "p99_ms"),
+        "parse_p50_ms": _stage(metrics, "parse", "p50_ms"),
+        "parse_p99_ms": _stage(metrics, "parse", "p99_ms"),
+        "error_pct": round(100 * outcome["errors"] / count, 2),
+        "not_found_pct": round(100 * outcome["not_found"] / count, 2),
+        "missing_records": count - outcome["records"],
+        "retries": outcome["retries"],
+        "throttled_seconds": outcome["throttled_seconds"],
+        "server_requests": served["requests"],
+        "server_429s": served["byStatus"].get("429", 0),
+        "peak_rss_mb": round(max(tree_peak, max_rss) / (1024 * 1024), 1),
+    }
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+def print_table(results: Sequence[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    header = (
+        f"{'scenario':22} {'pages/s':>9} {'fetch p50':>10} {'fetch p99':>10} {'parse p99':>10} "
+        f"{'err %':>6} {'404 %':>6} {'429s':>5} {'peak MB':>8}"
+    )
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    for row in results:
+        line = (
+            f"{row['scenario']:22} {row['pages_per_sec'] or 0:>9.1f} {_fmt(row['fetch_p50_ms']):>10} "
+            f"{_fmt(row['fetch_p99_ms']):>10} {_fmt(row['parse_p99_ms']):>10} {row['error_pct']:>6.1f} "
+            f"{row['not_found_pct']:>6.1f} {row['server_429s']:>5} {row['peak_rss_mb']:>8.1f}"
+        )
+        if baseline is not None:
+            change = _change_pct(row, baseline)
+            line += f" {change:>+7.1f}%" if change is not None else f" {'-':>8}"
+        print(line)
+
+def _change_pct(row: Dict[str, Any], baseline: Dict[str, Dict[str, Any]]) -> Optional[float]:
+    previous = baseline.get(row["scenario"])
+    if not previous or not previous.get("pages_per_sec") or not row["pages_per_sec"]:
+        return None
+    return (row["pages_per_sec"] / previous["pages_per_sec"] - 1) * 100
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "End-to-end load test: run the real CLI (fetch, detect, parse, map, clean, write) against "
+            "a local mock business-page server and report throughput, latency, errors and peak RSS."
+        )
+    )
+    parser.add_argument(
+        "--urls",
+        type=int,
+        default=200,
+        help="URLs per scenario (default: 200); pages/sec is over the CLI's wall time, start-up included",
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Fetch worker counts to try")
+    parser.add_argument("--parse-workers", type=int, nargs="+", default=[0], help="Parse process counts to try")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(PAGE_SIZES), default=["typical"])
+    parser.add_argument("--not-found-rate", type=float, default=0.05, help="Share of URLs answered 404")
+    parser.add_argument("--soft-404-rate", type=float, default=0.02, help="Share answered 200 with a not-found page")
+    parser.add_argument("--drip-rate", type=float, default=0.02, help="Share whose body trickles out slowly")
+    parser.add_argument("--oversized-rate", type=float, default=0.0, help="Share served as oversized pages")
+    parser.add_argument(
+        "--latency",
+        default="lognormal:80:0.6",
+        help="Server delay: fixed:MS, uniform:LO:HI or lognormal:MEDIAN:SIGMA (default: lognormal:80:0.6)",
+    )
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Start a 429 burst every N seconds (0: never)")
+    parser.add_argument("--burst-length", type=float, default=0.0, help="Seconds each 429 burst lasts")
+    parser.add_argument("--oversized-mb", type=float, default=12.0, help="Size of oversized pages (default: 12)")
+    parser.add_argument("--jsonld", action="store_true", help="Serve pages with a JSON-LD block")
+    parser.add_argument("--cli-args", default="", help='Extra main.py arguments, e.g. "--stream --parser lxml"')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", default=None, help="Keep URL lists, outputs and CLI logs in this directory")
+    parser.add_argument("--output", default=None, help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Earlier results file to report pages/sec changes against")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=None,
+        help="With --compare, exit 1 if any scenario's pages/sec dropped by more than this percentage",
+    )
+    args = parser.parse_args()
+
+    rates = {
+        KIND_NOT_FOUND: args.not_found_rate,
+        KIND_SOFT_404: args.soft_404_rate,
+        KIND_DRIP: args.drip_rate,
+        KIND_OVERSIZED: args.oversized_rate,
+    }
+    if sum(rates.values()) > 1:
+        parser.error("The not-found, soft-404, drip and oversized rates add up to more than 1")
+    server_args = [
+        "--latency",
+        args.latency,
+        "--burst-every",
+        str(args.burst_every),
+        "--burst-length",
+        str(args.burst_length),
+        "--oversized-mb",
+        str(args.oversized_mb),
+        "--seed",
+        str(args.seed),
+    ]
+    if args.jsonld:
+        server_args.append("--jsonld")
+    cli_args = shlex.split(args.cli_args)
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+    temp_dir = None if args.keep else tempfile.TemporaryDirectory(prefix="load-test-")
+    workdir = args.keep or temp_dir.name  # type: ignore[union-attr]
+    results: List[Dict[str, Any]] = []
+    try:
+        for size in args.sizes:
+            for parse_workers in args.parse_workers:
+                for concurrency in args.concurrency:
+                    row = run_scenario(
+                        server_args, concurrency, parse_workers, size, args.urls, rates, cli_args, workdir, args.seed
+                    )
+                    if row["exit_code"] != 0:
+                        print(f"{row['scenario']}: main.py exited with {row['exit_code']}", file=sys.stderr)
+                    results.append(row)
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {row["scenario"]: row for row in json.load(f)["results"]}
+    print_table(results, baseline)
+
+    if args.output:
+        report = {
+            "meta": {
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+                "urls": args.urls,
+                "latency": args.latency,
+                "rates": rates,
+                "burst_every": args.burst_every,
+                "burst_length": args.burst_length,
+                "cli_args": cli_args,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+    failed = any(row["exit_code"] != 0 for row in results)
+    if baseline is not None and args.max_slowdown is not None:
+        for row in results:
+            change = _change_pct(row, baseline)
+            if change is not None and change < -args.max_slowdown:
+                print(f"REGRESSION {row['scenario']}: {change:+.1f}% pages/sec", file=sys.stderr)
+                failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import argparse
+import logging
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from pipelines.shard_merge import merge_shard_outputs  # type: ignore
+from pipelines.url_input import DEDUPE_MODES, INPUT_FORMATS  # type: ignore
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Merge the outputs of a --shard K/N run back into one file in input order."
+    )
+    parser.add_argument("output", help="Merged output path (.jsonl/.jsonl.gz for JSON Lines, otherwise a JSON array)")
+    parser.add_argument("shards", nargs="+", help="Per-shard output files, each with its .meta.json next to it")
+    parser.add_argument(
+        "-i",
+        "--input",
+        dest="inputs",
+        nargs="+",
+        default=None,
+        help="Input URL sources (default: the ones recorded in the shard metadata)",
+    )
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, default=None)
+    parser.add_argument("--url-column", default=None)
+    parser.add_argument("--dedupe", choices=DEDUPE_MODES, default=None)
+    parser.add_argument("--dedupe-error-rate", dest="dedupe_error_rate", type=float, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    for path in args.shards:
+        if not os.path.exists(path):
+            logging.error("Shard output not found: %s", path)
+            return 1
+
+    overrides = {
+        key: value
+        for key, value in (
+            ("input_format", args.input_format),
+            ("url_column", args.url_column),
+            ("dedupe", args.dedupe),
+            ("dedupe_error_rate", args.dedupe_error_rate),
+        )
+        if value is not None
+    }
+    try:
+        merge_shard_outputs(args.shards, args.output, args.inputs, overrides)
+    except (FileNotFoundError, ImportError, ValueError) as exc:
+        logging.error(str(exc))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
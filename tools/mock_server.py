@@ -0,0 +1,281 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+from synthetic_pages import PAGE_SIZES, generate_business_page  # type: ignore
+
+# URL path prefixes and what the server answers for them
+KIND_PAGE = "biz"
+KIND_NOT_FOUND = "missing"
+KIND_SOFT_404 = "soft404"
+KIND_DRIP = "drip"
+KIND_OVERSIZED = "oversized"
+KINDS = (KIND_PAGE, KIND_NOT_FOUND, KIND_SOFT_404, KIND_DRIP, KIND_OVERSIZED)
+
+_NOT_FOUND_PAGE = (
+    "<!DOCTYPE html><html><head><title>Page not found - Yelp</title></head>"
+    "<body><h1>Sorry, we couldn't find that page</h1>"
+    "<p>We looked everywhere, but the business you were looking for is not here.</p></body></html>"
+)
+
+class LatencyModel:
+    """
+    Response delay before the first byte, from a spec:
+    "fixed:MS", "uniform:LO_MS:HI_MS" or "lognormal:MEDIAN_MS:SIGMA".
+    """
+
+    def __init__(self, spec: str) -> None:
+        name, _, params = spec.partition(":")
+        try:
+            values = [float(value) for value in params.split(":")] if params else []
+        except ValueError:
+            values = []
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}.get(name)
+        if expected is None or len(values) != expected:
+            raise ValueError(
+                f"Invalid latency spec {spec!r}; expected fixed:MS, uniform:LO:HI or lognormal:MEDIAN:SIGMA"
+            )
+        self.spec = spec
+        self.name = name
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        if self.name == "fixed":
+            return self.values[0] / 1000
+        if self.name == "uniform":
+            return rng.uniform(self.values[0], self.values[1]) / 1000
+        median, sigma = self.values
+        return rng.lognormvariate(math.log(max(median, 0.001)), sigma) / 1000
+
+class MockConfig:
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        size: str = "typical",
+        jsonld: bool = False,
+        burst_every: float = 0.0,
+        burst_length: float = 0.0,
+        retry_after: float = 1.0,
+        drip_chunk: int = 4096,
+        drip_interval: float = 0.05,
+        oversized_mb: float = 12.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = LatencyModel(latency)
+        self.size = size
+        self.jsonld = jsonld
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.drip_chunk = max(1, drip_chunk)
+        self.drip_interval = drip_interval
+        self.oversized_mb = oversized_mb
+        self.seed = seed
+
+@lru_cache(maxsize=2048)
+def _page_bytes(seed: int, size: str, jsonld: bool) -> bytes:
+    return generate_business_page(seed, size, jsonld).encode("utf-8")
+
+@lru_cache(maxsize=8)
+def _oversized_bytes(seed: int, size: str, megabytes: float) -> bytes:
+    page = generate_business_page(seed, size)
+    # Padding in an inline script, the way bloated real pages carry it
+    padding = max(0, int(megabytes * 1024 * 1024) - len(page))
+    filler = "<script>window.__PAD__ = \"" + "x" * padding + "\";</script>"
+    return page.replace("</head>", filler + "</head>", 1).encode("utf-8")
+
+def _parse_path(path: str) -> Tuple[Optional[str], int, Dict[str, str]]:
+    parts = urlsplit(path)
+    segments = [segment for segment in parts.path.split("/") if segment]
+    query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+    if len(segments) != 2 or segments[0] not in KINDS:
+        return None, 0, query
+    # "/biz/some-name-42": the trailing number seeds the page
+    digits = segments[1].rsplit("-", 1)[-1]
+    return segments[0], int(digits) if digits.isdigit() else 0, query
+
+class MockStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.by_kind: Dict[str, int] = {}
+        self.by_status: Dict[str, int] = {}
+        self.bytes_sent = 0
+
+    def count(self, kind: str, status: int, sent: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+            self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+            self.bytes_sent += sent
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "byKind": dict(self.by_kind),
+                "byStatus": dict(self.by_status),
+                "bytesSent": self.bytes_sent,
+            }
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /<kind>/<name>-<n> with kind one of biz, missing (404), soft404
+    (200 "not found" page), drip (body trickled out in chunks) or
+    oversized; ?size= overrides the page size profile. GET /__stats
+    reports what was served.
+    """
+
+    server_version = "mock-business-pages"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        server: MockServer = self.server  # type: ignore[assignment]
+        if self.path == "/__stats":
+            self._send(200, json.dumps(server.stats.snapshot()).encode("utf-8"), "application/json", "stats")
+            return
+
+        kind, seed, query = _parse_path(self.path)
+        config = server.config
+        with server.rng_lock:
+            delay = config.latency.sample(server.rng)
+        if delay > 0:
+            time.sleep(delay)
+
+        if kind is None:
+            self._send(404, b"unknown path", "text/plain", "unknown")
+            return
+        if server.in_burst():
+            self._send(429, b"slow down", "text/plain", kind, {"Retry-After": f"{config.retry_after:g}"})
+            return
+
+        size = query.get("size", config.size)
+        if size not in PAGE_SIZES:
+            size = config.size
+        if kind == KIND_NOT_FOUND:
+            self._send(404, _NOT_FOUND_PAGE.encode("utf-8"), "text/html; charset=utf-8", kind)
+        elif kind == KIND_SOFT_404:
+            self._send(200, _NOT_FOUND_PAGE.encode("utf-8"), "text/html; charset=utf-8", kind)
+        elif kind == KIND_OVERSIZED:
+            self._send(200, _oversized_bytes(seed, size, config.oversized_mb), "text/html; charset=utf-8", kind)
+        elif kind == KIND_DRIP:
+            self._send(200, _page_bytes(seed, size, config.jsonld), "text/html; charset=utf-8", kind, drip=True)
+        else:
+            self._send(200, _page_bytes(seed, size, config.jsonld), "text/html; charset=utf-8", kind)
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        kind: str,
+        headers: Optional[Dict[str, str]] = None,
+        drip: bool = False,
+    ) -> None:
+        config = self.server.config  # type: ignore[attr-defined]
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            if not drip:
+                self.wfile.write(body)
+            else:
+                for start in range(0, len(body), config.drip_chunk):
+                    self.wfile.write(body[start : start + config.drip_chunk])
+                    self.wfile.flush()
+                    time.sleep(config.drip_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (early stop, body cap)
+            pass
+        self.server.stats.count(kind, status, len(body))  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig) -> None:
+        super().__init__(address, MockRequestHandler)
+        self.config = config
+        self.stats = MockStats()
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+        self.started_at = time.monotonic()
+
+    def in_burst(self) -> bool:
+        """Every `burst_every` seconds, answer 429 for `burst_length` seconds."""
+        config = self.config
+        if config.burst_every <= 0 or config.burst_length <= 0:
+            return False
+        return (time.monotonic() - self.started_at) % config.burst_every < config.burst_length
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve generated business pages locally for load tests (see tools/load_test.py)."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780, help="Port to listen on (0 picks a free one)")
+    parser.add_argument(
+        "--latency",
+        default="fixed:0",
+        help="Delay before each response: fixed:MS, uniform:LO:HI or lognormal:MEDIAN:SIGMA (default: fixed:0)",
+    )
+    parser.add_argument("--size", choices=sorted(PAGE_SIZES), default="typical", help="Default page size profile")
+    parser.add_argument("--jsonld", action="store_true", help="Embed a JSON-LD business block in pages")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Start a 429 burst every N seconds (0: never)")
+    parser.add_argument("--burst-length", type=float, default=0.0, help="Seconds each 429 burst lasts")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429s (default: 1)")
+    parser.add_argument("--drip-chunk", type=int, default=4096, help="Bytes per chunk for /drip/ pages")
+    parser.add_argument("--drip-interval", type=float, default=0.05, help="Seconds between /drip/ chunks")
+    parser.add_argument("--oversized-mb", type=float, default=12.0, help="Size of /oversized/ pages (default: 12)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the latency samples")
+    args = parser.parse_args()
+
+    try:
+        config = MockConfig(
+            latency=args.latency,
+            size=args.size,
+            jsonld=args.jsonld,
+            burst_every=args.burst_every,
+            burst_length=args.burst_length,
+            retry_after=args.retry_after,
+            drip_chunk=args.drip_chunk,
+            drip_interval=args.drip_interval,
+            oversized_mb=args.oversized_mb,
+            seed=args.seed,
+        )
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+
+    server = MockServer((args.host, args.port), config)
+    host, port = server.server_address[:2]
+    # load_test.py reads this line to find the port
+    print(f"Serving mock business pages on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import argparse
+import logging
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from extractors.dom_backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, build_document  # type: ignore
+from extractors.yelp_parser import parse_field_list, select_fields  # type: ignore
+from pipelines.output_sinks import OUTPUT_FORMATS, detect_output_format, write_records  # type: ignore
+from pipelines.parse_stage import ParseOptions  # type: ignore
+from pipelines.replay import iter_replayed_records  # type: ignore
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Re-extract records from a response archive (main.py --archive) without the network."
+    )
+    parser.add_argument("archive", help="Archive written by main.py --archive")
+    parser.add_argument("output", help="Output path; the extension picks the format as in main.py")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default=None)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parse processes (default: one per core; 0 parses inline)",
+    )
+    parser.add_argument(
+        "--all-versions",
+        action="store_true",
+        help="Replay every archived response, not just the newest one per URL",
+    )
+    parser.add_argument("--parser", dest="parser_backend", choices=PARSER_BACKENDS, default=DEFAULT_PARSER_BACKEND)
+    parser.add_argument("--no-structured-data", dest="structured_data", action="store_false")
+    parser.add_argument("--field-sources", action="store_true")
+    parser.add_argument("--compact-parse", action="store_true", help="Parse without scripts, styles and unread markup")
+    parser.add_argument("--fields", default=None, help="Comma-separated fields to extract (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if not os.path.exists(args.archive):
+        logging.error("Archive not found: %s", args.archive)
+        return 1
+    try:
+        build_document("<html></html>", args.parser_backend)
+        fields = select_fields(parse_field_list(args.fields)) if args.fields else None
+    except (ImportError, ValueError) as exc:
+        logging.error(str(exc))
+        return 1
+
+    options = ParseOptions(
+        parser_backend=args.parser_backend,
+        structured_data=args.structured_data,
+        field_sources=args.field_sources,
+        fields=fields,
+        compact_parse=args.compact_parse,
+    )
+    output_format = detect_output_format(args.output) or args.output_format or "json"
+    records = iter_replayed_records(
+        args.archive,
+        options,
+        workers=max(0, args.workers),
+        latest_only=not args.all_versions,
+    )
+    count = write_records(records, args.output, output_format)
+    logging.info("Wrote %d records to %s", count, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import argparse
+import html
+import json
+import os
+import random
+import sys
+from typing import Any, Dict, List
+
+# Reviews, photos and filler links per page for each size profile
+PAGE_SIZES: Dict[str, Dict[str, int]] = {
+    "small": {"reviews": 5, "photos": 6, "amenities": 6, "links": 20},
+    "typical": {"reviews": 25, "photos": 40, "amenities": 20, "links": 120},
+    "huge": {"reviews": 400, "photos": 300, "amenities": 60, "links": 1500},
+}
+
+_NAMES = ["Golden", "Rusty", "Blue Door", "Corner", "Little", "Urban", "Old Town", "Sunset", "Harbor", "Maple"]
+_KINDS = ["Bakery", "Pizzeria", "Taqueria", "Noodle Bar", "Cafe", "Brewery", "Diner", "Bistro", "Grill", "Deli"]
+_CATEGORIES = ["Desserts", "Bakeries", "Pizza", "Mexican", "Ramen", "Coffee & Tea", "Breakfast & Brunch", "Burgers"]
+_CITIES = [("Houston", "TX", "77098"), ("Denver", "CO", "80202"), ("Austin", "TX", "78701"), ("Portland", "OR", "97205")]
+_STREETS = ["Kirby Dr", "Wynkoop St", "Congress Ave", "Burnside St", "Main St", "Elm St"]
+_AMENITIES = [
+    "Offers Delivery",
+    "Offers Takeout",
+    "Curbside Pickup",
+    "Many Vegan Options",
+    "Women-owned",
+    "Wheelchair Accessible",
+    "Free Wi-Fi",
+    "Outdoor Seating",
+    "Good for Kids",
+    "Accepts Credit Cards",
+]
+_WORDS = (
+    "the cake was dense and moist with icing perfectly sweet staff friendly line moved quickly "
+    "crust blistered toppings fresh portions generous prices fair parking easy coffee strong "
+    "atmosphere cozy music loud service slow but worth the wait would definitely come back"
+).split()
+_DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def _business(rng: random.Random, seed: int) -> Dict[str, Any]:
+    city, state, zipcode = rng.choice(_CITIES)
+    return {
+        "name": f"{rng.choice(_NAMES)} {rng.choice(_KINDS)} #{seed}",
+        "slug": f"business-{seed}",
+        "rating": f"{rng.randint(10, 50) / 10:.1f}",
+        "reviews": rng.randint(3, 5000),
+        "price": "$" * rng.randint(1, 4),
+        "categories": rng.sample(_CATEGORIES, 3),
+        "street": f"{rng.randint(100, 9999)} {rng.choice(_STREETS)}",
+        "city": city,
+        "state": state,
+        "zipcode": zipcode,
+        "phone": f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+        "claimed": rng.random() < 0.7,
+    }
+
+def _jsonld(biz: Dict[str, Any], photos: List[str], reviews: List[str]) -> str:
+    data = {
+        "@context": "https://schema.org",
+        "@type": "Restaurant",
+        "name": biz["name"],
+        "priceRange": biz["price"],
+        "telephone": biz["phone"],
+        "image": photos[:10],
+        "address": {
+            "@type": "PostalAddress",
+            "streetAddress": biz["street"],
+            "addressLocality": biz["city"],
+            "addressRegion": biz["state"],
+            "postalCode": biz["zipcode"],
+        },
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": biz["rating"], "reviewCount": biz["reviews"]},
+        "openingHoursSpecification": [
+            {"@type": "OpeningHoursSpecification", "dayOfWeek": ["Monday", "Tuesday", "Wednesday"], "opens": "11:00", "closes": "22:00"}
+        ],
+        "review": [{"@type": "Review", "reviewBody": text} for text in reviews[:5]],
+    }
+    return json.dumps(data).replace("</", "<\\/")
+
+def generate_business_page(seed: int, size: str = "typical", jsonld: bool = False) -> str:
+    """Build a deterministic, Yelp-like business page for the given seed."""
+    profile = PAGE_SIZES[size]
+    rng = random.Random(seed)
+    biz = _business(rng, seed)
+    esc = html.escape
+
+    photos = [
+        f"https://s3-media{rng.randint(0, 4)}.fl.yelpcdn.com/bphoto/{seed}-{i}/photo.jpg"
+        for i in range(profile["photos"])
+    ]
+    reviews = [_sentence(rng, rng.randint(8, 60)) for _ in range(profile["reviews"])]
+
+    parts: List[str] = [
+        "<!DOCTYPE html>",
+        '<html lang="en"><head><meta charset="utf-8">',
+        f"<title>{esc(biz['name'])} - {biz['city']}, {biz['state']} - Yelp</title>",
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        "<style>" + ".c{color:#333}" * 50 + "</style>",
+        "<script>window.__CONFIG__ = " + json.dumps({"flags": list(range(200))}) + ";</script>",
+    ]
+    if jsonld:
+        parts.append(f'<script type="application/ld+json">{_jsonld(biz, photos, reviews)}</script>')
+    parts.append("</head><body>")
+
+    parts.append("<header><nav>")
+    parts.extend(f'<a href="/search?find_desc=item{i}">Explore {i}</a>' for i in range(profile["links"] // 4))
+    parts.append("</nav></header><main>")
+
+    parts.append('<div class="biz-header">')
+    parts.append(f"<h1>{esc(biz['name'])}</h1>")
+    parts.append(f'<div aria-label="{biz["rating"]} star rating" role="img"></div>')
+    parts.append(f'<a href="#reviews">{biz["reviews"]:,} reviews</a>')
+    parts.append(f"<span>{'Claimed' if biz['claimed'] else 'Unclaimed'}</span>")
+    parts.append(f"<span>{biz['price']}</span><span>")
+    parts.extend(
+        f'<a href="/c/{biz["city"].lower()}/{cat.lower().replace(" ", "")}">{esc(cat)}</a>'
+        for cat in biz["categories"]
+    )
+    parts.append("</span></div>")
+
+    parts.append('<section aria-label="Location &amp; Hours">')
+    parts.append(
+        f"<address><p>{biz['street']}</p><p>{biz['city']}, {biz['state']} {biz['zipcode']}</p></address>"
+    )
+    parts.append('<table><thead><tr><th colspan="2">Hours</th></tr></thead><tbody>')
+    parts.extend(f"<tr><th>{day}</th><td>11:00 AM - 10:00 PM</td></tr>" for day in _DAYS)
+    parts.append("</tbody></table></section>")
+
+    parts.append(f"<aside><p>{biz['phone']}</p>")
+    parts.append(f'<a href="/biz_redir?url=https%3A%2F%2F{biz["slug"]}.example.com">Business website</a></aside>')
+
+    parts.append('<section class="photos">')
+    parts.extend(f'<img src="{src}" alt="Photo {i}" loading="lazy">' for i, src in enumerate(photos))
+    parts.append("</section>")
+
+    parts.append("<section><h2>Amenities and More</h2><ul>")
+    parts.extend(f"<li>{_AMENITIES[i % len(_AMENITIES)]}</li>" for i in range(profile["amenities"]))
+    parts.append("</ul></section>")
+
+    parts.append("<section><h2>About the Business</h2>")
+    parts.append(f"<p>{_sentence(rng, 25)}</p><div>{_sentence(rng, 15)}</div>")
+    parts.append(f"<h3>Business owner: {rng.choice(['Sara', 'Alex', 'Jamie', 'Chris'])} B.</h3></section>")
+
+    parts.append('<section id="reviews"><h2>Recommended Reviews</h2>')
+    for i, text in enumerate(reviews):
+        parts.append(
+            '<div class="review">'
+            f'<a href="/user_details?userid=u{seed}-{i}"><img src="https://s3-media0.fl.yelpcdn.com/photo/u{i}/avatar.jpg"></a>'
+            f'<div aria-label="{rng.randint(1, 5)} star rating"></div>'
+            f"<p>{esc(text)}</p></div>"
+        )
+    parts.append("</section>")
+
+    parts.append('<section class="carousel"><h2>People Also Viewed</h2><ul>')
+    parts.extend(
+        f'<li><a href="/biz/other-{seed}-{i}">Other place {i}</a> <span>{rng.randint(1, 999)} reviews</span></li>'
+        for i in range(profile["links"] // 10)
+    )
+    parts.append("</ul></section></main>")
+
+    parts.append("<footer>")
+    parts.extend(f'<a href="/footer/{i}">Footer link {i}</a>' for i in range(profile["links"] // 2))
+    parts.append("<p>Copyright &copy; 2004&ndash;2025 Yelp Inc.</p></footer></body></html>")
+    return "\n".join(parts)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic business-page corpus to a directory.")
+    parser.add_argument("output_dir", help="Directory to write .html pages into")
+    parser.add_argument("--size", choices=sorted(PAGE_SIZES), default="typical")
+    parser.add_argument("--count", type=int, default=20, help="Number of pages (default: 20)")
+    parser.add_argument("--jsonld", action="store_true", help="Embed a JSON-LD business block")
+    parser.add_argument("--seed", type=int, default=0, help="First page seed (default: 0)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for seed in range(args.seed, args.seed + args.count):
+        path = os.path.join(args.output_dir, f"{args.size}-{seed}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_business_page(seed, args.size, args.jsonld))
+    print(f"Wrote {args.count} {args.size} pages to {args.output_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())